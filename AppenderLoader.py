@@ -4,12 +4,27 @@
 # This script loads multiple sequences, creates Read nodes for each shot,
 # and generates a single AppendClip node for easy review.
 # It now includes a "Play" button that simply simulates Alt+F and Enter key presses.
+# Running it again updates the loaded Reads in place and only adds the shots that are new.
 
 import nuke
 import os
 import re
-import random
 import colorsys
+import rendercatalog
+import rendermanifest
+import versions
+import movindex
+import storageroots
+import asyncload
+import graphbuilder
+import nodelayout
+import loadplan
+
+# User variables
+COLUMNS = 5  # Reads per grid row
+BACKDROP_PADDING = 290
+
+SHOT_FOLDER_RE = re.compile(r'^SH(\d+)$')
 
 def get_current_sequence():
     script_name = nuke.root().name()
@@ -27,32 +42,62 @@ def get_sequence_from_user(current_sequence):
     return sequence
 
 def get_shot_numbers(sequence):
-    return [f"{sequence}_{i:04d}" for i in range(10, 1000, 10)]
+    # One listing of the sequence folder instead of probing SH0010-SH0990
+    sequence_path = storageroots.sequence_path("out", sequence)
+    try:
+        names = rendercatalog.listdir(sequence_path)
+    except OSError:
+        print(f"Sequence folder not found: {sequence_path}")
+        return []
+    shots = sorted((match.group(1) for match in map(SHOT_FOLDER_RE.match, names) if match), key=int)
+    return [f"{sequence}_{shot}" for shot in shots]
 
 def find_latest_render(sequence, shot):
-    base_path = f"Y:/20105_Pysna_film/out/FILM/SQ{sequence}/SH{shot}/compositing/preview/"
-    if not os.path.exists(base_path):
+    base_path = storageroots.shot_path("out", sequence, shot, "compositing", "preview")
+    render_layers = rendermanifest.read_render_layers(base_path, versions.LATEST)
+    if render_layers and rendermanifest.MAIN_LAYER in render_layers:
+        published = render_layers[rendermanifest.MAIN_LAYER]
+        return os.path.join(published["path"], published["file"])
+    try:
+        files = [f for f in rendercatalog.listdir(base_path) if f.endswith('.mov')]
+    except OSError:
         return None
-    files = [f for f in os.listdir(base_path) if f.endswith('.mov')]
-    return os.path.join(base_path, max(files)) if files else None
-
-def create_read_node(sequence, shot, render_path, color):
-    full_path = render_path
-    
-    unique_name = f"Read_SQ{sequence}_SH{shot}_{random.randint(1000, 9999)}"
-    
-    read_node = nuke.nodes.Read(name=unique_name)
-    read_node['file'].setValue(full_path.replace("\\", "/"))
-    read_node['localizationPolicy'].setValue(1)  # Set to "on"
-    read_node['tile_color'].setValue(int(color))
-    read_node['colorspace'].setValue("Output - Rec.709")
-    read_node['frame_mode'].setValue("start at")
-    read_node['frame'].setValue(str(int(read_node['first'].getValue())))
-    
-    return read_node
-def create_append_clip(read_nodes):
-    append_clip = nuke.nodes.AppendClip(inputs=read_nodes)
-    append_clip['name'].setValue(f'AppendClip_{random.randint(1000, 9999)}')
+    return os.path.join(base_path, versions.latest_file(files)) if files else None
+
+def plan_read(sequence, shot, render_path, color, mov_info=None):
+    """The Read a shot should have, as a loadplan.PlannedRead."""
+    values = {"file": render_path.replace("\\", "/")}
+    knobs = dict(
+        localizationPolicy=1,  # Set to "on"
+        tile_color=int(color),
+        colorspace="Output - Rec.709",
+        frame_mode="start at",
+    )
+    if mov_info and mov_info.frame_range:
+        # Range from the container index, Nuke does not have to probe the movie
+        first, last = mov_info.frame_range
+        values.update(first=first, last=last, origfirst=first, origlast=last)
+        knobs["frame"] = str(first)
+    return loadplan.PlannedRead(loadplan.node_name("Read", f"SQ{sequence}", f"SH{shot}"), values, knobs,
+                                info={"sequence": sequence, "shot": shot})
+
+def create_read_node(sequence, shot, render_path, color, mov_info=None, nodes=None, planned=None):
+    """nodes is nuke.nodes by default, or a graphbuilder.GraphBuilder to create the Read in one paste with others."""
+    planned = planned or plan_read(sequence, shot, render_path, color, mov_info)
+    if "first" in planned.values:
+        read_node = (nodes or nuke.nodes).Read(name=planned.name, **planned.create_knobs())
+    else:
+        # Without an index the range has to be read back from the real node
+        read_node = nuke.nodes.Read(name=planned.name, **planned.create_knobs())
+        read_node['frame'].setValue(str(int(read_node['first'].getValue())))
+    
+    return loadplan.mark(read_node)
+def append_clip_name(sequences):
+    return loadplan.node_name("AppendClip", "_".join(sequences))
+
+def create_append_clip(read_nodes, sequences):
+    append_clip = nuke.nodes.AppendClip(inputs=[graphbuilder.real_node(node) for node in read_nodes])
+    append_clip['name'].setValue(append_clip_name(sequences))
     append_clip['tile_color'].setValue(0xff69f7ff)
     
     # Add Python button
@@ -82,27 +127,19 @@ except Exception as e:
     return append_clip
 
 def create_backdrop(nodes, sequences):
-    bdX = min([node.xpos() for node in nodes])
-    bdY = min([node.ypos() for node in nodes])
-    bdW = max([node.xpos() + node.screenWidth() for node in nodes]) - bdX
-    bdH = max([node.ypos() + node.screenHeight() for node in nodes]) - bdY
-
-    backdrop_padding = 340
-    bdX += backdrop_padding * 0.15
-    bdY += backdrop_padding * 0.15
-    bdW *= 0.85
-    bdH *= 0.85
-
-    backdrop = nuke.nodes.BackdropNode(
-        xpos = bdX - backdrop_padding,
-        bdwidth = bdW + backdrop_padding * 2,
-        ypos = bdY - backdrop_padding,
-        bdheight = bdH + backdrop_padding * 2,
-        tile_color = int(0x808080ff),
-        note_font_size=42,
-        name = f'SEQ_Check_{"-".join(sequences)}_{random.randint(1000, 9999)}'
+    name = loadplan.node_name("SEQ_Check", "_".join(sequences))
+    backdrop = nuke.toNode(name)
+    if backdrop is not None:
+        # Re-run, the backdrop from the first run is fitted around the grown grid
+        nodelayout.fit_backdrop(backdrop, nodes, BACKDROP_PADDING)
+        return backdrop
+    backdrop = nodelayout.backdrop(
+        nodes,
+        label=f"SEQ Check {', '.join(sequences)}",
+        color=0x808080ff,
+        padding=BACKDROP_PADDING,
+        name=name
     )
-    backdrop['label'].setValue(f"SEQ Check {', '.join(sequences)}")
     
     return backdrop
 
@@ -123,8 +160,8 @@ def load_sequence_and_create_append_clip():
         nuke.message("Could not find PFX_Write_MAIN node.")
         return
     
-    start_x = write_node.xpos() - 500
-    start_y = write_node.ypos() + 900
+    # Wanted spot below the Write, moved down past existing nodes once the shot count is known
+    layout = {"origin": (write_node.xpos() - 500, write_node.ypos() + 900)}
     
     all_read_nodes = []
     sequences = []
@@ -139,31 +176,90 @@ def load_sequence_and_create_append_clip():
         sequences.append(sequence)
         current_sequence = f"{int(sequence) + 10:04d}"  # Increment for next iteration
     
-    for index, sequence in enumerate(sequences):
-        color = generate_color(index, len(sequences))
-        
-        for shot in get_shot_numbers(sequence):
-            render_path = find_latest_render(sequence, shot.split('_')[1])
-            if render_path:
-                read_node = create_read_node(sequence, shot.split('_')[1], render_path, color)
-                all_read_nodes.append(read_node)
-    
-    if all_read_nodes:
-        spacing_x, spacing_y = 250, 250
-        
-        for i, node in enumerate(all_read_nodes):
-            node.setXYpos(start_x + (i % 5) * spacing_x, start_y + (i // 5) * spacing_y)
-        
-        append_clip = create_append_clip(all_read_nodes)
-        print(f"Debug: AppendClip node created: {append_clip.name()}")
-        append_clip.setXYpos(start_x + 2 * spacing_x, start_y + ((len(all_read_nodes) - 1) // 5 + 1) * spacing_y + 100)
-        
-        all_nodes = all_read_nodes + [append_clip]
-        backdrop = create_backdrop(all_nodes, sequences)
+    colors = {sequence: generate_color(index, len(sequences)) for index, sequence in enumerate(sequences)}
+    spacing_x, spacing_y = 250, 250
+    
+    # Reads already in the script, a re-run only updates them and adds the shots that are new
+    read_index = loadplan.ReadIndex()
+    counts = {"new": 0, "updated": 0, "unchanged": 0}
+    append_clip = nuke.toNode(append_clip_name(sequences))
+    if append_clip is not None:
+        # The grid of the first run is continued below its last shot
+        all_read_nodes.extend(node for node in (append_clip.input(i) for i in range(append_clip.inputs())) if node)
+        if all_read_nodes:
+            layout["origin"] = (min(node.xpos() for node in all_read_nodes), min(node.ypos() for node in all_read_nodes))
+            layout["reserved"] = True
+    clip_inputs = len(all_read_nodes)
+    
+    def list_jobs():
+        jobs = [(sequence, shot.split('_')[1]) for sequence in sequences for shot in get_shot_numbers(sequence)]
+        layout["count"] = len(jobs)
+        return jobs
+    
+    def reserve_space():
+        # Room for every listed shot, the AppendClip and the backdrop, taken once for the whole load
+        rows = (max(layout.get("count", 0), 1) - 1) // COLUMNS + 1
+        width = (COLUMNS - 1) * spacing_x + 80
+        height = rows * spacing_y + 200
+        x, y = layout["origin"]
+        x, y = nodelayout.find_free_origin(x - BACKDROP_PADDING, y - BACKDROP_PADDING,
+                                           width + BACKDROP_PADDING * 2, height + BACKDROP_PADDING * 2)
+        layout["origin"] = (x + BACKDROP_PADDING, y + BACKDROP_PADDING)
+        layout["reserved"] = True
+    
+    def discover(job):
+        render_path = find_latest_render(job[0], job[1])
+        if not render_path:
+            return None
+        return render_path, movindex.try_read_index(render_path)
+    
+    def build_batch(batch):
+        # Runs on the main thread, Reads are placed on the grid as they arrive
+        if not layout.get("reserved"):
+            reserve_space()
+        start_x, start_y = layout["origin"]
+        planned_reads = [plan_read(sequence, shot, render_path, colors[sequence], mov_info)
+                         for (sequence, shot), (render_path, mov_info) in batch]
+        load_diff = loadplan.diff(planned_reads, read_index)
+        loadplan.apply_changes(load_diff)
+        counts["new"] += len(load_diff.new)
+        counts["updated"] += len(load_diff.changed)
+        counts["unchanged"] += len(load_diff.unchanged)
         
-        nuke.message(f"Loaded {len(all_read_nodes)} shots from {len(sequences)} sequences: {', '.join(sequences)}")
-    else:
-        nuke.message("No shots were loaded.")
+        graph = graphbuilder.GraphBuilder()
+        for planned in load_diff.new:
+            read_node = create_read_node(planned.info["sequence"], planned.info["shot"], None, None, nodes=graph, planned=planned)
+            read_index.add(planned, read_node)
+            i = len(all_read_nodes)
+            read_node.setXYpos(start_x + (i % COLUMNS) * spacing_x, start_y + (i // COLUMNS) * spacing_y)
+            all_read_nodes.append(read_node)
+        # The whole batch is created with one paste
+        graph.apply()
+    
+    def finish(load_result):
+        summary = load_result.summary()
+        if all_read_nodes:
+            start_x, start_y = layout["origin"]
+            if append_clip is None:
+                clip = create_append_clip(all_read_nodes, sequences)
+                print(f"Debug: AppendClip node created: {clip.name()}")
+            else:
+                clip = append_clip
+                for i in range(clip_inputs, len(all_read_nodes)):
+                    clip.setInput(i, graphbuilder.real_node(all_read_nodes[i]))
+            clip.setXYpos(start_x + 2 * spacing_x, start_y + ((len(all_read_nodes) - 1) // COLUMNS + 1) * spacing_y + 100)
+            
+            all_nodes = all_read_nodes + [clip]
+            backdrop = create_backdrop(all_nodes, sequences)
+            
+            message = f"Loaded {len(all_read_nodes)} shots from {len(sequences)} sequences: {', '.join(sequences)}"
+            message += f"\n{counts['new']} new, {counts['updated']} updated, {counts['unchanged']} up to date"
+            nuke.message(message + (f"\n\n{summary}" if summary else ""))
+        else:
+            nuke.message("No shots were loaded." + (f"\n\n{summary}" if summary else ""))
+    
+    # Filesystem discovery runs on worker threads, nodes are created on the main thread in shot order
+    asyncload.run_async("Appender Loader", list_jobs, discover, build_batch, finish)
 
 if __name__ == "__main__":
     load_sequence_and_create_append_clip()
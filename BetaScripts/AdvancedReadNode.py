@@ -2,9 +2,11 @@
 import nuke
 import os
 import re
+import storageroots
+import bulkedit
 
 # User variables
-WORK_ROOT = "Z:/20105_Pysna_film/work/FILM"
+WORK_ROOT = storageroots.film_path("work")
 
 def get_read_node_info(node):
     """Extract sequence, shot, and version information from the Read node."""
@@ -103,5 +105,5 @@ def onCreateCallback():
     if node.Class() == 'Read':
         add_mt_tab(node)
 
-# Register the callback
-nuke.addOnCreate(onCreateCallback, nodeClass='Read')
+# Register the callback, Reads created during a bulk edit get the tab afterwards
+bulkedit.register('onCreate', onCreateCallback, 'Read', reconcile=add_mt_tab)
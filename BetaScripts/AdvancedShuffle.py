@@ -2,6 +2,8 @@
 
 import nuke
 import uuid
+import bulkedit
+import nodeindex
 
 # User variable for vertical spacing (in pixels)
 VERTICAL_SPACING = 10
@@ -79,17 +81,14 @@ def on_knob_changed():
         update_shuffle_node(node)
 
 def setup_callbacks():
-    nuke.removeOnUserCreate(on_user_create)
-    nuke.removeKnobChanged(on_knob_changed)
-    
+    # Registered through bulkedit so PFX builders can suspend them, nodes built in bulk get their labels afterwards
     for node_class in ['Shuffle', 'Shuffle2']:
-        nuke.addOnUserCreate(on_user_create, nodeClass=node_class)
-        nuke.addKnobChanged(on_knob_changed, nodeClass=node_class)
+        bulkedit.register('onUserCreate', on_user_create, node_class)
+        bulkedit.register('knobChanged', on_knob_changed, node_class, reconcile=update_shuffle_node)
 
 def update_existing_shuffle_nodes():
-    for node in nuke.allNodes():
-        if node.Class() in ['Shuffle', 'Shuffle2']:
-            update_shuffle_node(node)
+    for node in nodeindex.get().of_class('Shuffle', 'Shuffle2', root_only=True):
+        update_shuffle_node(node)
 
 def initialize_dynamic_shuffle_labeler():
     setup_callbacks()
@@ -10,12 +10,18 @@
 import os
 import re
 import nuke
+import renderindex
+import rendermanifest
+import framesets
+import versions
+import storageroots
 
 # User customizable variables
 NODE_SPACING_X = 280  # Horizontal spacing between node groups
 NODE_SPACING_Y = 1000  # Vertical spacing between rows
 NODES_PER_ROW = 5     # Number of node groups per row
 CRYPTO_OFFSET_X = -100 # Offset for Crypto node on X-axis
+VERSION_POLICY = versions.LATEST_COMPLETE
 
 def print_debug(message):
     print(f"DEBUG: {message}")
@@ -70,40 +76,16 @@ def arrange_nodes(nodes, start_x, start_y):
         
         node.setXYpos(int(node_x), int(node_y))
 
-def find_latest_version(path):
-    versions = [d for d in os.listdir(path) if d.startswith('v') and os.path.isdir(os.path.join(path, d))]
-    return max(versions) if versions else None
+def get_cut_range():
+    root = nuke.root()
+    return int(root['first_frame'].value()), int(root['last_frame'].value())
 
 def find_all_render_layers(shot_path):
     print_debug(f"Finding all render layers in: {shot_path}")
-    render_layers = {}
-    
-    version_folders = [d for d in os.listdir(shot_path) if d.startswith('v') and os.path.isdir(os.path.join(shot_path, d))]
-    version_folders.sort(reverse=True)
-    
-    for version in version_folders:
-        version_path = os.path.join(shot_path, version)
-        for layer in os.listdir(version_path):
-            layer_path = os.path.join(version_path, layer)
-            if os.path.isdir(layer_path):
-                render_files = [f for f in os.listdir(layer_path) if f.endswith('.exr')]
-                if render_files and layer not in render_layers:
-                    render_layers[layer] = {"version": version, "file": render_files[0], "path": layer_path}
-    
-    if not render_layers:
-        for root, dirs, files in os.walk(shot_path):
-            for dir in dirs:
-                if dir.startswith("exr."):
-                    layer_name = dir.split(".")[-1]
-                    layer_path = os.path.join(root, dir)
-                    version = find_latest_version(layer_path)
-                    if version:
-                        version_path = os.path.join(layer_path, version)
-                        render_files = [f for f in os.listdir(version_path) if f.endswith('.exr')]
-                        if render_files:
-                            render_layers[layer_name] = {"version": version, "file": render_files[0], "path": version_path}
-    
-    print_debug(f"Found render layers: {render_layers}")
+    render_layers = rendermanifest.read_render_layers(shot_path, VERSION_POLICY, get_cut_range())
+    if render_layers is None:
+        render_layers = renderindex.index_render_tree(shot_path, VERSION_POLICY, get_cut_range())
+    print_debug(f"Found render layers: {sorted(render_layers)}")
     return render_layers
 
 def create_crypto_setup(read_node, selected_node):
@@ -136,15 +118,13 @@ def load_latest_renders(shot_path, seq_num, shot_num, start_x, start_y, selected
 
     for layer_name, render_info in render_layers.items():
         version = render_info["version"]
-        latest_render = render_info["file"]
-        render_path = os.path.join(render_info["path"], latest_render).replace("\\", "/")
+        render_path = os.path.join(render_info["path"], render_info["pattern"]).replace("\\", "/")
         
         read_node = nuke.createNode("Read")
-        read_node["file"].setValue(render_path.replace(latest_render.split(".")[-2], "######"))
+        read_node["file"].setValue(render_path)
         
-        frame_files = [f for f in os.listdir(os.path.dirname(render_path)) if f.endswith('.exr')]
-        frame_numbers = [int(re.search(r'(\d+)\.exr$', f).group(1)) for f in frame_files]
-        first_frame, last_frame = min(frame_numbers), max(frame_numbers)
+        frame_set = render_info["frames"]
+        first_frame, last_frame = frame_set.first, frame_set.last
         
         read_node["first"].setValue(first_frame)
         read_node["last"].setValue(last_frame)
@@ -153,7 +133,7 @@ def load_latest_renders(shot_path, seq_num, shot_num, start_x, start_y, selected
         read_node["name"].setValue(f"Read_{layer_name}_{version}")
         read_node["label"].setValue(f"{layer_name}\n(v{version.split('v')[1]})")
         
-        frame_ranges[layer_name] = (first_frame, last_frame)
+        frame_ranges[layer_name] = frame_set
         created_nodes.append(read_node)
         print_debug(f"Created Read node for {layer_name}")
 
@@ -180,17 +160,27 @@ def check_frame_range_mismatch(frame_ranges):
     if not frame_ranges:
         return "No frame ranges to compare."
 
-    reference_range = next(iter(frame_ranges.values()))
+    frame_sets = {layer: frames if isinstance(frames, framesets.FrameSet) else framesets.FrameSet([frames])
+                  for layer, frames in frame_ranges.items()}
+    reference_range = next(iter(frame_sets.values())).frame_range()
     mismatches = []
+    gaps = []
 
-    for layer, range in frame_ranges.items():
-        if range != reference_range:
-            mismatches.append(f"{layer}: {range[0]}-{range[1]}")
+    for layer, frame_set in frame_sets.items():
+        if frame_set.frame_range() != reference_range:
+            mismatches.append(f"{layer}: {frame_set.first}-{frame_set.last}")
+        if frame_set.has_gaps():
+            gaps.append(f"{layer}: missing {framesets.format_ranges(frame_set.missing_ranges())}")
+        if frame_set.duplicates:
+            gaps.append(f"{layer}: frames with duplicate padding {framesets.format_ranges(framesets.ranges_from_frames(frame_set.duplicates))}")
 
     if mismatches:
-        return "Frame range mismatches detected:\n" + "\n".join(mismatches)
+        message = "Frame range mismatches detected:\n" + "\n".join(mismatches)
     else:
-        return f"All layers have the same frame range: {reference_range[0]}-{reference_range[1]}"
+        message = f"All layers have the same frame range: {reference_range[0]}-{reference_range[1]}"
+    if gaps:
+        message += "\n\nFrame problems detected:\n" + "\n".join(gaps)
+    return message
 
 def get_seq_shot_from_read_node(node):
     file_path = node['file'].value()
@@ -226,7 +216,7 @@ def find_latest_renders_and_setup_crypto():
             selected_node = None
 
     if seq_num and shot_num:
-        shot_path = f"Y:/20105_Pysna_film/out/FILM/SQ{seq_num}/SH{shot_num}/lighting/render/"
+        shot_path = storageroots.shot_path("out", seq_num, shot_num, "lighting", "render")
         print_debug(f"Shot path: {shot_path}")
         if os.path.exists(shot_path):
             created_nodes, frame_ranges = load_latest_renders(shot_path, seq_num, shot_num, start_x, start_y, selected_node)
@@ -6,6 +6,8 @@
 
 import nuke
 import colorsys
+import bulkedit
+import nodeindex
 
 # User variables
 ENABLE_DYNAMIC_LABELING = True  # Controls label updates (Animated, Mix)
@@ -112,8 +114,13 @@ def on_knob_changed():
     if not (ENABLE_DYNAMIC_LABELING or ENABLE_COLOR_CHANGES):
         return
 
-    node = nuke.thisNode()
-    if not is_valid_node(node):
+    update_node(nuke.thisNode())
+
+def update_node(node):
+    """
+    Update the label and/or color of one node, also used to reconcile nodes built during a bulk edit.
+    """
+    if not (ENABLE_DYNAMIC_LABELING or ENABLE_COLOR_CHANGES) or not is_valid_node(node):
         return
 
     try:
@@ -127,14 +134,13 @@ def setup_callback():
     """
     Set up the necessary callback for all existing and future nodes.
     """
-    nuke.removeKnobChanged(on_knob_changed)
-    nuke.addKnobChanged(on_knob_changed, nodeClass='*')
+    bulkedit.register('knobChanged', on_knob_changed, '*', reconcile=update_node)
 
 def update_all_existing_nodes():
     """
     Update the label and/or color of all nodes already present in the current Nuke script.
     """
-    for node in nuke.allNodes():
+    for node in nodeindex.get().all(root_only=True):
         if is_valid_node(node):
             try:
                 is_animated = update_node_label(node) if ENABLE_DYNAMIC_LABELING else any(knob.isAnimated() for knob in node.knobs().values())
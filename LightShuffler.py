@@ -1,11 +1,20 @@
-# LightShuffler_v8.py
+# LightShuffler_v9.py
 #
 # This script splits light channels from a selected node, creates Shuffle nodes for each channel,
 # adds a Remove node after each Shuffle to keep only RGB channels, and merges them together.
 # It excludes 'lighting' and 'lightning' channels, creates a gray backdrop for all generated nodes,
 # and labels the merge nodes after the shuffle nodes being merged in the A pipe.
+# Lean mode leaves out the Removes: the Shuffles write the light group straight to rgba and the
+# plus merges only write rgb, one node less per light group. The merges can be built as a
+# balanced tree (log2(N) deep) instead of a chain (N deep).
+# With PRUNE_INACTIVE, light groups that stay black in a few sampled frames of the Read are left out.
 
 import nuke
+import exrheader
+import graphbuilder
+import bulkedit
+import nodelayout
+import aovstats
 
 # Global variables for user customization
 OFFSET_X = 250
@@ -14,60 +23,155 @@ MERGE_OFFSET_Y = 400
 BACKDROP_COLOR = 0x7F7F7FFF  # Gray color
 BACKDROP_LABEL_FONT_SIZE = 42
 BACKDROP_PADDING = 100  # Padding around nodes inside backdrop
+LEAN_MODE = False  # No Removes, the merges only add up rgb (other layers of the source pass through)
+BALANCED_MERGES = False  # Merge the light groups pairwise in a balanced tree instead of a chain
+PRUNE_INACTIVE = False  # Skip light groups whose sampled peak stays below PRUNE_THRESHOLD (needs NumPy)
+PRUNE_THRESHOLD = 1e-4
 
-def split_light_channels():
-    # Select the input node
-    node = nuke.selectedNode()
-    if not node:
-        nuke.message("Please select a node.")
-        return
-
-    # Get all channels and filter for light channels, excluding 'lighting' and 'lightning'
-    all_channels = node.channels()
+def find_light_channels(all_channels):
+    """Light group layers in a list of channel names, excluding 'lighting' and 'lightning'."""
     light_channels = [chan.split('.')[0] for chan in all_channels
                       if ('light' in chan.lower() or 'lght' in chan.lower())
                       and not chan.lower().startswith(('lighting', 'lightning'))]
     light_channels = list(set(light_channels))  # Remove duplicates
     light_channels.sort(key=str.lower)
+    return light_channels
+
+def plan_light_channels(exr_path):
+    """Light groups of a rendered EXR, read from its header only. Works without Nuke."""
+    return find_light_channels(exrheader.nuke_channel_names(exrheader.read_header(exr_path).channels))
+
+def prune_inactive(node, light_channels, threshold=PRUNE_THRESHOLD):
+    """
+    Split light_channels of a Read into (active, {pruned layer: peak}) from the peaks of a few
+    sampled frames. Groups that could not be measured are kept.
+    """
+    paths = aovstats.read_sample_paths(node)
+    if not paths or not aovstats.is_available():
+        return light_channels, {}
+    peaks = aovstats.layer_peaks(paths, set(light_channels))
+    pruned = {chan: peaks[chan] for chan in light_channels if chan in peaks and peaks[chan] < threshold}
+    return [chan for chan in light_channels if chan not in pruned], pruned
+
+def merge_chain(graph, branches, shuffle_nodes):
+    """Merge the branch outputs one after another, each Merge gets the next light group in A."""
+    merge_nodes = []
+    dot_nodes = []
+    for i, branch in enumerate(branches):
+        if i == 0:
+            continue
+        dot_node = graph.Dot()
+        dot_nodes.append(dot_node)
+        dot_node.setInput(0, branch)
+        merge = graph.Merge2(
+            inputs=[branches[0] if i == 1 else merge_nodes[-1], dot_node],
+            operation="plus",
+            label=shuffle_nodes[i].name(),
+            output="rgb"
+        )
+        merge.setXYpos(branches[0].xpos(), branches[0].ypos() + MERGE_OFFSET_Y + (i - 1) * 100)
+        dot_node.setXYpos(branch.xpos() + 34, merge.ypos() + 5)
+        merge_nodes.append(merge)
+    return merge_nodes, dot_nodes
+
+def merge_balanced(graph, branches, shuffle_nodes):
+    """Merge the branch outputs pairwise, level by level, so every light group goes through log2(N) merges."""
+    merge_nodes = []
+    # (node, names of the light groups it carries)
+    level = [(branch, [shuffle.name()]) for branch, shuffle in zip(branches, shuffle_nodes)]
+    depth = 0
+    while len(level) > 1:
+        depth += 1
+        next_level = []
+        for i in range(0, len(level) - 1, 2):
+            (b_node, b_names), (a_node, a_names) = level[i], level[i + 1]
+            merge = graph.Merge2(
+                inputs=[b_node, a_node],
+                operation="plus",
+                label=a_names[0] if len(a_names) == 1 else f"{a_names[0]} .. {a_names[-1]}",
+                output="rgb"
+            )
+            merge.setXYpos(b_node.xpos(), branches[0].ypos() + MERGE_OFFSET_Y + (depth - 1) * 150)
+            merge_nodes.append(merge)
+            next_level.append((merge, b_names + a_names))
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    return merge_nodes, []
+
+def split_light_channels(lean=None, balanced=None, prune=None):
+    """
+    Build the light group setup for the selected node and return the last node of it.
+    lean, balanced and prune default to LEAN_MODE, BALANCED_MERGES and PRUNE_INACTIVE.
+    In lean mode no Remove is built: every Shuffle writes its light group to rgba and the merges
+    only touch rgb. The other layers of the source still ride along in the stream, Nuke only pulls
+    them when something downstream asks for them.
+    """
+    lean = LEAN_MODE if lean is None else lean
+    balanced = BALANCED_MERGES if balanced is None else balanced
+    prune = PRUNE_INACTIVE if prune is None else prune
+
+    # Select the input node
+    node = nuke.selectedNode()
+    if not node:
+        nuke.message("Please select a node.")
+        return None
+
+    # Read nodes of EXRs are answered from the file header, Nuke does not have to open the file
+    light_channels = find_light_channels(exrheader.channels_for_node(node))
 
     if not light_channels:
         nuke.message("No suitable light channels found in the selected node.")
-        return
+        return None
+
+    if prune:
+        if not aovstats.is_available():
+            print("NumPy is not available, light groups are not pruned.")
+        light_channels, pruned = prune_inactive(node, light_channels)
+        if pruned:
+            report = "\n".join(f"{chan}  (peak {peak:.2g})" for chan, peak in sorted(pruned.items()))
+            print(f"Pruned inactive light groups:\n{report}")
+            if not light_channels:
+                nuke.message(f"All light groups are black in the sampled frames:\n{report}")
+                return None
+            nuke.message(f"Skipped {len(pruned)} inactive light groups:\n{report}")
 
+    # Everything is collected first and created with one paste at the end
+    graph = graphbuilder.GraphBuilder()
     dot_nodes = []
     shuffle_nodes = []
     remove_nodes = []
-    merge_nodes = []
-    second_dot_nodes = []
 
     # Calculate the starting position
     start_x = node.xpos() + BACKDROP_PADDING
     start_y = node.ypos() + BACKDROP_PADDING
 
-    # Create Dot, Shuffle, and Remove nodes for each light channel
+    # Create Dot, Shuffle, and (unless lean) Remove nodes for each light channel
     for i, chan in enumerate(light_channels):
-        dot_node = nuke.nodes.Dot()
-        shuf_node = nuke.nodes.Shuffle2(
+        dot_node = graph.Dot()
+        shuf_node = graph.Shuffle2(
             name=chan,
             inputs=[dot_node],
+            out1="rgba",
             postage_stamp=True,
             hide_input=False
         )
-        shuf_node["in1"].setValue(chan)
-        remove_node = nuke.nodes.Remove(
-            operation="keep",
-            channels="rgb",
-            name=f"Keep_{chan}",
-            label="keep [value channels]",
-            inputs=[shuf_node]
-        )
+        shuf_node.set_live("in1", chan)  # Set on the real node so Shuffle2 updates its mappings
         xpos = start_x + OFFSET_X * i
         ypos = start_y + OFFSET_Y
         dot_node.setXYpos(xpos, ypos)
         shuf_node.setXYpos(xpos - 34, dot_node.ypos() + 100)
-        remove_node.setXYpos(xpos - 34, shuf_node.ypos() + 100)
+        if not lean:
+            remove_node = graph.Remove(
+                operation="keep",
+                channels="rgb",
+                name=f"Keep_{chan}",
+                label="keep [value channels]",
+                inputs=[shuf_node]
+            )
+            remove_node.setXYpos(xpos - 34, shuf_node.ypos() + 100)
+            remove_nodes.append(remove_node)
         shuffle_nodes.append(shuf_node)
-        remove_nodes.append(remove_node)
         dot_nodes.append(dot_node)
 
     # Connect Dot nodes
@@ -77,37 +181,27 @@ def split_light_channels():
         else:
             dot.setInput(0, dot_nodes[i - 1])
 
-    # Create Merge nodes to combine shuffled and removed channels
-    for i, remove in enumerate(remove_nodes):
-        if i == 0:
-            continue
-        else:
-            dot_node = nuke.nodes.Dot()
-            second_dot_nodes.append(dot_node)
-            dot_node.setInput(0, remove)
-            merge = nuke.nodes.Merge2(
-                inputs=[remove_nodes[0] if i == 1 else merge_nodes[-1], dot_node],
-                operation="plus",
-                label=shuffle_nodes[i].name(),
-                output="rgb"
-            )
-            merge.setXYpos(remove_nodes[0].xpos(), remove_nodes[0].ypos() + MERGE_OFFSET_Y + (i - 1) * 100)
-            dot_node.setXYpos(remove.xpos() + 34, merge.ypos() + 5)
-            merge_nodes.append(merge)
+    # Create Merge nodes to combine the light groups
+    branches = remove_nodes or shuffle_nodes
+    merge_nodes, second_dot_nodes = (merge_balanced if balanced else merge_chain)(graph, branches, shuffle_nodes)
+    output = merge_nodes[-1] if merge_nodes else branches[0]
 
-    # Create backdrop
+    # Move the whole setup down if existing nodes are in the way, then wrap it in a backdrop
     all_nodes = dot_nodes + shuffle_nodes + remove_nodes + merge_nodes + second_dot_nodes
-    bdX = min(node.xpos() for node in all_nodes) - BACKDROP_PADDING
-    bdY = min(node.ypos() for node in all_nodes) - BACKDROP_PADDING
-    bdW = max(node.xpos() + node.screenWidth() for node in all_nodes) - bdX + BACKDROP_PADDING * 2
-    bdH = max(node.ypos() + node.screenHeight() for node in all_nodes) - bdY + BACKDROP_PADDING * 2
-
-    backdrop = nuke.nodes.BackdropNode(
-        xpos = bdX,
-        bdwidth = bdW,
-        ypos = bdY,
-        bdheight = bdH,
-        tile_color = BACKDROP_COLOR,
-        note_font_size = BACKDROP_LABEL_FONT_SIZE,
-        label = "Light Channel Splitter"
+    geometry = nodelayout.Geometry(all_nodes)
+    bdX, bdY, bdW, bdH = nodelayout.backdrop_rect(geometry.bounds(), BACKDROP_PADDING)
+    free_x, free_y = nodelayout.find_free_origin(bdX, bdY, bdW, bdH, nodelayout.script_grid(exclude=[node]))
+    geometry.move(free_x - bdX, free_y - bdY)
+
+    backdrop = nodelayout.backdrop(
+        geometry,
+        label="Light Channel Splitter",
+        color=BACKDROP_COLOR,
+        padding=BACKDROP_PADDING,
+        font_size=BACKDROP_LABEL_FONT_SIZE,
+        nodes_api=graph
     )
+
+    with bulkedit.bulk_edit("Light Channel Splitter"):
+        graph.apply()
+    return output.node
@@ -7,133 +7,182 @@
 import os
 import re
 import nuke
+import renderindex
+import rendermanifest
+import renderintegrity
+import framesets
+import versions
+import rendercatalog
+import renderwatcher
+import storageroots
+import asyncload
+import nodelayout
+import loadplan
+
+# User variables
+VERSION_POLICY = versions.LATEST_COMPLETE  # versions.LATEST loads the newest version even while it is still rendering
+VALIDATE_FRAMES = True  # Check every loaded frame for zero-byte, truncated and odd-sized files
+MAIN_BACKDROP_PADDING = (200, 300, 200, 200)  # left, top, right, bottom
+LAYER_BACKDROP_PADDING = (110, 110, 60, 60)
 
 def print_debug(message):
     print(f"DEBUG: {message}")
 
+def main_backdrop_name(seq_num, shot_num):
+    return loadplan.node_name("Lighting", f"SQ{seq_num}", f"SH{shot_num}")
+
 def create_main_backdrop(nodes, seq_num, shot_num):
     if not nodes or not nuke.GUI:
         return None
-    bdX = min([node.xpos() for node in nodes])
-    bdY = min([node.ypos() for node in nodes])
-    bdW = max([node.xpos() + node.screenWidth() for node in nodes]) - bdX
-    bdH = max([node.ypos() + node.screenHeight() for node in nodes]) - bdY
-
-    backdrop = nuke.nodes.BackdropNode(
-        xpos = bdX - 150,
-        bdwidth = bdW + 300,
-        ypos = bdY - 300,
-        bdheight = bdH + 500,
-        tile_color = int("0x7171C680", 16),
-        note_font_size=42,
-        label=f'<center>SQ{seq_num} SH{shot_num}\nLighting Renders'
+    backdrop = nuke.toNode(main_backdrop_name(seq_num, shot_num))
+    if backdrop is not None:
+        # Re-run, the backdrop from the first run is fitted around the grown row
+        nodelayout.fit_backdrop(backdrop, nodes, MAIN_BACKDROP_PADDING)
+        return backdrop
+    return nodelayout.backdrop(
+        nodes,
+        label=f'<center>SQ{seq_num} SH{shot_num}\nLighting Renders',
+        color=int("0x7171C680", 16),
+        padding=MAIN_BACKDROP_PADDING,
+        font_size=42,
+        name=main_backdrop_name(seq_num, shot_num)
     )
-    return backdrop
 
-def create_layer_backdrop(read_node, layer_name):
+def create_layer_backdrop(read_node, layer_name, rect=None):
     if not nuke.GUI:
         return None
-    padding = 60
     backdrop_label = re.sub(r'^SQ\d+_SH\d+_', '', layer_name)
-    backdrop = nuke.nodes.BackdropNode(
-        xpos = read_node.xpos() - padding - 50,
-        ypos = read_node.ypos() - padding - 50,
-        bdwidth = read_node.screenWidth() + padding * 2 + 50,
-        bdheight = read_node.screenHeight() + padding * 2 + 50,
-        tile_color = int("0xAAAACC80", 16),
-        note_font_size=24,
-        label=backdrop_label
+    geometry = nodelayout.Geometry()
+    geometry.add(read_node, rect)
+    return nodelayout.backdrop(
+        geometry,
+        label=backdrop_label,
+        color=int("0xAAAACC80", 16),
+        padding=LAYER_BACKDROP_PADDING,
+        font_size=24
     )
-    return backdrop
 
-def arrange_nodes(nodes):
+def arrange_nodes(nodes, origin=(0, 0)):
     if not nuke.GUI:
         return
     spacing = 350
-    start_x = 0
-    start_y = 0
-    for i, node in enumerate(nodes):
-        node.setXYpos(start_x + i * spacing, start_y)
+    for node, (x, y) in zip(nodes, nodelayout.grid_positions(len(nodes), len(nodes), spacing, 0, origin)):
+        node.setXYpos(x, y)
 
-def find_latest_version(path):
-    versions = [d for d in os.listdir(path) if d.startswith('v') and os.path.isdir(os.path.join(path, d))]
-    return max(versions) if versions else None
+def get_cut_range():
+    root = nuke.root()
+    return int(root['first_frame'].value()), int(root['last_frame'].value())
 
-def find_all_render_layers(shot_path):
+def find_all_render_layers(shot_path, cut_range=None):
+    # cut_range is passed in when called off the main thread, nuke.root() is not safe there
     print_debug(f"Finding all render layers in: {shot_path}")
-    render_layers = {}
-    
-    version_folders = [d for d in os.listdir(shot_path) if d.startswith('v') and os.path.isdir(os.path.join(shot_path, d))]
-    version_folders.sort(reverse=True)
-    
-    for version in version_folders:
-        version_path = os.path.join(shot_path, version)
-        for layer in os.listdir(version_path):
-            layer_path = os.path.join(version_path, layer)
-            if os.path.isdir(layer_path):
-                render_files = [f for f in os.listdir(layer_path) if f.endswith('.exr')]
-                if render_files and layer not in render_layers:
-                    render_layers[layer] = {"version": version, "file": render_files[0], "path": layer_path}
-    
-    if not render_layers:
-        for root, dirs, files in os.walk(shot_path):
-            for dir in dirs:
-                if dir.startswith("exr."):
-                    layer_name = dir.split(".")[-1]
-                    layer_path = os.path.join(root, dir)
-                    version = find_latest_version(layer_path)
-                    if version:
-                        version_path = os.path.join(layer_path, version)
-                        render_files = [f for f in os.listdir(version_path) if f.endswith('.exr')]
-                        if render_files:
-                            render_layers[layer_name] = {"version": version, "file": render_files[0], "path": version_path}
-    
-    print_debug(f"Found render layers: {render_layers}")
+    if cut_range is None:
+        cut_range = get_cut_range()
+    # The published manifest answers with one file read, the tree is only scanned without one
+    render_layers = rendermanifest.read_render_layers(shot_path, VERSION_POLICY, cut_range)
+    if render_layers is None:
+        render_layers = renderindex.index_render_tree(shot_path, VERSION_POLICY, cut_range)
+    print_debug(f"Found render layers: {sorted(render_layers)}")
     return render_layers
 
-def load_latest_renders(shot_path, seq_num, shot_num):
+def layer_read_values(layer_name, render_info):
+    """Knob values of a layer Read, shared by the loader and the render watcher."""
+    version = render_info["version"]
+    # Frame numbers come from the same scan that found the layer
+    frame_set = render_info["frames"]
+    return {
+        "file": os.path.join(render_info["path"], render_info["pattern"]).replace("\\", "/"),
+        "first": frame_set.first,
+        "last": frame_set.last,
+        "origfirst": frame_set.first,
+        "origlast": frame_set.last,
+        "label": f"{layer_name}\n(v{version.split('v')[1]})",
+    }
+
+def watch_layer_reads(shot_path, read_names):
+    """Keep the loaded layer Reads ({layer: node name}) on the newest version and frame range."""
+    if not renderwatcher.is_enabled():
+        return
+    cut_range = get_cut_range()
+
+    def resolve():
+        render_layers = find_all_render_layers(shot_path, cut_range)
+        updates = {}
+        folders = {shot_path}
+        folders.update(os.path.join(shot_path, name) for name in rendercatalog.listdir(shot_path)
+                       if versions.is_version_folder(name))
+        for layer_name, node_name in read_names.items():
+            render_info = render_layers.get(layer_name)
+            if not render_info:
+                continue
+            updates[node_name] = layer_read_values(layer_name, render_info)
+            for version_info in render_info["versions"].values():
+                folders.add(version_info["path"])
+                folders.add(os.path.dirname(version_info["path"]))
+        return updates, folders
+
+    renderwatcher.watch(shot_path, resolve)
+
+def plan_layer_reads(render_layers):
+    """The Reads the layers should have, as loadplan.PlannedReads in layer order."""
+    return [loadplan.PlannedRead(loadplan.node_name("Read", layer_name), layer_read_values(layer_name, render_info),
+                                 info={"layer": layer_name})
+            for layer_name, render_info in render_layers.items()]
+
+def create_layer_read(planned):
+    read_node = nuke.createNode("Read")
+    for knob_name, value in planned.create_knobs().items():
+        read_node[knob_name].setValue(value)
+    read_node["name"].setValue(planned.name)
+    loadplan.mark(read_node)
+    print_debug(f"Created Read node for {planned.info['layer']}")
+    return read_node
+
+def layout_layer_reads(created_nodes, seq_num, shot_num, existing_nodes=()):
+    """Place new layer Reads; on a re-run they continue the row of the Reads already loaded."""
+    if not created_nodes or not nuke.GUI:
+        return
+    if existing_nodes:
+        existing = list(nodelayout.Geometry(existing_nodes).rects())
+        arrange_nodes(created_nodes, (max(rect[0] for rect in existing) + 350, min(rect[1] for rect in existing)))
+    else:
+        # The row of Reads starts at the DAG origin, moved down past nodes already there
+        left, top, right, bottom = MAIN_BACKDROP_PADDING
+        width = (len(created_nodes) - 1) * 350 + 80
+        height = 80
+        grid = nodelayout.script_grid(exclude=created_nodes)
+        x, y = nodelayout.find_free_origin(-left, -top, width + left + right, height + top + bottom, grid)
+        arrange_nodes(created_nodes, (x + left, y + top))
+
+    geometry = nodelayout.Geometry(created_nodes)
+    for index, node in enumerate(created_nodes):
+        layer_name = node['label'].value().split('\n')[0]
+        create_layer_backdrop(node, layer_name, geometry.rect(index))
+    for node in existing_nodes:
+        geometry.add(node)
+    create_main_backdrop(geometry, seq_num, shot_num)
+
+def load_latest_renders(shot_path, seq_num, shot_num, render_layers=None):
     print_debug(f"Loading latest renders from: {shot_path}")
-    render_layers = find_all_render_layers(shot_path)
-    frame_ranges = {}
-    created_nodes = []
-
-    for layer_name, render_info in render_layers.items():
-        version = render_info["version"]
-        latest_render = render_info["file"]
-        render_path = os.path.join(render_info["path"], latest_render).replace("\\", "/")
-        
-        read_node = nuke.createNode("Read")
-        read_node["file"].setValue(render_path.replace(latest_render.split(".")[-2], "######"))
-        
-        frame_files = [f for f in os.listdir(os.path.dirname(render_path)) if f.endswith('.exr')]
-        frame_numbers = [int(re.search(r'(\d+)\.exr$', f).group(1)) for f in frame_files]
-        first_frame, last_frame = min(frame_numbers), max(frame_numbers)
-        
-        read_node["first"].setValue(first_frame)
-        read_node["last"].setValue(last_frame)
-        read_node["origfirst"].setValue(first_frame)
-        read_node["origlast"].setValue(last_frame)
-        read_node["name"].setValue(f"Read_{layer_name}_{version}")
-        read_node["label"].setValue(f"{layer_name}\n(v{version.split('v')[1]})")
-        
-        frame_ranges[layer_name] = (first_frame, last_frame)
-        created_nodes.append(read_node)
-        print_debug(f"Created Read node for {layer_name}")
+    if render_layers is None:
+        render_layers = find_all_render_layers(shot_path)
+    frame_ranges = {layer_name: render_info["frames"] for layer_name, render_info in render_layers.items()}
 
-    if created_nodes and nuke.GUI:
-        arrange_nodes(created_nodes)
-        create_main_backdrop(created_nodes, seq_num, shot_num)
-        
-        layer_backdrops = []
-        for node in created_nodes:
-            layer_name = node['label'].value().split('\n')[0]
-            backdrop = create_layer_backdrop(node, layer_name)
-            layer_backdrops.append(backdrop)
-        
-        for node, backdrop in zip(created_nodes, layer_backdrops):
-            node.setXYpos(backdrop.xpos() + 50, backdrop.ypos() + 50)
+    # Layers already loaded are updated in place, only new layers get a Read
+    load_diff = loadplan.diff(plan_layer_reads(render_layers), loadplan.ReadIndex())
+    loadplan.apply_changes(load_diff)
+    nodes_by_layer = {planned.info["layer"]: node for planned, node in load_diff.existing}
+    existing_nodes = list(nodes_by_layer.values())
+    new_nodes = []
+    for planned in load_diff.new:
+        nodes_by_layer[planned.info["layer"]] = create_layer_read(planned)
+        new_nodes.append(nodes_by_layer[planned.info["layer"]])
+    created_nodes = [nodes_by_layer[layer_name] for layer_name in render_layers]
+
+    layout_layer_reads(new_nodes, seq_num, shot_num, existing_nodes)
+    watch_layer_reads(shot_path, {layer_name: node.name() for layer_name, node in nodes_by_layer.items()})
 
-    print_debug(f"Total created nodes: {len(created_nodes)}")
+    print_debug(f"Render layers: {load_diff.summary()}")
     return created_nodes, frame_ranges
 
 def check_frame_range_mismatch(frame_ranges):
@@ -141,17 +190,66 @@ def check_frame_range_mismatch(frame_ranges):
     if not frame_ranges:
         return "No frame ranges to compare."
 
-    reference_range = next(iter(frame_ranges.values()))
+    frame_sets = {layer: frames if isinstance(frames, framesets.FrameSet) else framesets.FrameSet([frames])
+                  for layer, frames in frame_ranges.items()}
+    reference_range = next(iter(frame_sets.values())).frame_range()
     mismatches = []
+    gaps = []
 
-    for layer, range in frame_ranges.items():
-        if range != reference_range:
-            mismatches.append(f"{layer}: {range[0]}-{range[1]}")
+    for layer, frame_set in frame_sets.items():
+        if frame_set.frame_range() != reference_range:
+            mismatches.append(f"{layer}: {frame_set.first}-{frame_set.last}")
+        if frame_set.has_gaps():
+            gaps.append(f"{layer}: missing {framesets.format_ranges(frame_set.missing_ranges())}")
+        if frame_set.duplicates:
+            gaps.append(f"{layer}: frames with duplicate padding {framesets.format_ranges(framesets.ranges_from_frames(frame_set.duplicates))}")
 
     if mismatches:
-        return "Frame range mismatches detected:\n" + "\n".join(mismatches)
+        message = "Frame range mismatches detected:\n" + "\n".join(mismatches)
     else:
-        return f"All layers have the same frame range: {reference_range[0]}-{reference_range[1]}"
+        message = f"All layers have the same frame range: {reference_range[0]}-{reference_range[1]}"
+    if gaps:
+        message += "\n\nFrame problems detected:\n" + "\n".join(gaps)
+    return message
+
+def show_load_report(seq_num, shot_num, created_nodes, frame_ranges, summary=""):
+    if created_nodes:
+        loaded_layers = [f"{node['label'].value().split('(')[0].strip()} ({node['label'].value().split('(')[1]}" 
+                         for node in created_nodes]
+        layers_message = "Loaded layers:\n" + "\n".join(loaded_layers)
+        
+        mismatch_message = check_frame_range_mismatch(frame_ranges)
+        
+        full_message = f"Loaded render layers for SQ{seq_num} SH{shot_num}\n\n{layers_message}\n\n{mismatch_message}"
+    else:
+        full_message = "No render layers found."
+    if summary:
+        full_message += f"\n\n{summary}"
+    
+    print_debug(full_message)
+    if nuke.GUI:
+        nuke.message(full_message)
+
+def validate_loaded_frames(seq_num, shot_num, render_layers):
+    """Check the frames of the loaded layers in the background, one job per layer, and report any problems."""
+    reports = []
+
+    def discover(layer):
+        layer_name, render_info = layer
+        return renderintegrity.validate_render_layers({layer_name: render_info})[0]
+
+    def collect(batch):
+        reports.extend(report for _, report in batch)
+
+    def finish(load_result):
+        message = "\n\n".join(filter(None, [f"SQ{seq_num} SH{shot_num} " + renderintegrity.format_report(reports),
+                                             load_result.summary()]))
+        print_debug(message)
+        if nuke.GUI and not all(report.ok for report in reports):
+            nuke.message(message)
+
+    # A layer with thousands of frames on a busy share can take minutes, so these jobs are never skipped
+    asyncload.run_async("Validate Lightning Render", list(render_layers.items()), discover, collect, finish, 1, timeout=None)
 
 def find_latest_renders():
     print_debug("Starting find_latest_renders function")
@@ -159,26 +257,27 @@ def find_latest_renders():
     match = re.search(r'SQ(\d+).*?SH(\d+)', script_path)
     if match:
         seq_num, shot_num = match.groups()
-        shot_path = f"Y:/20105_Pysna_film/out/FILM/SQ{seq_num}/SH{shot_num}/lighting/render/"
+        shot_path = storageroots.shot_path("out", seq_num, shot_num, "lighting", "render")
         print_debug(f"Shot path: {shot_path}")
         if os.path.exists(shot_path):
-            created_nodes, frame_ranges = load_latest_renders(shot_path, seq_num, shot_num)
-            if created_nodes:
-                loaded_layers = [f"{node['label'].value().split('(')[0].strip()} ({node['label'].value().split('(')[1]}" 
-                                 for node in created_nodes]
-                layers_message = "Loaded layers:\n" + "\n".join(loaded_layers)
-                
-                mismatch_message = check_frame_range_mismatch(frame_ranges)
-                
-                full_message = f"Loaded render layers for SQ{seq_num} SH{shot_num}\n\n{layers_message}\n\n{mismatch_message}"
-                
-                print_debug(full_message)
-                if nuke.GUI:
-                    nuke.message(full_message)
-            else:
-                print_debug("No render layers found.")
-                if nuke.GUI:
-                    nuke.message("No render layers found.")
+            cut_range = get_cut_range()
+            loaded = {}
+
+            def discover(path):
+                return find_all_render_layers(path, cut_range)
+
+            def build(batch):
+                for _, render_layers in batch:
+                    loaded["nodes"], loaded["frame_ranges"] = load_latest_renders(shot_path, seq_num, shot_num, render_layers)
+                    loaded["render_layers"] = render_layers
+
+            def finish(load_result):
+                show_load_report(seq_num, shot_num, loaded.get("nodes"), loaded.get("frame_ranges"), load_result.summary())
+                if VALIDATE_FRAMES and loaded.get("render_layers"):
+                    validate_loaded_frames(seq_num, shot_num, loaded["render_layers"])
+
+            # The render tree is indexed off the UI thread, the Reads are created on the main thread
+            asyncload.run_async("Load Lightning Render", [shot_path], discover, build, finish, 1)
         else:
             print_debug(f"Shot path does not exist: {shot_path}")
             if nuke.GUI:
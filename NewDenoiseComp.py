@@ -1,36 +1,41 @@
 import nuke
 import os
 import re
-from collections import Counter
+import rendercatalog
+import versions
+import storageroots
+import nodeindex
+from zdefocuschecker import find_wrong_zdefocus_nodes
 from PySide2 import QtWidgets
 
 def get_latest_comp_file():
     current_script = nuke.root().name()
     print(f"Current script path: {current_script}")
 
-    match = re.search(r'(Z:/20105_Pysna_film/work/FILM/SQ\d+/SH\d+)/compositing_denoise/work/(.+)_denoise_v(\d+)\.nk', current_script)
+    work_film = storageroots.film_path("work")
+    match = re.search(re.escape(work_film) + r'(/SQ\d+/SH\d+)/compositing_denoise/work/(.+)_denoise_v(\d+)\.nk', storageroots.to_local(current_script))
 
     if not match:
         print("Error: Unable to parse the current script path.")
         return None
 
-    base_path, file_prefix, _ = match.groups()
+    shot_folder, file_prefix, _ = match.groups()
+    base_path = work_film + shot_folder
     comp_path = os.path.join(base_path, 'compositing', 'work')
     print(f"Searching for compositing files in: {comp_path}")
 
-    if not os.path.exists(comp_path):
+    try:
+        all_files = [f for f in rendercatalog.listdir(comp_path) if f.endswith('.nk')]
+    except OSError:
         print(f"Error: Directory does not exist: {comp_path}")
         return None
-
-    all_files = [f for f in os.listdir(comp_path) if f.endswith('.nk')]
     comp_files = [f for f in all_files if re.search(r'SQ\d+_SH\d+_comp_v\d+\.nk', f)]
 
     if not comp_files:
         print("No compositing files found.")
         return None
 
-    comp_files.sort(key=lambda x: int(re.search(r'v(\d+)', x).group(1)), reverse=True)
-    latest_file = comp_files[0]
+    latest_file = versions.latest_file(comp_files)
     print(f"Latest compositing file: {latest_file}")
 
     return os.path.join(comp_path, latest_file)
@@ -53,68 +58,6 @@ def import_latest_comp_file():
         nuke.message("No compositing file to import.")
     return False
 
-def round_value(value):
-    if isinstance(value, (int, float)):
-        return round(value, 2)
-    return value
-
-def is_node_in_backdrop(node, backdrop):
-    node_x, node_y = node.xpos(), node.ypos()
-    bd_x, bd_y = backdrop.xpos(), backdrop.ypos()
-    bd_r, bd_t = bd_x + backdrop['bdwidth'].value(), bd_y + backdrop['bdheight'].value()
-    return bd_x <= node_x <= bd_r and bd_y <= node_y <= bd_t
-
-def find_wrong_zdefocus_nodes():
-    defocus_nodes = [n for n in nuke.allNodes() if 'PxF_ZDefocus' in n.name() and 'Controller' not in n.name()]
-    
-    if not defocus_nodes:
-        nuke.message("No PxF_ZDefocusHERO nodes found in the script.")
-        return
-    
-    print(f"Analyzing {len(defocus_nodes)} PxF_ZDefocusHERO nodes for wrong values:")
-    
-    purple_backdrops = [n for n in nuke.allNodes('BackdropNode') if n['tile_color'].value() == 2390460672]
-    knobs_to_compare = ['fStop', 'focalDistance', 'focalLength', 'filmBack']
-    
-    wrong_nodes = {}
-    correct_values = {}
-    
-    for knob in knobs_to_compare:
-        knob_values = {}
-        for node in defocus_nodes:
-            if knob in node.knobs():
-                value = round_value(node[knob].value())
-                node_in_purple = any(is_node_in_backdrop(node, bd) for bd in purple_backdrops)
-                if value not in knob_values:
-                    knob_values[value] = []
-                knob_values[value].append((node.name(), node_in_purple))
-        
-        if len(knob_values) > 1:
-            most_common_value = Counter(round_value(node[knob].value()) for node in defocus_nodes if knob in node.knobs()).most_common(1)[0][0]
-            correct_values[knob] = most_common_value
-            
-            for value, nodes in knob_values.items():
-                if value != most_common_value:
-                    if knob not in wrong_nodes:
-                        wrong_nodes[knob] = []
-                    wrong_nodes[knob].extend([(node, in_purple, value) for node, in_purple in nodes])
-    
-    if wrong_nodes:
-        print("\nWrong nodes detected:")
-        message = ["The following nodes have incorrect values:"]
-        for knob, nodes in wrong_nodes.items():
-            print(f"\n{knob} (Correct value: {correct_values[knob]}):")
-            knob_message = [f"\n{knob} (Correct value: {correct_values[knob]}):"]
-            for node, in_purple, value in nodes:
-                print(f"  - {node}: {value}{' (in purple backdrop)' if in_purple else ''}")
-                knob_message.append(f"  - {node}: {value}{' (in purple backdrop)' if in_purple else ''}")
-            message.extend(knob_message)
-        
-        nuke.message("\n".join(message))
-    else:
-        print("\nNo wrong nodes found. All PxF_ZDefocusHERO nodes have consistent values.")
-        nuke.message("No wrong nodes found. All PxF_ZDefocusHERO nodes have consistent values.")
-
 def setup_2k_dcp_project():
     root = nuke.root()
     format_knob = root['format']
@@ -155,7 +98,7 @@ def set_viewer_process_rec709_aces():
     viewers_updated = 0
     errors = []
 
-    viewer_nodes = nuke.allNodes('Viewer')
+    viewer_nodes = nodeindex.get().of_class('Viewer', root_only=True)
 
     if not viewer_nodes:
         print("No Viewer nodes found. Creating a new Viewer node.")
@@ -221,7 +164,7 @@ def create_white_alpha_node(input_node):
 def find_or_create_nodes():
     write_node = nuke.toNode('PFX_Write_MAIN')
     if not write_node:
-        write_nodes = [n for n in nuke.allNodes() if n.Class() == "Write"]
+        write_nodes = nodeindex.get().of_class("Write", root_only=True)
         if write_nodes:
             write_node = write_nodes[0]
         else:
@@ -4,32 +4,21 @@
 # places a red backdrop under each one, and reports the total number found.
 
 import nuke
+import nodelayout
+import nodeindex
 
 def find_reduce_noise_nodes():
-    reduce_noise_nodes = []
-    for node in nuke.allNodes():
-        if node.Class() == "OFXcom.absoft.neatvideo5_v5":
-            reduce_noise_nodes.append(node)
-    return reduce_noise_nodes
+    return nodeindex.get().of_class("OFXcom.absoft.neatvideo5_v5", root_only=True)
 
 def create_backdrop(node, color):
-    backdrop = nuke.nodes.BackdropNode()
-    backdrop['label'].setValue(node.name())
-    backdrop['note_font_size'].setValue(42)
-    backdrop['tile_color'].setValue(color)
-    
-    # Set backdrop size and position
-    bdX = node.xpos() - 50
-    bdY = node.ypos() - 50
-    bdW = node.screenWidth() + 100
-    bdH = node.screenHeight() + 100
-    
-    backdrop.setXYpos(bdX, bdY)
-    backdrop['bdwidth'].setValue(bdW)
-    backdrop['bdheight'].setValue(bdH)
-    backdrop['z_order'].setValue(1)
-    
-    return backdrop
+    return nodelayout.backdrop(
+        [node],
+        label=node.name(),
+        color=color,
+        padding=50,
+        font_size=42,
+        z_order=1
+    )
 
 def highlight_reduce_noise_nodes_with_backdrops():
     reduce_noise_nodes = find_reduce_noise_nodes()
@@ -10,64 +10,34 @@ import os
 import re
 import random
 import colorsys
+import storageroots
 
 def debug_print(message):
     print(f"DEBUG: {message}")
 
-def get_path_tokens(path=None):
-    if path is None:
-        path = nuke.root().name()
-    
-    debug_print(f"Analyzing path: {path}")
-    
-    pattern = r'(?P<DISK>[A-Z]:)/(?P<PROJECT>\w+_\w+)/work/FILM/(?P<SEQUENCE>SQ\d+)/(?P<SHOT>SH\d+)/(?P<TASK>\w+)/work/(?P<FILENAME>FILM_(?P=SEQUENCE)_(?P=SHOT)_(?P=TASK)_v\d+\.nk)'
+def find_latest_render(sequence, shot, task_type):
+    debug_print(f"Finding latest render for SQ{sequence} SH{shot}")
     
-    match = re.match(pattern, path)
+    # The render mount is resolved once per session by storageroots
+    base_path = storageroots.shot_path("out", sequence, shot, 'compositing', "render")
+    debug_print(f"Searching in base path: {base_path}")
     
-    if match:
-        tokens = match.groupdict()
-        debug_print("Extracted tokens:")
-        for key, value in tokens.items():
-            debug_print(f"  {key}: {value}")
-        return tokens
-    else:
-        debug_print("Could not extract tokens from path")
+    if not os.path.exists(base_path):
+        debug_print(f"Base path does not exist: {base_path}")
         return None
-
-def find_latest_render(project_path, sequence, shot, task_type):
-    debug_print(f"Finding latest render for SQ{sequence} SH{shot}")
     
-    # List of possible disk letters to try
-    disk_letters = ['Y:', 'Z:', 'X:']
-    
-    for disk in disk_letters:
-        base_path = os.path.join(disk, project_path, "out", "FILM", f"SQ{sequence}", f"SH{shot}", 'compositing', "render")
-        debug_print(f"Searching in base path: {base_path}")
-        
-        if not os.path.exists(base_path):
-            debug_print(f"Base path does not exist: {base_path}")
-            continue
-        
-        latest_version = None
-        latest_path = None
-        
-        for version_dir in sorted(os.listdir(base_path), reverse=True):
-            if version_dir.startswith('v'):
-                version_path = os.path.join(base_path, version_dir)
-                debug_print(f"Checking version directory: {version_path}")
-                try:
-                    version_number = int(version_dir[1:])
-                    for file in os.listdir(version_path):
-                        if file.endswith('.exr') and 'comp' in file:
-                            latest_version = version_number
-                            latest_path = version_path
-                            debug_print(f"Found latest version: {latest_path}")
-                            return latest_path
-                except ValueError:
-                    debug_print(f"Invalid version folder name: {version_dir}")
-        
-        if latest_path:
-            return latest_path
+    for version_dir in sorted(os.listdir(base_path), reverse=True):
+        if version_dir.startswith('v'):
+            version_path = os.path.join(base_path, version_dir)
+            debug_print(f"Checking version directory: {version_path}")
+            try:
+                int(version_dir[1:])
+                for file in os.listdir(version_path):
+                    if file.endswith('.exr') and 'comp' in file:
+                        debug_print(f"Found latest version: {version_path}")
+                        return version_path
+            except ValueError:
+                debug_print(f"Invalid version folder name: {version_dir}")
     
     debug_print(f"No render found for SQ{sequence} SH{shot}")
     return None
@@ -229,19 +199,6 @@ def load_sequence_and_create_contact_sheet():
     
     current_sequence = get_current_sequence()
     
-    # Get project token
-    tokens = get_path_tokens()
-    debug_print(f"Tokens returned by get_path_tokens(): {tokens}")
-    
-    if not tokens or 'PROJECT' not in tokens:
-        error_message = "Could not determine project folder. Please check your file path."
-        debug_print(error_message)
-        nuke.message(error_message)
-        return
-    
-    project_path = tokens['PROJECT']
-    debug_print(f"Project path determined: {project_path}")
-    
     while True:
         sequence = get_sequence_from_user(current_sequence)
         if not sequence:
@@ -256,7 +213,7 @@ def load_sequence_and_create_contact_sheet():
         color = generate_color(index, len(sequences))
         
         for shot in get_shot_numbers(sequence):
-            render_path = find_latest_render(project_path, sequence, shot.split('_')[1], task_type)
+            render_path = find_latest_render(sequence, shot.split('_')[1], task_type)
             debug_print(f"Render path for SQ{sequence} SH{shot.split('_')[1]}: {render_path}")
             
             if render_path:
@@ -0,0 +1,312 @@
+# aovstats.py
+#
+# Sampled pixel statistics of EXR channels: peaks to find AOVs that are black for a whole shot,
+# coverage and bounding boxes of mask channels to crop checker branches to the masked area.
+# Scanline EXRs stored uncompressed, RLE, ZIPS or ZIP are decoded in pure Python + NumPy straight
+# from the file, chunk by chunk. Every chunk is read: a light that only shows up in a few lines
+# must not read as black, since its peak decides whether it is pruned. Other compressions go
+# through the OpenEXR module when it is installed and are reported as unknown otherwise. Peaks are cached per path, mtime and size.
+
+import os
+import re
+import struct
+import threading
+import zlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import OpenEXR
+    import Imath
+except ImportError:
+    OpenEXR = None
+
+import exrheader
+import renderintegrity
+import sharepool
+
+# User variables
+SAMPLE_FRAMES = 3  # Frames sampled per shot: first, last and evenly spaced in between
+MASK_THRESHOLD = 0.01  # Mask values above this count as covered
+
+DECODED_COMPRESSIONS = ('none', 'rle', 'zips', 'zip')
+PIXEL_DTYPES = {'half': '<f2', 'float': '<f4', 'uint': '<u4'}
+PIXEL_SIZES = {'half': 2, 'float': 4, 'uint': 4}
+FRAME_TOKEN_RE = re.compile(r'%0?(\d*)d|#+')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class AovStatsError(Exception):
+    pass
+
+
+def is_available():
+    return numpy is not None
+
+
+def _reconstruct(data):
+    """Undo the predictor and the byte interleaving ZIP and RLE apply before compressing."""
+    values = numpy.frombuffer(data, dtype=numpy.uint8).astype(numpy.int64)
+    values[1:] -= 128
+    values = (numpy.cumsum(values) & 0xff).astype(numpy.uint8)
+    half = (len(values) + 1) // 2
+    out = numpy.empty_like(values)
+    out[0::2] = values[:half]
+    out[1::2] = values[half:]
+    return out.tobytes()
+
+
+def _rle_decompress(data, expected):
+    out = bytearray()
+    pos = 0
+    while pos < len(data) and len(out) < expected:
+        count = struct.unpack_from('b', data, pos)[0]
+        pos += 1
+        if count < 0:
+            out += data[pos:pos - count]
+            pos -= count
+        else:
+            out += data[pos:pos + 1] * (count + 1)
+            pos += 1
+    return bytes(out)
+
+
+def _decompress(compression, data, expected):
+    if len(data) == expected or compression == 'none':
+        # Chunks that would not get smaller are stored raw
+        return data
+    if compression in ('zip', 'zips'):
+        return _reconstruct(zlib.decompress(data))
+    if compression == 'rle':
+        return _reconstruct(_rle_decompress(data, expected))
+    raise AovStatsError(f"Unsupported compression {compression}")
+
+
+def _line_dtype(channels, width):
+    """One scanline of a chunk: every channel in file order, width pixels each."""
+    return numpy.dtype([(channel.name, PIXEL_DTYPES[channel.pixel_type], (width,)) for channel in channels])
+
+
+def _decoded_blocks(path, header):
+    """Yield (first line, structured array of lines) for every chunk, decoded from the file."""
+    part = header.parts[0]
+    x_min, y_min, x_max, y_max = part.data_window
+    line_dtype = _line_dtype(part.channels, x_max - x_min + 1)
+    lines_per_chunk = renderintegrity.LINES_PER_CHUNK[part.compression]
+    count = renderintegrity.chunk_count(part)
+    with open(path, 'rb') as f:
+        f.seek(header.header_size)
+        offsets = struct.unpack(f'<{count}Q', f.read(count * 8))
+        for offset in offsets:
+            f.seek(offset)
+            y, data_size = struct.unpack('<ii', f.read(8))
+            lines = min(lines_per_chunk, y_max - y + 1)
+            expected = lines * line_dtype.itemsize
+            data = _decompress(part.compression, f.read(data_size), expected)
+            if len(data) != expected:
+                raise AovStatsError(f"Chunk at line {y} decodes to {len(data)} bytes, expected {expected}")
+            yield y, numpy.frombuffer(data, dtype=line_dtype, count=lines)
+
+
+def _openexr_blocks(path, header, names):
+    """The whole frame as one block, read through the OpenEXR module."""
+    x_min, y_min, x_max, y_max = header.data_window
+    width, height = x_max - x_min + 1, y_max - y_min + 1
+    names = [name for name in names if name in header.channels]
+    exr = OpenEXR.InputFile(path)
+    try:
+        float_type = Imath.PixelType(Imath.PixelType.FLOAT)
+        block = numpy.empty(height, dtype=[(name, '<f4', (width,)) for name in names])
+        for name in names:
+            block[name] = numpy.frombuffer(exr.channel(name, float_type), dtype=numpy.float32).reshape(height, width)
+    finally:
+        exr.close()
+    yield y_min, block
+
+
+def _blocks(path, names):
+    """The header and an iterator of (first line, block) pairs, block[channel] is a lines x width array."""
+    header = exrheader.read_header(path)
+    part = header.parts[0]
+    decodable = (not header.is_multipart and not header.is_tiled and part.compression in DECODED_COMPRESSIONS
+                 and part.data_window and renderintegrity.chunk_count(part))
+    if decodable:
+        return header, _decoded_blocks(path, header)
+    if OpenEXR is not None:
+        return header, _openexr_blocks(path, header, names)
+    raise AovStatsError(f"Cannot decode {part.compression} without the OpenEXR module")
+
+
+def _read_peaks(path, names):
+    header, blocks = _blocks(path, names)
+    names = [name for name in header.channels if name in names]
+    peaks = {}
+    for _, block in blocks:
+        for name in names:
+            pixels = block[name]
+            if pixels.size:
+                peak = float(numpy.nanmax(numpy.abs(pixels.astype(numpy.float32))))
+                peaks[name] = max(peaks.get(name, 0.0), peak)
+    return peaks
+
+
+def _read_masks(path, names, threshold):
+    """(coverage, bbox) per channel."""
+    header, blocks = _blocks(path, names)
+    x_min, _, x_max, _ = header.data_window
+    display = header.display_window or header.data_window
+    names = [name for name in header.channels if name in names]
+    covered = dict.fromkeys(names, 0)
+    boxes = dict.fromkeys(names)
+    total = 0
+    for y, block in blocks:
+        total += len(block) * (x_max - x_min + 1)
+        for name in names:
+            inside = block[name] > threshold
+            rows = numpy.flatnonzero(inside.any(axis=1))
+            if not rows.size:
+                continue
+            columns = numpy.flatnonzero(inside.any(axis=0))
+            covered[name] += int(numpy.count_nonzero(inside))
+            box = (x_min + int(columns[0]), y + int(rows[0]), x_min + int(columns[-1]), y + int(rows[-1]))
+            old = boxes[name]
+            boxes[name] = box if old is None else (min(old[0], box[0]), min(old[1], box[1]),
+                                                  max(old[2], box[2]), max(old[3], box[3]))
+    stats = {}
+    for name in names:
+        box = boxes[name]
+        if box is not None:
+            # EXR lines count down from the top of the display window, Nuke counts up from the bottom
+            box = (box[0] - display[0], display[3] - box[3], box[2] - display[0] + 1, display[3] - box[1] + 1)
+        stats[name] = (covered[name] / float(total) if total else 0.0, box)
+    return stats
+
+
+def _cached(path, kind, names, read):
+    """Values of one kind for names of one frame, only the ones missing from the cache are read."""
+    if numpy is None:
+        raise AovStatsError("NumPy is not available")
+    stat = os.stat(path)
+    key = os.path.normpath(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+    values = dict(cached[1]) if cached and cached[0] == stamp else {}
+    missing = [name for name in names if (kind, name) not in values]
+    if missing:
+        with sharepool.share_slot(path):
+            values.update(((kind, name), value) for name, value in read(path, set(missing)).items())
+        with _cache_lock:
+            _cache[key] = (stamp, dict(values))
+    return {name: values[(kind, name)] for name in names if (kind, name) in values}
+
+
+def channel_peaks(path, names):
+    """
+    Largest absolute value of each EXR channel in names ('key_light.R', ...) in one frame.
+    Cached per path, mtime and size. Raises OSError, ExrHeaderError or AovStatsError.
+    """
+    return _cached(path, 'peak', names, _read_peaks)
+
+
+def mask_stats(path, names, threshold=MASK_THRESHOLD):
+    """
+    (coverage, bbox) of each EXR channel in names for one frame. coverage is the fraction of the
+    data window above threshold, bbox is (x, y, r, t) in Nuke coordinates or None for an empty mask.
+    """
+    return _cached(path, ('mask', threshold), names, lambda path, missing: _read_masks(path, missing, threshold))
+
+
+def frame_path(pattern, frame):
+    """File of one frame of a Read pattern using %04d or #### padding."""
+    def replace(match):
+        if match.group(0).startswith('#'):
+            return f"{frame:0{len(match.group(0))}d}"
+        return f"{frame:0{int(match.group(1) or 0)}d}"
+    return FRAME_TOKEN_RE.sub(replace, pattern, count=1)
+
+
+def sample_frames(first, last, count=SAMPLE_FRAMES):
+    if last <= first or count <= 1:
+        return [first]
+    step = (last - first) / float(count - 1)
+    return sorted({int(round(first + i * step)) for i in range(count)})
+
+
+def read_sample_paths(read_node, count=SAMPLE_FRAMES):
+    """Files of the sampled frames of a Read node, empty for other nodes."""
+    if read_node.Class() != 'Read':
+        return []
+    frames = sample_frames(int(read_node['first'].value()), int(read_node['last'].value()), count)
+    return [frame_path(read_node['file'].value(), frame) for frame in frames]
+
+
+def _exr_names(header, channels):
+    """EXR channel name of each Nuke channel name in channels that the file has."""
+    return {exrheader.nuke_channel_name(name): name for name in header.channels
+            if exrheader.nuke_channel_name(name) in channels}
+
+
+def mask_coverage(paths, channels, workers=None):
+    """
+    Per-frame (coverage, bbox) of Nuke mask channels ('crowd_01.mask', ...) over the sampled frames,
+    keyed by channel. Channels that could not be measured in any frame are left out.
+    """
+    channels = set(channels)
+
+    def frame_stats(path):
+        names = _exr_names(exrheader.read_header(path), channels)
+        stats = mask_stats(path, list(names.values()))
+        return {channel: stats[name] for channel, name in names.items() if name in stats}
+
+    coverage = {}
+    for frame_result in sharepool.map_ordered(frame_stats, paths, workers):
+        for channel, stats in (frame_result or {}).items():
+            coverage.setdefault(channel, []).append(stats)
+    return coverage
+
+
+def merged_coverage(frames):
+    """(largest coverage, bbox around all frames or None) of a list of per-frame (coverage, bbox)."""
+    boxes = [box for _, box in frames if box is not None]
+    if not boxes:
+        return max([coverage for coverage, _ in frames] or [0.0]), None
+    return (max(coverage for coverage, _ in frames),
+            (min(box[0] for box in boxes), min(box[1] for box in boxes),
+             max(box[2] for box in boxes), max(box[3] for box in boxes)))
+
+
+def layer_peaks(paths, layers, workers=None):
+    """
+    Peak of each Nuke layer ('key_light', ...) over the sampled frames, keyed by layer. Layers that
+    could not be measured in any frame are left out, so callers never drop what they did not see.
+    """
+    def frame_peaks(path):
+        header = exrheader.read_header(path)
+        by_layer = {}
+        for name in header.channels:
+            layer = exrheader.nuke_channel_name(name).rpartition('.')[0]
+            if layer in layers:
+                by_layer.setdefault(layer, []).append(name)
+        peaks = channel_peaks(path, [name for names in by_layer.values() for name in names])
+        return {layer: max(peaks[name] for name in names) for layer, names in by_layer.items()
+                if all(name in peaks for name in names)}
+
+    results = sharepool.map_ordered(frame_peaks, paths, workers)
+    measured = {}
+    for frame_result in results:
+        if frame_result is None:
+            continue
+        for layer, peak in frame_result.items():
+            measured[layer] = max(measured.get(layer, 0.0), peak)
+    return measured
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
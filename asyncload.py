@@ -0,0 +1,172 @@
+# asyncload.py
+#
+# Runs a loader's filesystem discovery off Nuke's UI thread.
+# Discovery jobs run on daemon worker threads and stream their results into a queue. A driver
+# thread hands the results, in job order, to the main thread in small batches through
+# nuke.executeInMainThreadWithResult, so the first nodes appear while the rest is still being
+# scanned. A nuke.ProgressTask shows progress and can be cancelled, and a job stuck on a hung
+# share is skipped after JOB_TIMEOUT seconds (or the caller's timeout) instead of holding up everything behind it.
+# Without a GUI (nuke -t, frame server) everything runs synchronously. Every batch is built
+# inside bulkedit.bulk_edit, so it is one undo step and PFX callbacks do not fire per node.
+
+import time
+import queue
+import threading
+
+import nuke
+import sharepool
+import bulkedit
+
+# User variables
+BATCH_SIZE = 10  # Results handed to the main thread at once
+BATCH_INTERVAL = 0.3  # Seconds after which a partial batch is handed over anyway
+JOB_TIMEOUT = 60.0  # Seconds a single job may take before it is skipped
+
+_DONE = object()
+
+
+class LoadResult(object):
+    """Outcome of an asynchronous load, passed to the finish callback."""
+
+    def __init__(self, timeout=JOB_TIMEOUT):
+        self.timeout = timeout
+        self.cancelled = False
+        self.timed_out = []  # Jobs skipped because they did not answer in time
+        self.failed = []  # Jobs whose discovery raised
+
+    def summary(self):
+        lines = []
+        if self.cancelled:
+            lines.append("Loading was cancelled, only part of the shots were loaded.")
+        if self.timed_out:
+            lines.append(f"{len(self.timed_out)} shots did not answer within {int(self.timeout)}s and were skipped.")
+        if self.failed:
+            lines.append(f"{len(self.failed)} shots could not be read.")
+        return "\n".join(lines)
+
+
+def _worker(jobs_queue, results_queue, discover, cancel):
+    while True:
+        item = jobs_queue.get()
+        if item is _DONE:
+            return
+        index, job = item
+        if cancel.is_set():
+            results_queue.put((index, None, None))
+            continue
+        try:
+            results_queue.put((index, discover(job), None))
+        except Exception as e:
+            results_queue.put((index, None, e))
+
+
+def _bulk(title, func):
+    """Run func on the main thread as one bulk edit, so each batch is a single undo step."""
+    def run(*args):
+        with bulkedit.bulk_edit(title):
+            return func(*args)
+    return run
+
+
+def _run_sync(jobs, discover, build_batch, finish, workers, timeout):
+    if callable(jobs):
+        jobs = jobs()
+    result = LoadResult(timeout)
+    discovered = sharepool.map_ordered(discover, jobs, workers)
+    build_batch([(job, found) for job, found in zip(jobs, discovered) if found is not None])
+    finish(result)
+
+
+def run_async(title, jobs, discover, build_batch, finish, workers=None, timeout=JOB_TIMEOUT):
+    """
+    Load in the background.
+
+    jobs         list of jobs, or a callable returning it (called on the driver thread)
+    discover     discover(job) -> result or None, runs on worker threads, must not touch nuke nodes
+    build_batch  build_batch([(job, result), ...]) creates nodes, runs on the main thread
+    finish       finish(LoadResult) runs once on the main thread at the end
+    timeout      seconds a job may take before it is skipped, None waits for slow jobs (validation)
+    """
+    workers = workers or sharepool.PROBE_WORKERS
+    build_batch = _bulk(title, build_batch)
+    finish = _bulk(title, finish)
+    if not nuke.GUI:
+        _run_sync(jobs, discover, build_batch, finish, workers, timeout)
+        return None
+
+    def drive():
+        result = LoadResult(timeout)
+        task = nuke.ProgressTask(title)
+        cancel = threading.Event()
+        try:
+            task.setMessage("Looking for renders...")
+            job_list = jobs() if callable(jobs) else list(jobs)
+            total = len(job_list)
+
+            jobs_queue = queue.Queue()
+            results_queue = queue.Queue()
+            for index, job in enumerate(job_list):
+                jobs_queue.put((index, job))
+            for _ in range(max(1, min(workers, total))):
+                jobs_queue.put(_DONE)
+                thread = threading.Thread(target=_worker, args=(jobs_queue, results_queue, discover, cancel))
+                thread.daemon = True  # A worker stuck on a hung share must not keep Nuke alive
+                thread.start()
+
+            pending = {}
+            next_index = 0
+            batch = []
+            last_flush = time.time()
+            waiting_since = time.time()
+
+            def flush():
+                if batch:
+                    nuke.executeInMainThreadWithResult(build_batch, args=(list(batch),))
+                    del batch[:]
+
+            while next_index < total:
+                if task.isCancelled():
+                    cancel.set()
+                    result.cancelled = True
+                    break
+                try:
+                    index, found, error = results_queue.get(timeout=0.1)
+                    pending[index] = (found, error)
+                except queue.Empty:
+                    pass
+
+                # Hand results over in job order so the layout does not depend on timing
+                while next_index in pending:
+                    found, error = pending.pop(next_index)
+                    if error is not None:
+                        print(f"Could not load {job_list[next_index]}: {error}")
+                        result.failed.append(job_list[next_index])
+                    elif found is not None:
+                        batch.append((job_list[next_index], found))
+                    next_index += 1
+                    waiting_since = time.time()
+
+                if next_index < total and timeout is not None and time.time() - waiting_since > timeout:
+                    print(f"Skipping {job_list[next_index]}, no answer after {timeout}s")
+                    result.timed_out.append(job_list[next_index])
+                    next_index += 1
+                    waiting_since = time.time()
+
+                task.setProgress(int(next_index * 100 / max(total, 1)))
+                task.setMessage(f"{next_index} / {total}")
+                if len(batch) >= BATCH_SIZE or (batch and time.time() - last_flush > BATCH_INTERVAL):
+                    flush()
+                    last_flush = time.time()
+            flush()
+        except Exception as e:
+            print(f"{title} failed: {e}")
+            result.failed.append(str(e))
+        finally:
+            cancel.set()
+            del task
+        nuke.executeInMainThread(finish, args=(result,))
+
+    thread = threading.Thread(target=drive, name=f"PFX {title}")
+    thread.daemon = True
+    thread.start()
+    return thread
@@ -0,0 +1,59 @@
+# backdropindex.py
+#
+# Answers "which backdrops is this node in" without testing every backdrop.
+# Backdrop rectangles are read once into a nodelayout.SpatialGrid, a lookup only tests the
+# backdrops sharing the node's grid cell. Nested backdrops are returned innermost first.
+# Works on nkparser scripts too, pass their nodes or the script as index.
+
+import nodelayout
+
+
+class BackdropIndex(object):
+    def __init__(self, backdrops=None, index=None):
+        """backdrops defaults to every backdrop in the root of the script."""
+        if backdrops is None:
+            backdrops = _index(index).of_class('BackdropNode', root_only=True)
+        self.backdrops = list(backdrops)
+        self.rects = [nodelayout.node_rect(backdrop) for backdrop in self.backdrops]
+        self.grid = nodelayout.SpatialGrid(self.rects)
+        self._by_rect = {}
+        for backdrop, rect in zip(self.backdrops, self.rects):
+            self._by_rect.setdefault(rect, []).append(backdrop)
+
+    def __len__(self):
+        return len(self.backdrops)
+
+    def at(self, x, y):
+        """Backdrops whose rectangle contains the point, edges included, smallest (innermost) first."""
+        found = set()
+        for rect in self.grid.colliding((x - 1, y - 1, 2, 2)):
+            bd_x, bd_y, bd_w, bd_h = rect
+            if bd_x <= x <= bd_x + bd_w and bd_y <= y <= bd_y + bd_h:
+                found.add(rect)
+        return [backdrop for rect in sorted(found, key=lambda rect: rect[2] * rect[3])
+                for backdrop in self._by_rect[rect]]
+
+    def containing(self, node):
+        """Backdrops a node sits in, judged by its top-left corner, innermost first."""
+        return self.at(node.xpos(), node.ypos())
+
+    def innermost(self, node):
+        backdrops = self.containing(node)
+        return backdrops[0] if backdrops else None
+
+    def parents(self, backdrop):
+        """Backdrops a backdrop is nested in, innermost first."""
+        return [other for other in self.containing(backdrop) if other.name() != backdrop.name()]
+
+
+def _index(index):
+    if index is not None:
+        return index
+    import nodeindex  # Needs Nuke, parsed scripts always come with their own index
+    return nodeindex.get()
+
+
+def of_color(color, index=None):
+    """Index of the root backdrops with the given tile_color."""
+    return BackdropIndex(node for node in _index(index).of_class('BackdropNode', root_only=True)
+                         if int(node['tile_color'].value() or 0) == color)
@@ -0,0 +1,80 @@
+# graphbuilder_benchmark.py
+#
+# Compares building a contact-sheet style graph (a Read and a Text2 node per shot, positioned on
+# a grid) node by node through nuke.nodes and setValue against graphbuilder's single nodePaste.
+# Run it in a terminal Nuke session:
+#   nuke -t benchmarks/graphbuilder_benchmark.py [shots] [repeats]
+# or from the Script Editor with run(shots, repeats).
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nuke
+import graphbuilder
+
+FILE_PATTERN = "/nonexistent/benchmark/SH{shot:04d}/pp_benchmark_v001.%06d.exr"
+
+
+def build_direct(shots):
+    for i in range(shots):
+        read_node = nuke.nodes.Read(name=f"BenchRead_{i}")
+        read_node['file'].setValue(FILE_PATTERN.format(shot=i))
+        read_node['first'].setValue(1001)
+        read_node['last'].setValue(1100)
+        read_node['localizationPolicy'].setValue(1)
+        read_node['tile_color'].setValue(0x808080ff)
+        text_node = nuke.nodes.Text2()
+        text_node['message'].setValue(f"SH{i:04d}")
+        text_node['font_size'].setValue(50)
+        text_node['box'].setValue([0, 0, 1920, 1080])
+        text_node['xjustify'].setValue('center')
+        text_node['label'].setValue("[value message]")
+        text_node.setInput(0, read_node)
+        read_node.setXYpos((i % 5) * 250, (i // 5) * 250)
+        text_node.setXYpos(read_node.xpos(), read_node.ypos() + 107)
+
+
+def build_graph(shots):
+    graph = graphbuilder.GraphBuilder()
+    for i in range(shots):
+        read_node = graph.Read(name=f"BenchRead_{i}", file=FILE_PATTERN.format(shot=i), first=1001, last=1100,
+                               localizationPolicy=1, tile_color=0x808080ff)
+        text_node = graph.Text2(inputs=[read_node], message=f"SH{i:04d}", font_size=50, box=[0, 0, 1920, 1080],
+                                xjustify='center', label="[value message]")
+        read_node.setXYpos((i % 5) * 250, (i // 5) * 250)
+        text_node.setXYpos(read_node.xpos(), read_node.ypos() + 107)
+    graph.apply()
+
+
+def clear():
+    for node in nuke.allNodes():
+        nuke.delete(node)
+
+
+def time_build(build, shots, repeats):
+    times = []
+    for _ in range(repeats):
+        clear()
+        start = time.perf_counter()
+        build(shots)
+        times.append(time.perf_counter() - start)
+    node_count = len(nuke.allNodes())
+    clear()
+    return min(times), node_count
+
+
+def run(shots=200, repeats=3):
+    direct, direct_nodes = time_build(build_direct, shots, repeats)
+    pasted, pasted_nodes = time_build(build_graph, shots, repeats)
+    print(f"{shots} shots, best of {repeats}")
+    print(f"  nuke.nodes + setValue: {direct:.3f}s ({direct_nodes} nodes)")
+    print(f"  graphbuilder paste:    {pasted:.3f}s ({pasted_nodes} nodes)")
+    if pasted:
+        print(f"  speedup: {direct / pasted:.1f}x")
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,82 @@
+# lightshuffler_benchmark.py
+#
+# Measures node count and render time per frame of LightShuffler's layouts (merge chain or
+# balanced tree, with or without the per-light Removes) on a synthetic source with many light
+# groups. Run it in a terminal Nuke session:
+#   nuke -t benchmarks/lightshuffler_benchmark.py [light_groups] [frames]
+# or from the Script Editor with run(light_groups, frames).
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nuke
+import LightShuffler
+
+WIDTH, HEIGHT = 2048, 858
+LAYOUTS = [
+    ("chain", False, False),
+    ("chain, lean", True, False),
+    ("balanced", False, True),
+    ("balanced, lean", True, True),
+]
+
+
+def build_source(light_groups):
+    """A Constant with light_groups extra layers, each filled with a different ramp."""
+    nuke.addFormat(f"{WIDTH} {HEIGHT} 1 lightshuffler_bench")
+    source = nuke.nodes.Constant(format="lightshuffler_bench")
+    for i in range(light_groups):
+        layer = f"light_grp_{i:02d}"
+        nuke.Layer(layer, [f"{layer}.red", f"{layer}.green", f"{layer}.blue"])
+        source = nuke.nodes.Expression(inputs=[source], channel0=layer, expr0=f"x / width * {(i + 1) / light_groups}")
+    return source
+
+
+def clear():
+    for node in nuke.allNodes():
+        nuke.delete(node)
+
+
+def measure(source, lean, balanced, frames):
+    before = {node.name() for node in nuke.allNodes()}
+    for node in nuke.selectedNodes():
+        node.setSelected(False)
+    source.setSelected(True)
+    output = LightShuffler.split_light_channels(lean=lean, balanced=balanced)
+    created = [node for node in nuke.allNodes() if node.name() not in before]
+    node_count = len([node for node in created if node.Class() != 'BackdropNode'])
+
+    handle, path = tempfile.mkstemp(suffix='.exr', prefix='lightshuffler_bench_')
+    os.close(handle)
+    write = nuke.nodes.Write(inputs=[output], file=path.replace('\\', '/'), file_type='exr', channels='rgb')
+    try:
+        nuke.clearRAMCache()
+        start = time.perf_counter()
+        nuke.execute(write, 1, frames)
+        per_frame = (time.perf_counter() - start) / frames
+    finally:
+        nuke.delete(write)
+        if os.path.exists(path):
+            os.remove(path)
+
+    for node in created:
+        nuke.delete(node)
+    return node_count, per_frame
+
+
+def run(light_groups=32, frames=5):
+    clear()
+    source = build_source(light_groups)
+    print(f"{light_groups} light groups, {WIDTH}x{HEIGHT}, {frames} frames")
+    for name, lean, balanced in LAYOUTS:
+        node_count, per_frame = measure(source, lean, balanced, frames)
+        print(f"  {name:15s} {node_count:4d} nodes  {per_frame * 1000:8.1f} ms/frame")
+    clear()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
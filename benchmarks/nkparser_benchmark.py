@@ -0,0 +1,69 @@
+# nkparser_benchmark.py
+#
+# Parses a generated .nk script with many nodes (Read/Grade/Merge chains, groups, multi-line
+# knobs) and reports parse time and peak memory, with all knobs and with only the knobs the
+# checks keep. Runs without Nuke:
+#   python benchmarks/nkparser_benchmark.py [nodes]
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nkparser
+import nkchecks
+
+
+def write_script(path, nodes):
+    """A script of Read -> Grade -> Merge branches, every 50th branch wrapped in a Group."""
+    with open(path, 'w') as f:
+        f.write('Root {\n inputs 0\n name bench.nk\n}\n')
+        f.write('Constant {\n inputs 0\n name Base\n}\nset NBase [stack 0]\n')
+        count = 0
+        branch = 0
+        while count < nodes:
+            f.write(f'Read {{\n inputs 0\n file /renders/sh{branch:04d}/beauty_v001.####.exr\n first 1001\n last 1100\n'
+                    f' name Read{branch}\n xpos {branch * 110}\n ypos 0\n}}\n')
+            if branch % 50 == 0:
+                f.write(f'Group {{\n name Group{branch}\n addUserKnob {{20 User}}\n}}\n'
+                        f' Input {{\n  inputs 0\n  name Input1\n }}\n'
+                        f' Grade {{\n  white {{{{curve x1001 1 x1050 1.2\n x1100 1}}}}\n  name Grade1\n }}\n'
+                        f' Output {{\n  name Output1\n }}\nend_group\n')
+                count += 4
+            f.write(f'Grade {{\n white {{1.1 1 0.9 1}}\n label "grade \\[value white\\]"\n name Grade{branch}\n'
+                    f' xpos {branch * 110}\n ypos 100\n}}\npush $NBase\n'
+                    f'Merge2 {{\n inputs 2\n operation plus\n name Merge{branch}\n xpos {branch * 110}\n ypos 200\n}}\n'
+                    f'set NBase [stack 0]\n')
+            count += 3
+            branch += 1
+
+
+def measure(path, keep_knobs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    script = nkparser.parse(path, keep_knobs=keep_knobs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(script.nodes), elapsed, peak
+
+
+def run(nodes=30000):
+    handle, path = tempfile.mkstemp(suffix='.nk', prefix='nkparser_bench_')
+    os.close(handle)
+    try:
+        write_script(path, nodes)
+        size = os.path.getsize(path)
+        print(f"{size / 1e6:.1f} MB script")
+        for label, keep_knobs in (("all knobs", None), ("check knobs", nkchecks.keep_knobs())):
+            count, elapsed, peak = measure(path, keep_knobs)
+            print(f"  {label:12s} {count:6d} nodes  {elapsed:6.2f} s  {peak / 1e6:6.1f} MB peak")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:2]])
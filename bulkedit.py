@@ -0,0 +1,123 @@
+# bulkedit.py
+#
+# Bulk-edit context for PFX builders.
+# PFX callbacks (knobChanged, onCreate, ...) are registered through register() instead of
+# nuke.addKnobChanged and friends. Inside bulk_edit() those callbacks are taken out of Nuke's
+# callback lists and the whole operation is one undo step. When the block ends, every node
+# created inside it is reconciled once per suspended callback, doing what the callbacks would
+# have done node by node:
+#
+#   with bulkedit.bulk_edit("Load Sequence"):
+#       graph.apply()
+#
+# Nuke has no API to freeze the node graph redraw. The builders lay their nodes out in Python
+# with graphbuilder and nodelayout before the single paste, and the loaders fit their backdrops
+# and contact sheets once per load, so there is no per-node layout left to delay.
+
+import contextlib
+
+import nuke
+
+CALLBACK_KINDS = {
+    'knobChanged': (nuke.addKnobChanged, nuke.removeKnobChanged),
+    'onCreate': (nuke.addOnCreate, nuke.removeOnCreate),
+    'onUserCreate': (nuke.addOnUserCreate, nuke.removeOnUserCreate),
+    'onDestroy': (nuke.addOnDestroy, nuke.removeOnDestroy),
+    'updateUI': (nuke.addUpdateUI, nuke.removeUpdateUI),
+    'autolabel': (nuke.addAutolabel, nuke.removeAutolabel),
+}
+
+_callbacks = {}  # (kind, module, name, node_class) -> (callback, reconcile)
+_active = []  # Open BulkEdits, outermost first
+
+
+class BulkEdit(object):
+    def __init__(self, name):
+        self.name = name
+        self.created = []  # Nodes created inside the block
+
+
+def register(kind, callback, node_class='*', reconcile=None):
+    """
+    Register a PFX callback with Nuke. reconcile(node) is called for every node created during a
+    bulk edit instead of the callback; without it the callback is simply skipped for those nodes.
+    Registering the same function again (e.g. after reloading its module) replaces the old one.
+    """
+    add, remove = CALLBACK_KINDS[kind]
+    key = (kind, callback.__module__, callback.__name__, node_class)
+    previous = _callbacks.pop(key, None)
+    if previous and not _active:
+        remove(previous[0], nodeClass=node_class)
+    _callbacks[key] = (callback, reconcile)
+    if not _active:
+        add(callback, nodeClass=node_class)
+
+
+def _record_created():
+    if _active:
+        _active[0].created.append(nuke.thisNode())
+
+
+def _node_class(node):
+    # Nodes deleted inside the block raise when touched
+    try:
+        return node.Class()
+    except ValueError:
+        return None
+
+
+def _suspend():
+    for (kind, _, _, node_class), (callback, _) in _callbacks.items():
+        CALLBACK_KINDS[kind][1](callback, nodeClass=node_class)
+    nuke.addOnCreate(_record_created)
+
+
+def _resume():
+    nuke.removeOnCreate(_record_created)
+    for (kind, _, _, node_class), (callback, _) in _callbacks.items():
+        CALLBACK_KINDS[kind][0](callback, nodeClass=node_class)
+
+
+def _reconcile(bulk):
+    seen = set()
+    for node in bulk.created:
+        node_class = _node_class(node)
+        if node_class is None or node.fullName() in seen:
+            continue
+        seen.add(node.fullName())
+        done = set()
+        for (_, _, _, callback_class), (_, reconcile) in _callbacks.items():
+            if reconcile is None or reconcile in done or callback_class not in ('*', node_class):
+                continue
+            done.add(reconcile)
+            try:
+                reconcile(node)
+            except Exception as e:
+                print(f"Reconciling {node.name()} with {reconcile.__name__} failed: {e}")
+
+
+@contextlib.contextmanager
+def bulk_edit(name="PFX"):
+    """
+    Suspend PFX callbacks, group everything into one undo step and reconcile at the end.
+    Nested blocks join the outermost one. Must be used on the main thread.
+    """
+    if _active:
+        yield _active[0]
+        return
+
+    bulk = BulkEdit(name)
+    undo = nuke.Undo()
+    undo.begin(name)
+    _suspend()
+    _active.append(bulk)
+    try:
+        yield bulk
+    finally:
+        try:
+            _reconcile(bulk)
+        finally:
+            _active.remove(bulk)
+            _resume()
+            undo.end()
+
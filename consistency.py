@@ -0,0 +1,227 @@
+# consistency.py
+#
+# Declarative consistency rules: "nodes matching X must agree on knobs Y within tolerance Z".
+# Every rule is checked in the same pass over the node index, each node's class and name are
+# read once and tested against all rules. For every knob the value most nodes agree with within
+# the tolerance wins and nodes more than the tolerance away from it are reported. Results come
+# back grouped per rule, as a text report for the GUI or as JSON for pipeline tools. With
+# CHECK_ON_SAVE the rules run on every save and only print to the terminal. check() also takes an nkparser script as index, so the
+# rules run without Nuke; a parsed script only has the knobs that differ from their defaults, so
+# there a missing knob votes as the rule's default for it.
+
+import json
+from collections import Counter
+
+try:
+    import nuke
+except ImportError:
+    nuke = None
+
+import backdropindex
+import nkparser
+
+# User variables
+CHECK_ON_SAVE = False
+DEFAULT_TOLERANCE = 0.005
+DEFAULT_VALUE = "default"  # Stands in for knobs a parsed script leaves at their default
+
+
+class Rule(object):
+    """
+    Nodes match when their class is in classes (if given), their name contains one of names (if
+    given) and none of exclude. note_backdrop_color marks mismatching nodes sitting in a backdrop
+    of that tile_color, described by note in the report. defaults gives the default value of knobs,
+    parsed scripts leave default knobs out and they vote with that value, or as DEFAULT_VALUE.
+    """
+
+    def __init__(self, name, knobs, classes=(), names=(), exclude=(), tolerance=DEFAULT_TOLERANCE,
+                 root_only=True, note_backdrop_color=None, note="in marked backdrop", defaults=None):
+        self.name = name
+        self.knobs = list(knobs)
+        self.defaults = dict(defaults or {})
+        self.classes = set(classes)
+        self.names = tuple(names)
+        self.exclude = tuple(exclude)
+        self.tolerance = tolerance
+        self.root_only = root_only
+        self.note_backdrop_color = note_backdrop_color
+        self.note = note
+
+    def matches(self, node_class, node_name):
+        if self.classes and node_class not in self.classes:
+            return False
+        if self.names and not any(text in node_name for text in self.names):
+            return False
+        return not any(text in node_name for text in self.exclude)
+
+
+class Mismatch(object):
+    def __init__(self, node, knob, value, expected, in_backdrop=False):
+        self.node = node  # Node name
+        self.knob = knob
+        self.value = value
+        self.expected = expected
+        self.in_backdrop = in_backdrop
+
+    def to_dict(self):
+        return {'node': self.node, 'knob': self.knob, 'value': self.value,
+                'expected': self.expected, 'in_backdrop': self.in_backdrop}
+
+
+class RuleResult(object):
+    def __init__(self, rule):
+        self.rule = rule
+        self.checked = 0
+        self.expected = {}  # knob -> majority value, only for knobs where the nodes disagree
+        self.mismatches = []
+
+    @property
+    def ok(self):
+        return not self.mismatches
+
+    def to_dict(self):
+        return {'rule': self.rule.name, 'checked': self.checked, 'ok': self.ok,
+                'expected': self.expected, 'mismatches': [mismatch.to_dict() for mismatch in self.mismatches]}
+
+
+ZDEFOCUS_RULE = Rule("ZDefocus", ['fStop', 'focalDistance', 'focalLength', 'filmBack'],
+                     names=['PxF_ZDefocus'], exclude=['Controller'],
+                     note_backdrop_color=2390460672, note="in purple backdrop")
+
+# Rules checked by run_consistency_checks and on save, add camera, grain or lens rules here
+RULES = [ZDEFOCUS_RULE]
+
+
+def _plain(value):
+    """Knob value as something hashable and JSON friendly."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_plain(item) for item in value)
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+
+def _distance(a, b):
+    """Largest numeric difference between two values, None when they are not comparable as numbers."""
+    if isinstance(a, tuple) and isinstance(b, tuple):
+        if len(a) != len(b):
+            return None
+        distances = [_distance(x, y) for x, y in zip(a, b)]
+        return None if None in distances else max(distances or [0.0])
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool) and not isinstance(b, bool):
+        return abs(a - b)
+    return None
+
+
+def _agrees(value, expected, tolerance):
+    distance = _distance(value, expected)
+    return value == expected if distance is None else distance <= tolerance
+
+
+def _majority(values, tolerance):
+    """
+    The value most others agree with within tolerance, so 5.6001, 5.6002, 5.6003, 8, 8 gives 5.6001
+    and not 8. Ties go to the value with more exact copies, then to the value met first.
+    """
+    # Counter keeps first-seen order
+    counts = Counter(values)
+    support = {candidate: sum(count for value, count in counts.items() if _agrees(value, candidate, tolerance))
+               for candidate in counts}
+    return max(counts, key=lambda candidate: (support[candidate], counts[candidate]))
+
+
+def check(rules=None, index=None):
+    """Evaluate all rules in one pass over the script. Returns a RuleResult per rule, in order."""
+    rules = RULES if rules is None else rules
+    if index is None:
+        import nodeindex  # Needs Nuke, parsed scripts pass their own index
+        index = nodeindex.get()
+    values = [{knob: [] for knob in rule.knobs} for rule in rules]  # knob -> [(node name, value, node)]
+    results = [RuleResult(rule) for rule in rules]
+    # Nuke nodes always have their knobs, a parsed script only writes the ones changed from default
+    missing_is_default = isinstance(index, nkparser.NkScript)
+
+    for node in index.all():
+        full_name = node.fullName()
+        root_level = '.' not in full_name
+        node_class, node_name = node.Class(), node.name()
+        node_knobs = None
+        for rule, rule_values, result in zip(rules, values, results):
+            if (rule.root_only and not root_level) or not rule.matches(node_class, node_name):
+                continue
+            if node_knobs is None:
+                node_knobs = node.knobs()
+            result.checked += 1
+            for knob in rule.knobs:
+                if knob in node_knobs:
+                    rule_values[knob].append((full_name, _plain(node_knobs[knob].value()), node))
+                elif missing_is_default:
+                    rule_values[knob].append((full_name, _plain(rule.defaults.get(knob, DEFAULT_VALUE)), node))
+
+    backdrops = {}
+    for rule, rule_values, result in zip(rules, values, results):
+        for knob in rule.knobs:
+            entries = rule_values[knob]
+            if not entries:
+                continue
+            expected = _majority([value for _, value, _ in entries], rule.tolerance)
+            wrong = [(name, value, node) for name, value, node in entries if not _agrees(value, expected, rule.tolerance)]
+            if not wrong:
+                continue
+            result.expected[knob] = expected
+            for name, value, node in wrong:
+                in_backdrop = False
+                if rule.note_backdrop_color is not None:
+                    color = rule.note_backdrop_color
+                    if color not in backdrops:
+                        backdrops[color] = backdropindex.of_color(color, index)
+                    in_backdrop = bool(backdrops[color].containing(node))
+                result.mismatches.append(Mismatch(name, knob, value, expected, in_backdrop))
+    return results
+
+
+def report(results):
+    """Human readable report, one block per rule with problems."""
+    lines = []
+    for result in results:
+        if result.ok:
+            continue
+        lines.append(f"{result.rule.name}: {len(result.mismatches)} mismatches in {result.checked} nodes")
+        for knob, expected in result.expected.items():
+            lines.append(f"  {knob} (Correct value: {expected}):")
+            for mismatch in result.mismatches:
+                if mismatch.knob == knob:
+                    note = f" ({result.rule.note})" if mismatch.in_backdrop else ""
+                    lines.append(f"    - {mismatch.node}: {mismatch.value}{note}")
+    if not lines:
+        return f"All {len(results)} consistency rules pass."
+    return "\n".join(lines)
+
+
+def to_json(results, indent=2):
+    return json.dumps([result.to_dict() for result in results], indent=indent, default=str)
+
+
+def run_consistency_checks():
+    """Menu entry: check every rule and show the report."""
+    results = check()
+    text = report(results)
+    print(text)
+    nuke.message(text)
+    return results
+
+
+def _on_script_save():
+    results = check()
+    if not all(result.ok for result in results):
+        print(f"Consistency check on save:\n{report(results)}")
+
+
+def install_save_check():
+    """Check the rules on every save when CHECK_ON_SAVE is set, printing only, so saving never blocks."""
+    try:
+        nuke.removeOnScriptSave(_on_script_save)
+    except ValueError:
+        pass
+    if CHECK_ON_SAVE:
+        nuke.addOnScriptSave(_on_script_save)
@@ -0,0 +1,351 @@
+# exrheader.py
+#
+# Header-only OpenEXR reader.
+# Reads just the header bytes of an EXR file (channels, data and display window, compression,
+# parts and custom attributes) in pure Python, so channel-driven tools can plan their setup
+# before building nodes and can run without Nuke. Headers are cached per path and only read
+# again when the file's mtime or size changes.
+
+import os
+import struct
+import threading
+
+# User variables
+MAX_CACHE_ENTRIES = 2048
+FIRST_READ_BYTES = 65536  # Most headers fit, big AOV stacks are read again with a larger buffer
+MAX_HEADER_BYTES = 16 * 1024 * 1024
+
+EXR_MAGIC = 20000630
+SINGLE_TILE_FLAG = 0x200
+LONG_NAMES_FLAG = 0x400
+NON_IMAGE_FLAG = 0x800
+MULTI_PART_FLAG = 0x1000
+
+COMPRESSIONS = ['none', 'rle', 'zips', 'zip', 'piz', 'pxr24', 'b44', 'b44a', 'dwaa', 'dwab']
+PIXEL_TYPES = ['uint', 'half', 'float']
+NUKE_CHANNEL_NAMES = {'R': 'red', 'G': 'green', 'B': 'blue', 'A': 'alpha'}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class ExrHeaderError(Exception):
+    pass
+
+
+class _NeedMoreData(Exception):
+    pass
+
+
+class ExrChannel(object):
+    __slots__ = ('name', 'pixel_type', 'linear', 'x_sampling', 'y_sampling')
+
+    def __init__(self, name, pixel_type, linear, x_sampling, y_sampling):
+        self.name = name
+        self.pixel_type = pixel_type
+        self.linear = linear
+        self.x_sampling = x_sampling
+        self.y_sampling = y_sampling
+
+    def __repr__(self):
+        return f"ExrChannel('{self.name}', '{self.pixel_type}')"
+
+
+class ExrPart(object):
+    """One part of an EXR file. attributes holds every header attribute, decoded where the type is known."""
+
+    def __init__(self, attributes):
+        self.attributes = attributes
+
+    @property
+    def name(self):
+        return self.attributes.get('name')
+
+    @property
+    def channels(self):
+        return self.attributes.get('channels', [])
+
+    @property
+    def channel_names(self):
+        return [channel.name for channel in self.channels]
+
+    @property
+    def data_window(self):
+        return self.attributes.get('dataWindow')
+
+    @property
+    def display_window(self):
+        return self.attributes.get('displayWindow')
+
+    @property
+    def compression(self):
+        return self.attributes.get('compression')
+
+    @property
+    def resolution(self):
+        window = self.display_window
+        if not window:
+            return None
+        return window[2] - window[0] + 1, window[3] - window[1] + 1
+
+
+class ExrHeader(object):
+    def __init__(self, path, version, flags, parts, header_size=0):
+        self.path = path
+        self.version = version
+        self.flags = flags
+        self.parts = parts
+        self.header_size = header_size  # Bytes up to the offset table
+
+    @property
+    def is_multipart(self):
+        return bool(self.flags & MULTI_PART_FLAG)
+
+    @property
+    def is_tiled(self):
+        return bool(self.flags & SINGLE_TILE_FLAG)
+
+    @property
+    def channels(self):
+        """Channel names of all parts, multi-part channels are prefixed with their part name like Nuke does."""
+        names = []
+        for part in self.parts:
+            for name in part.channel_names:
+                if self.is_multipart and part.name and '.' not in name:
+                    name = f"{part.name}.{name}"
+                names.append(name)
+        return names
+
+    @property
+    def data_window(self):
+        return self.parts[0].data_window if self.parts else None
+
+    @property
+    def display_window(self):
+        return self.parts[0].display_window if self.parts else None
+
+    @property
+    def resolution(self):
+        return self.parts[0].resolution if self.parts else None
+
+    @property
+    def compression(self):
+        return self.parts[0].compression if self.parts else None
+
+    @property
+    def attributes(self):
+        return self.parts[0].attributes if self.parts else {}
+
+    def layers(self):
+        """Sorted layer names as Nuke shows them ('rgba', 'depth', 'diffuse', ...)."""
+        return sorted({name.split('.')[0] for name in nuke_channel_names(self.channels)}, key=str.lower)
+
+
+class _Reader(object):
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def need(self, size):
+        if self.pos + size > len(self.data):
+            raise _NeedMoreData()
+
+    def unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        self.need(size)
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += size
+        return values
+
+    def cstring(self):
+        end = self.data.find(b'\0', self.pos)
+        if end < 0:
+            raise _NeedMoreData()
+        value = self.data[self.pos:end].decode('latin-1')
+        self.pos = end + 1
+        return value
+
+    def peek_null(self):
+        self.need(1)
+        return self.data[self.pos] == 0
+
+
+def _decode_chlist(value):
+    channels = []
+    reader = _Reader(value)
+    while reader.pos < len(value) and not reader.peek_null():
+        name = reader.cstring()
+        pixel_type, linear, x_sampling, y_sampling = reader.unpack('<iB3xii')
+        type_name = PIXEL_TYPES[pixel_type] if 0 <= pixel_type < len(PIXEL_TYPES) else str(pixel_type)
+        channels.append(ExrChannel(name, type_name, bool(linear), x_sampling, y_sampling))
+    return channels
+
+
+def _decode_stringvector(value):
+    strings = []
+    pos = 0
+    while pos + 4 <= len(value):
+        length = struct.unpack_from('<i', value, pos)[0]
+        strings.append(value[pos + 4:pos + 4 + length].decode('latin-1'))
+        pos += 4 + length
+    return strings
+
+
+def _decode_fixed(fmt):
+    def decode(value):
+        values = struct.unpack_from(fmt, value)
+        return values[0] if len(values) == 1 else values
+    return decode
+
+
+_DECODERS = {
+    'int': _decode_fixed('<i'),
+    'float': _decode_fixed('<f'),
+    'double': _decode_fixed('<d'),
+    'box2i': _decode_fixed('<4i'),
+    'box2f': _decode_fixed('<4f'),
+    'v2i': _decode_fixed('<2i'),
+    'v2f': _decode_fixed('<2f'),
+    'v3i': _decode_fixed('<3i'),
+    'v3f': _decode_fixed('<3f'),
+    'm33f': _decode_fixed('<9f'),
+    'm44f': _decode_fixed('<16f'),
+    'rational': _decode_fixed('<iI'),
+    'timecode': _decode_fixed('<2I'),
+    'keycode': _decode_fixed('<7i'),
+    'chromaticities': _decode_fixed('<8f'),
+    'tiledesc': _decode_fixed('<IIB'),
+    'lineOrder': _decode_fixed('<B'),
+    'envmap': _decode_fixed('<B'),
+    'string': lambda value: value.decode('latin-1'),
+    'stringvector': _decode_stringvector,
+    'chlist': _decode_chlist,
+    'compression': lambda value: COMPRESSIONS[value[0]] if value[0] < len(COMPRESSIONS) else str(value[0]),
+}
+
+
+def _decode(type_name, value):
+    decoder = _DECODERS.get(type_name)
+    if decoder is None:
+        return value  # Unknown or bulky types (preview images, opaque blobs) stay raw bytes
+    try:
+        return decoder(value)
+    except (struct.error, IndexError, UnicodeDecodeError, _NeedMoreData):
+        return value
+
+
+def _read_part(reader):
+    attributes = {}
+    while not reader.peek_null():
+        name = reader.cstring()
+        type_name = reader.cstring()
+        size, = reader.unpack('<i')
+        if size < 0:
+            # A corrupt size would move the reader backwards and loop forever
+            raise ExrHeaderError(f"Corrupt EXR header: attribute {name} has size {size}")
+        reader.need(size)
+        value = reader.data[reader.pos:reader.pos + size]
+        reader.pos += size
+        attributes[name] = _decode(type_name, value)
+    reader.pos += 1  # Header terminator
+    return ExrPart(attributes)
+
+
+def parse_header(data, path=''):
+    """Parse header bytes. Raises ExrHeaderError for non-EXR data and _NeedMoreData when data is cut short."""
+    reader = _Reader(data)
+    magic, version_field = reader.unpack('<ii')
+    if magic != EXR_MAGIC:
+        raise ExrHeaderError(f"Not an EXR file: {path}")
+    version = version_field & 0xff
+    flags = version_field & ~0xff
+
+    parts = [_read_part(reader)]
+    if flags & MULTI_PART_FLAG:
+        # Part headers follow each other, an empty header ends the list
+        while not reader.peek_null():
+            parts.append(_read_part(reader))
+        reader.pos += 1
+    return ExrHeader(path, version, flags, parts, reader.pos)
+
+
+def _read_file_header(path, size):
+    with open(path, 'rb') as f:
+        data = f.read(size)
+        while True:
+            try:
+                return parse_header(data, path)
+            except _NeedMoreData:
+                if len(data) < size or size >= MAX_HEADER_BYTES:
+                    raise ExrHeaderError(f"Truncated EXR header: {path}")
+                size *= 4
+                f.seek(0)
+                data = f.read(size)
+
+
+def read_header(path, first_read=FIRST_READ_BYTES):
+    """
+    Return the ExrHeader of a file, cached per path, mtime and size. Raises OSError or ExrHeaderError.
+    first_read is the number of bytes read at first, callers that know the header size pass it.
+    """
+    stat = os.stat(path)
+    key = os.path.normpath(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    header = _read_file_header(path, max(8, first_read))
+    with _cache_lock:
+        if len(_cache) >= MAX_CACHE_ENTRIES:
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = (stamp, header)
+    return header
+
+
+def try_read_header(path):
+    """read_header that prints the problem and returns None instead of raising."""
+    try:
+        return read_header(path)
+    except (OSError, ExrHeaderError) as e:
+        print(f"Could not read EXR header of {path}: {e}")
+        return None
+
+
+def nuke_channel_name(name):
+    """EXR channel name as Nuke shows it: 'R' -> 'rgba.red', 'diffuse.G' -> 'diffuse.green', 'Z' -> 'depth.Z'."""
+    layer, _, channel = name.rpartition('.')
+    if not layer:
+        if name in NUKE_CHANNEL_NAMES:
+            return f"rgba.{NUKE_CHANNEL_NAMES[name]}"
+        if name == 'Z':
+            return "depth.Z"
+        return f"other.{name}"
+    return f"{layer}.{NUKE_CHANNEL_NAMES.get(channel, channel)}"
+
+
+def nuke_channel_names(names):
+    return [nuke_channel_name(name) for name in names]
+
+
+def channels_for_node(node):
+    """
+    Nuke-style channel names of a node. For a Read of an EXR the header is read directly, so the
+    file does not have to be opened by Nuke. Other nodes fall back to node.channels().
+    """
+    if node.Class() == 'Read':
+        try:
+            path = node['file'].evaluate()
+        except (RuntimeError, ValueError):
+            path = None
+        if path and path.lower().endswith('.exr'):
+            header = try_read_header(path)
+            if header is not None:
+                return nuke_channel_names(header.channels)
+    return node.channels()
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
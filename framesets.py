@@ -0,0 +1,157 @@
+# framesets.py
+#
+# Compact frame-set type for rendered image sequences.
+# Frames are stored as run-length (start, end) ranges instead of a list of every frame number.
+# A frame set is built in one pass over a folder listing with a single precompiled pattern
+# and knows its first and last frame, the missing frames and any frames that exist twice
+# with different padding (e.g. name.1001.exr and name.001001.exr).
+
+import re
+import bisect
+
+FRAME_FILE_RE = re.compile(r'^(?P<head>.*?)(?P<frame>\d+)(?P<tail>\.[A-Za-z0-9]+)$')
+
+
+def ranges_from_frames(frames):
+    """Collapse sorted, unique frame numbers into [(start, end), ...] ranges."""
+    ranges = []
+    for frame in frames:
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return [tuple(r) for r in ranges]
+
+
+class FrameSet(object):
+    """Frames of one image sequence, stored as sorted, non-overlapping (start, end) ranges."""
+    __slots__ = ('ranges', 'head', 'tail', 'padding', 'duplicates', '_count')
+
+    def __init__(self, ranges=(), head='', tail='', padding=0, duplicates=()):
+        self.ranges = list(ranges)
+        self.head = head
+        self.tail = tail
+        self.padding = padding
+        self.duplicates = sorted(duplicates)
+        self._count = sum(end - start + 1 for start, end in self.ranges)
+
+    @classmethod
+    def from_frames(cls, frames, **kwargs):
+        return cls(ranges_from_frames(sorted(set(frames))), **kwargs)
+
+    @classmethod
+    def from_string(cls, text, **kwargs):
+        """Parse the '1001-1050,1052,1054-1100' form produced by str()."""
+        ranges = []
+        for part in text.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            start, _, end = part.partition('-')
+            ranges.append((int(start), int(end or start)))
+        return cls(ranges, **kwargs)
+
+    @property
+    def first(self):
+        return self.ranges[0][0] if self.ranges else None
+
+    @property
+    def last(self):
+        return self.ranges[-1][1] if self.ranges else None
+
+    @property
+    def pattern(self):
+        """File name with the frame number replaced by Nuke's '#' padding."""
+        return f"{self.head}{'#' * self.padding}{self.tail}"
+
+    def frame_range(self):
+        return self.first, self.last
+
+    def file_name(self, frame):
+        return f"{self.head}{frame:0{self.padding}d}{self.tail}"
+
+    def missing_ranges(self):
+        """Holes between first and last frame as (start, end) ranges."""
+        return [(self.ranges[i][1] + 1, self.ranges[i + 1][0] - 1) for i in range(len(self.ranges) - 1)]
+
+    def missing(self):
+        return [frame for start, end in self.missing_ranges() for frame in range(start, end + 1)]
+
+    def has_gaps(self):
+        return len(self.ranges) > 1
+
+    def covers(self, first, last):
+        """True when every frame from first to last exists."""
+        return any(start <= first and last <= end for start, end in self.ranges)
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return bool(self.ranges)
+
+    def __iter__(self):
+        for start, end in self.ranges:
+            for frame in range(start, end + 1):
+                yield frame
+
+    def __contains__(self, frame):
+        index = bisect.bisect_right(self.ranges, (frame, float('inf'))) - 1
+        return index >= 0 and self.ranges[index][0] <= frame <= self.ranges[index][1]
+
+    def __eq__(self, other):
+        return isinstance(other, FrameSet) and self.ranges == other.ranges
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __str__(self):
+        return ','.join(str(start) if start == end else f"{start}-{end}" for start, end in self.ranges)
+
+    def __repr__(self):
+        return f"FrameSet('{self.pattern}', '{self}')"
+
+
+def format_ranges(ranges):
+    return ', '.join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+
+def scan_sequences(names, extensions=None):
+    """
+    Group file names into image sequences in one pass and return a list of FrameSets,
+    largest sequence first. Only names ending in one of the extensions are considered.
+    """
+    sequences = {}
+    for name in names:
+        if extensions and not name.lower().endswith(extensions):
+            continue
+        match = FRAME_FILE_RE.match(name)
+        if not match:
+            continue
+        digits = match.group('frame')
+        key = (match.group('head'), match.group('tail'))
+        sequences.setdefault(key, []).append((int(digits), len(digits)))
+
+    frame_sets = []
+    for (head, tail), entries in sequences.items():
+        paddings = {}
+        seen = {}
+        duplicates = set()
+        for frame, width in entries:
+            paddings[width] = paddings.get(width, 0) + 1
+            if frame in seen and seen[frame] != width:
+                duplicates.add(frame)
+            seen[frame] = width
+        padding = max(paddings, key=lambda width: (paddings[width], width))
+        frame_sets.append(FrameSet(ranges_from_frames(sorted(seen)), head=head, tail=tail,
+                                   padding=padding, duplicates=duplicates))
+    frame_sets.sort(key=lambda frame_set: (-len(frame_set), frame_set.head))
+    return frame_sets
+
+
+def find_sequence(names, head, extensions=None):
+    """Return the FrameSet whose file names start with head, or None."""
+    for frame_set in scan_sequences(names, extensions):
+        if frame_set.head == head:
+            return frame_set
+    return None
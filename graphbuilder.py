@@ -0,0 +1,297 @@
+# graphbuilder.py
+#
+# Bulk node-graph construction.
+# Nodes, knob values, connections and positions are collected in Python and the whole graph is
+# created with a single nuke.nodePaste of a generated .nk snippet, instead of one bridge call and
+# DAG update per node and per knob. A GraphBuilder stands in for nuke.nodes and the nodes it
+# returns answer node['knob'].setValue(), setInput(), setXYpos(), xpos(), name() and so on like
+# real nodes, so tool code reads the same either way:
+#
+#   graph = graphbuilder.GraphBuilder()
+#   read = graph.Read(name="Read_SH0010", file=path)
+#   text = graph.Text2(inputs=[read], message="SH0010")
+#   text.setXYpos(read.xpos(), read.ypos() + 107)
+#   graph.apply()  # one paste, read.node / text.node are the real nodes afterwards
+
+import os
+import re
+import tempfile
+
+try:
+    import nuke
+except ImportError:
+    nuke = None
+
+# User variables
+NODE_SIZE = (80, 18)  # Estimated screen size of a node before it exists
+DOT_SIZE = (12, 12)
+POSTAGE_STAMP_SIZE = (80, 78)
+POSTAGE_STAMP_CLASSES = ('Read', 'Constant', 'PostageStamp', 'CheckerBoard2', 'ColorBars')
+
+PLAIN_VALUE_RE = re.compile(r'^[A-Za-z0-9_.:/#%+\-]+$')
+
+
+class Expression(object):
+    """Knob expression, written as {{expr}} in the snippet."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+def format_value(value):
+    """Knob value in .nk syntax."""
+    if isinstance(value, Expression):
+        return f"{{{{{value.text}}}}}"
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        # Colors above 0x7fffffff are written the way Nuke writes them
+        return hex(value) if value > 0x7fffffff else str(value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return '{' + ' '.join(format_value(item) for item in value) + '}'
+    text = str(value)
+    if text and PLAIN_VALUE_RE.match(text):
+        return text
+    return quote(text)
+
+
+def quote(text):
+    """Double-quoted TCL string with everything escaped that would be evaluated on paste."""
+    for character, escaped in (('\\', '\\\\'), ('"', '\\"'), ('[', '\\['), (']', '\\]'),
+                               ('$', '\\$'), ('\n', '\\n')):
+        text = text.replace(character, escaped)
+    return f'"{text}"'
+
+
+class _Knob(object):
+    """Stand-in for a knob of a node that does not exist yet."""
+
+    def __init__(self, graph_node, name):
+        self._graph_node = graph_node
+        self._name = name
+
+    def setValue(self, value):
+        if self._graph_node.node is not None:
+            self._graph_node.node[self._name].setValue(value)
+        self._graph_node.knobs[self._name] = value
+
+    def setExpression(self, expression):
+        self.setValue(Expression(expression))
+
+    def value(self):
+        if self._graph_node.node is not None:
+            return self._graph_node.node[self._name].value()
+        return self._graph_node.knobs.get(self._name)
+
+    getValue = value
+
+
+class GraphNode(object):
+    def __init__(self, graph, node_class, name):
+        self.graph = graph
+        self.node_class = node_class
+        self._name = name
+        self.knobs = {}
+        self.live_knobs = {}  # Set with knob.setValue() after the paste
+        self.user_knobs = []  # addUserKnob lines
+        self.inputs = []
+        self.x = 0
+        self.y = 0
+        self.node = None  # The real node once the graph was applied
+
+    def __getitem__(self, knob_name):
+        return _Knob(self, knob_name)
+
+    def Class(self):
+        return self.node_class
+
+    def name(self):
+        return self._name
+
+    def setInput(self, index, node):
+        while len(self.inputs) <= index:
+            self.inputs.append(None)
+        self.inputs[index] = node
+        if self.node is not None:
+            return self.node.setInput(index, real_node(node))
+        return True
+
+    def input(self, index):
+        return self.inputs[index] if index < len(self.inputs) else None
+
+    def setXYpos(self, x, y):
+        self.x, self.y = int(x), int(y)
+        if self.node is not None:
+            self.node.setXYpos(self.x, self.y)
+
+    def xpos(self):
+        return self.x
+
+    def ypos(self):
+        return self.y
+
+    def _size(self):
+        if self.node_class == 'Dot':
+            return DOT_SIZE
+        if self.knobs.get('postage_stamp', self.node_class in POSTAGE_STAMP_CLASSES):
+            return POSTAGE_STAMP_SIZE
+        return NODE_SIZE
+
+    def screenWidth(self):
+        return self._size()[0]
+
+    def screenHeight(self):
+        return self._size()[1]
+
+    def set_live(self, knob_name, value):
+        """Set a knob through the real knob after the paste, for knobs whose side effects matter (e.g. Shuffle2 in1)."""
+        self.live_knobs[knob_name] = value
+
+    def add_user_knob(self, definition, value=None):
+        """Add a user knob, definition is the body of an addUserKnob line, e.g. '7 resMult l "Resolution Multiplier" R 0.1 2'."""
+        self.user_knobs.append((definition, value))
+
+    def __repr__(self):
+        return f"GraphNode({self.node_class} '{self._name}')"
+
+
+def _clear_selection():
+    nuke.selectAll()
+    nuke.invertSelection()
+
+
+def real_node(node):
+    """The Nuke node behind a GraphNode, or the node itself."""
+    return node.node if isinstance(node, GraphNode) else node
+
+
+class GraphBuilder(object):
+    def __init__(self):
+        self.nodes = []
+        self._names = set()
+        self._counters = {}
+
+    def __getattr__(self, node_class):
+        # graph.Read(...) like nuke.nodes.Read(...)
+        if node_class[:1].isupper():
+            return lambda **knobs: self.add(node_class, **knobs)
+        raise AttributeError(node_class)
+
+    def _name_taken(self, name):
+        return name in self._names or (nuke is not None and nuke.toNode(name) is not None)
+
+    def _unique_name(self, node_class, requested):
+        if requested and not self._name_taken(requested):
+            return requested
+        # Like Nuke: Merge2 nodes are called Merge1, Merge2, ...
+        prefix = requested or node_class.rstrip('0123456789')
+        index = self._counters.get(prefix, 0) + 1
+        while self._name_taken(f"{prefix}{index}"):
+            index += 1
+        self._counters[prefix] = index
+        return f"{prefix}{index}"
+
+    def add(self, node_class, name=None, inputs=(), xpos=None, ypos=None, **knobs):
+        graph_node = GraphNode(self, node_class, self._unique_name(node_class, name))
+        self._names.add(graph_node.name())
+        graph_node.knobs.update(knobs)
+        for index, input_node in enumerate(inputs):
+            graph_node.setInput(index, input_node)
+        if xpos is not None or ypos is not None:
+            graph_node.setXYpos(xpos or 0, ypos or 0)
+        self.nodes.append(graph_node)
+        return graph_node
+
+    def _ordered(self):
+        """Nodes not created yet, with their inputs first, the snippet can only push nodes it already created."""
+        ordered = []
+        done = set()
+        for root in self.nodes:
+            if root.node is not None or root in done:
+                continue
+            # Iterative depth-first walk, long Dot chains would hit the recursion limit
+            stack = [(root, False)]
+            visiting = set()
+            while stack:
+                graph_node, inputs_done = stack.pop()
+                if graph_node in done:
+                    continue
+                if inputs_done:
+                    visiting.discard(graph_node)
+                    done.add(graph_node)
+                    ordered.append(graph_node)
+                    continue
+                if graph_node in visiting:
+                    raise ValueError(f"Cycle in graph at {graph_node.name()}")
+                visiting.add(graph_node)
+                stack.append((graph_node, True))
+                for input_node in reversed(graph_node.inputs):
+                    if isinstance(input_node, GraphNode) and input_node.graph is self and input_node.node is None \
+                            and input_node not in done:
+                        stack.append((input_node, False))
+        return ordered
+
+    def to_nk(self):
+        """The .nk snippet creating every node of the graph."""
+        lines = []
+        variables = {}
+        for graph_node in self._ordered():
+            # The top of the stack is input 0, so the last input is pushed first
+            for input_node in reversed(graph_node.inputs):
+                if isinstance(input_node, GraphNode) and input_node in variables:
+                    lines.append(f"push ${variables[input_node]}")
+                else:
+                    # Empty inputs stay empty, existing nodes are connected after the paste
+                    lines.append("push 0")
+            lines.append(f"{graph_node.node_class} {{")
+            lines.append(f" inputs {len(graph_node.inputs)}")
+            for knob_name, value in graph_node.knobs.items():
+                lines.append(f" {knob_name} {format_value(value)}")
+            for definition, _ in graph_node.user_knobs:
+                lines.append(f" addUserKnob {{{definition}}}")
+            for definition, value in graph_node.user_knobs:
+                if value is not None:
+                    lines.append(f" {definition.split()[1]} {format_value(value)}")
+            lines.append(f" name {graph_node.name()}")
+            lines.append(f" xpos {graph_node.x}")
+            lines.append(f" ypos {graph_node.y}")
+            lines.append("}")
+            variables[graph_node] = f"N{len(variables):x}"
+            lines.append(f"set {variables[graph_node]} [stack 0]")
+        return "\n".join(lines) + "\n"
+
+    def apply(self):
+        """Create the graph with one nodePaste. Returns the real nodes in the order they were added."""
+        pending = [graph_node for graph_node in self.nodes if graph_node.node is None]
+        if not pending:
+            return [graph_node.node for graph_node in self.nodes]
+
+        handle, path = tempfile.mkstemp(suffix='.nk', prefix='pfx_graph_')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                f.write(self.to_nk())
+            # Pasting connects to the selection, so nothing may be selected
+            _clear_selection()
+            nuke.nodePaste(path)
+            pasted = {node.name(): node for node in nuke.selectedNodes()}
+            _clear_selection()
+        finally:
+            os.remove(path)
+
+        for graph_node in pending:
+            graph_node.node = pasted.get(graph_node.name()) or nuke.toNode(graph_node.name())
+            if graph_node.node is None:
+                print(f"Graph builder could not find {graph_node.name()} after pasting")
+        pasted_nodes = set(pending)
+        for graph_node in pending:
+            if graph_node.node is None:
+                continue
+            for index, input_node in enumerate(graph_node.inputs):
+                if input_node is None or (isinstance(input_node, GraphNode) and input_node in pasted_nodes):
+                    continue
+                graph_node.node.setInput(index, real_node(input_node))
+            for knob_name, value in graph_node.live_knobs.items():
+                graph_node.node[knob_name].setValue(value)
+        return [graph_node.node for graph_node in self.nodes]
@@ -1,5 +1,10 @@
 
 import nuke
+import storageroots
+
+# Scripts saved on Windows reference drive letters, map them to the Linux mounts
+if storageroots.is_linux():
+    nuke.addFilenameFilter(storageroots.filename_filter)
 
 
 print("Snazim se co nejrychleji")
@@ -0,0 +1,156 @@
+# loadplan.py
+#
+# Plan, diff and apply for loaders that are run more than once on the same script.
+# A loader describes the Reads it wants as PlannedReads. They are compared against an index of
+# the Reads already in the script, keyed by file pattern with version numbers and frame padding
+# normalised, so a second run only updates the Reads whose version or frame range moved on,
+# creates Reads for new shots or layers and leaves everything else alone. The index is built
+# with a single pass over the Read nodes and only holds the Reads PFX created, marked with a
+# hidden MARKER_KNOB, so an artist's own Read on the same render is never taken over.
+
+import os
+import re
+
+try:
+    import nuke
+except ImportError:
+    nuke = None
+
+import graphbuilder
+import renderwatcher
+
+VERSION_RE = re.compile(r'(?<![A-Za-z0-9])v\d+(?!\d)', re.IGNORECASE)
+PADDING_RE = re.compile(r'%0?\d*d|#+|\$F\d*')
+MARKER_KNOB = "pfx_loaded"  # Hidden knob on every Read a PFX loader created
+
+
+def read_key(path):
+    """File pattern with versions and padding normalised: .../v003/x_v003.%06d.exr -> .../v#/x_v#.#.exr"""
+    key = VERSION_RE.sub('v#', PADDING_RE.sub('#', path.replace('\\', '/')))
+    return key.lower() if os.name == 'nt' else key
+
+
+def node_name(*parts):
+    """Deterministic node name, e.g. node_name('Read', 'SQ0010', 'SH0020', 'comp') -> 'Read_SQ0010_SH0020_comp'."""
+    return re.sub(r'[^A-Za-z0-9_]', '_', '_'.join(str(part) for part in parts if part))
+
+
+def mark(node):
+    """Stamp a Read as created by a PFX loader. Takes real nodes and graphbuilder nodes."""
+    if isinstance(node, graphbuilder.GraphNode):
+        node.add_user_knob(f"1 {MARKER_KNOB} +INVISIBLE")
+    elif not is_owned(node):
+        knob = nuke.String_Knob(MARKER_KNOB)
+        knob.setFlag(nuke.INVISIBLE)
+        node.addKnob(knob)
+    return node
+
+
+def is_owned(node):
+    return MARKER_KNOB in node.knobs()
+
+
+class PlannedRead(object):
+    """
+    A Read a loader wants. values are the knobs a re-run keeps in sync (file, first, last, ...),
+    knobs are only set when the Read is created, everything else on an existing Read belongs to the
+    artist. info is free for the loader (shot, layer, ...).
+    """
+
+    def __init__(self, name, values, knobs=None, info=None):
+        self.name = name
+        self.values = values
+        self.knobs = knobs or {}
+        self.info = info or {}
+
+    @property
+    def key(self):
+        return read_key(self.values['file'])
+
+    def create_knobs(self):
+        knobs = dict(self.knobs)
+        knobs.update(self.values)
+        return knobs
+
+
+class ReadIndex(object):
+    """Existing PFX Reads keyed by read_key of their file knob."""
+
+    def __init__(self, nodes=None):
+        self.by_key = {}
+        self.unmarked = {}  # key -> Reads without the marker, ours only when loaded before the marker existed
+        for node in nuke.allNodes('Read') if nodes is None else nodes:
+            key = read_key(node['file'].value())
+            if is_owned(node):
+                self.by_key.setdefault(key, node)
+            else:
+                self.unmarked.setdefault(key, []).append(node)
+
+    def find(self, planned):
+        node = self.by_key.get(planned.key)
+        if node is None:
+            # Reads loaded before the marker are recognised by their deterministic name
+            node = next((other for other in self.unmarked.get(planned.key, ()) if other.name() == planned.name), None)
+        return node
+
+    def add(self, planned, node):
+        self.by_key[planned.key] = node
+
+
+class LoadDiff(object):
+    def __init__(self):
+        self.new = []  # PlannedReads without a Read in the script
+        self.changed = []  # (PlannedRead, node, {knob: value}) for Reads on an older version or range
+        self.unchanged = []  # (PlannedRead, node)
+
+    @property
+    def existing(self):
+        return [(planned, node) for planned, node, _ in self.changed] + self.unchanged
+
+    def summary(self):
+        parts = []
+        if self.new:
+            parts.append(f"{len(self.new)} new")
+        if self.changed:
+            parts.append(f"{len(self.changed)} updated")
+        if self.unchanged:
+            parts.append(f"{len(self.unchanged)} up to date")
+        return ", ".join(parts)
+
+
+def _differences(node, values):
+    changes = {}
+    knobs = node.knobs()
+    for knob_name, value in values.items():
+        knob = knobs.get(knob_name)
+        if knob is None:
+            continue
+        current = knob.value()
+        if knob_name == 'file':
+            current = current.replace('\\', '/')
+        if current != value:
+            changes[knob_name] = value
+    return changes
+
+
+def diff(planned_reads, index):
+    """Compare planned Reads with the index. Nothing in the script is touched."""
+    load_diff = LoadDiff()
+    for planned in planned_reads:
+        node = index.find(planned)
+        if node is None:
+            load_diff.new.append(planned)
+            continue
+        changes = _differences(node, planned.values)
+        if changes:
+            load_diff.changed.append((planned, node, changes))
+        else:
+            load_diff.unchanged.append((planned, node))
+    return load_diff
+
+
+def apply_changes(load_diff):
+    """Push the changed values into the existing Reads and mark them as ours. Must run on the main thread."""
+    for _, node in load_diff.existing:
+        mark(graphbuilder.real_node(node))
+    renderwatcher.apply_updates({node.name(): changes for _, node, changes in load_diff.changed})
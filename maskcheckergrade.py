@@ -1,7 +1,46 @@
 import nuke
-
-def create_grade_node(name, inputs):
-    grade = nuke.nodes.Grade(name=name, inputs=inputs)
+import exrheader
+import graphbuilder
+import bulkedit
+import nodelayout
+import aovstats
+
+# User variables
+BACKDROP_PADDING = (50, 120, 100, 50)  # left, top, right, bottom
+CROP_TO_MASKS = True  # Crop each branch to its mask's bbox in a few sampled frames and skip empty masks (needs NumPy)
+CROP_PADDING = 20
+
+def find_mask_channels(all_channels):
+    return [chan for chan in all_channels if chan.endswith('.mask')]
+
+def plan_masks(node, mask_channels):
+    """
+    (channels to build, {channel: (coverage, bbox)}, empty channels) from the sampled frames of a
+    Read. Channels that could not be measured are built uncropped.
+    """
+    if not aovstats.is_available():
+        print("NumPy is not available, mask branches are not cropped.")
+        return mask_channels, {}, []
+    coverage = aovstats.mask_coverage(aovstats.read_sample_paths(node), mask_channels)
+    stats = {channel: aovstats.merged_coverage(frames) for channel, frames in coverage.items()}
+    empty = [channel for channel in mask_channels if channel in stats and stats[channel][1] is None]
+    return [channel for channel in mask_channels if channel not in empty], stats, empty
+
+def create_mask_crop(name, shuffle_node, stats, nodes):
+    """Crop after a mask Shuffle so the nodes below only work inside the mask, tags the Shuffle with its coverage."""
+    coverage, box = stats
+    shuffle_node['label'].setValue(f"coverage {coverage:.1%}")
+    return nodes.Crop(
+        name=name,
+        inputs=[shuffle_node],
+        box=[box[0] - CROP_PADDING, box[1] - CROP_PADDING, box[2] + CROP_PADDING, box[3] + CROP_PADDING],
+        reformat=False,
+        crop=True
+    )
+
+def create_grade_node(name, inputs, nodes=None):
+    nodes = nodes or nuke.nodes
+    grade = nodes.Grade(name=name, inputs=inputs)
     grade['white'].setValue([2.5, 1, 1, 1])
     grade['white_panelDropped'].setValue(True)
     return grade
@@ -13,12 +52,18 @@ def mask_channel_splitter_with_grade_series():
         nuke.message("Error: No node selected. Please select a node with mask channels and run the script again.")
         return
 
-    all_channels = node.channels()
-    mask_channels = [chan for chan in all_channels if chan.endswith('.mask')]
+    mask_channels = find_mask_channels(exrheader.channels_for_node(node))
     if not mask_channels:
         nuke.message("No mask channels found in the selected node.")
         return
 
+    mask_stats, empty_channels = {}, []
+    if CROP_TO_MASKS:
+        mask_channels, mask_stats, empty_channels = plan_masks(node, mask_channels)
+        if not mask_channels:
+            nuke.message("All mask channels are empty in the sampled frames.")
+            return
+
     offset_y = 350
     offset_x = 34
     dot_nodes = []
@@ -27,13 +72,15 @@ def mask_channel_splitter_with_grade_series():
     previous_node = node
 
     all_created_nodes = []
+    # Everything is collected first and created with one paste at the end
+    graph = graphbuilder.GraphBuilder()
 
     for channel in mask_channels:
-        dot_node = nuke.nodes.Dot()
+        dot_node = graph.Dot()
         dot_nodes.append(dot_node)
         all_created_nodes.append(dot_node)
 
-        shuffle_node = nuke.nodes.Shuffle(
+        shuffle_node = graph.Shuffle(
             name=f"{channel.split('.')[0]}_mask",
             inputs=[dot_node],
             postage_stamp=True,
@@ -44,9 +91,15 @@ def mask_channel_splitter_with_grade_series():
         shuffle_nodes.append(shuffle_node)
         all_created_nodes.append(shuffle_node)
 
+        mask_node = shuffle_node
+        if channel in mask_stats:
+            mask_node = create_mask_crop(f"Crop_{channel.split('.')[0]}", shuffle_node, mask_stats[channel], graph)
+            all_created_nodes.append(mask_node)
+
         grade_node = create_grade_node(
             name=f"Grade_{channel.split('.')[0]}",
-            inputs=[previous_node, shuffle_node]
+            inputs=[previous_node, mask_node],
+            nodes=graph
         )
         grade_nodes.append(grade_node)
         all_created_nodes.append(grade_node)
@@ -55,7 +108,8 @@ def mask_channel_splitter_with_grade_series():
         ypos = node.ypos() + offset_y
         dot_node.setXYpos(xpos, ypos)
         shuffle_node.setXYpos(xpos - 34, dot_node.ypos() + 50)
-        grade_node.setXYpos(xpos - 34, shuffle_node.ypos() + 100)
+        mask_node.setXYpos(xpos - 34, shuffle_node.ypos() + 100)
+        grade_node.setXYpos(xpos - 34, mask_node.ypos() + 100)
 
         previous_node = grade_node
         offset_x += 200
@@ -67,7 +121,7 @@ def mask_channel_splitter_with_grade_series():
             dot.setInput(0, dot_nodes[i - 1])
 
     if grade_nodes:
-        output_stamp = nuke.nodes.PostageStamp(name="Output", label="Output", postage_stamp=True)
+        output_stamp = graph.PostageStamp(name="Output", label="Output", postage_stamp=True)
         output_stamp.setInput(0, grade_nodes[-1])
         output_stamp_xpos = grade_nodes[-1].xpos() + grade_nodes[-1].screenWidth()/2 - output_stamp.screenWidth()/2
         output_stamp_ypos = grade_nodes[-1].ypos() + grade_nodes[-1].screenHeight() + 100
@@ -76,23 +130,26 @@ def mask_channel_splitter_with_grade_series():
         all_created_nodes.append(output_stamp)
 
     if all_created_nodes:
-        bdX = min(node.xpos() for node in all_created_nodes) - 50
-        bdY = min(node.ypos() for node in all_created_nodes) - 120
-        bdW = max(node.xpos() + node.screenWidth() for node in all_created_nodes) - bdX + 100
-        bdH = max(node.ypos() + node.screenHeight() for node in all_created_nodes) - bdY + 50
-
-        backdrop = nuke.nodes.BackdropNode(
-            xpos=bdX,
-            bdwidth=bdW,
-            ypos=bdY,
-            bdheight=bdH,
-            tile_color=0x7171C600,
-            label='<center>MaskChecker'
+        # Move the whole setup down if existing nodes are in the way
+        geometry = nodelayout.Geometry(all_created_nodes)
+        bdX, bdY, bdW, bdH = nodelayout.backdrop_rect(geometry.bounds(), BACKDROP_PADDING)
+        free_x, free_y = nodelayout.find_free_origin(bdX, bdY, bdW, bdH, nodelayout.script_grid(exclude=[node]))
+        geometry.move(free_x - bdX, free_y - bdY)
+
+        backdrop = nodelayout.backdrop(
+            geometry,
+            label='<center>MaskChecker',
+            color=0x7171C600,
+            padding=BACKDROP_PADDING,
+            font_size=42,
+            nodes_api=graph,
+            note_font='Verdana'
         )
-        backdrop['note_font_size'].setValue(42)
-        backdrop['note_font'].setValue('Verdana')
 
-    nuke.message(f"Created {len(mask_channels)} MaskChecker Created!")
+    with bulkedit.bulk_edit("Mask Checker Grade"):
+        graph.apply()
+    skipped = f"\nSkipped {len(empty_channels)} empty masks: {', '.join(empty_channels)}" if empty_channels else ""
+    nuke.message(f"Created {len(mask_channels)} MaskChecker Created!{skipped}")
 
 if __name__ == "__main__":
     mask_channel_splitter_with_grade_series()
@@ -1,4 +1,16 @@
 import nuke
+import exrheader
+import graphbuilder
+import bulkedit
+import nodelayout
+from maskcheckergrade import plan_masks, create_mask_crop
+
+# User variables
+BACKDROP_PADDING = (50, 50, 100, 100)  # left, top, right, bottom
+CROP_TO_MASKS = True  # Crop each branch to its mask's bbox in a few sampled frames and skip empty masks (needs NumPy)
+
+def find_mask_channels(all_channels):
+    return [chan for chan in all_channels if chan.endswith('.mask')]
 
 def mask_channel_splitter_with_individual_premults_and_hero_dot():
     try:
@@ -7,24 +19,32 @@ def mask_channel_splitter_with_individual_premults_and_hero_dot():
         nuke.message("Error: No node selected. Please select a node with mask channels and run the script again.")
         return
 
-    all_channels = node.channels()
-    mask_channels = [chan for chan in all_channels if chan.endswith('.mask')]
+    mask_channels = find_mask_channels(exrheader.channels_for_node(node))
     if not mask_channels:
         nuke.message("No mask channels found in the selected node.")
         return
 
+    mask_stats, empty_channels = {}, []
+    if CROP_TO_MASKS:
+        mask_channels, mask_stats, empty_channels = plan_masks(node, mask_channels)
+        if not mask_channels:
+            nuke.message("All mask channels are empty in the sampled frames.")
+            return
+
     offset_y = 250
     offset_x = 0
     all_created_nodes = []
+    # Everything is collected first and created with one paste at the end
+    graph = graphbuilder.GraphBuilder()
 
-    hero_dot = nuke.nodes.Dot(inputs=[node])
+    hero_dot = graph.Dot(inputs=[node])
     hero_dot.setXYpos(node.xpos() + 34, node.ypos() + 200)
     hero_dot['label'].setValue("Beauty")
     hero_dot['note_font_size'].setValue(20)
     all_created_nodes.append(hero_dot)
 
     for channel in mask_channels:
-        shuffle_node = nuke.nodes.Shuffle(
+        shuffle_node = graph.Shuffle(
             name=f"{channel.split('.')[0]}_mask",
             inputs=[hero_dot],
             postage_stamp=True,
@@ -34,37 +54,46 @@ def mask_channel_splitter_with_individual_premults_and_hero_dot():
         shuffle_node['out'].setValue('alpha')
         all_created_nodes.append(shuffle_node)
 
-        premult_node = nuke.nodes.Premult(
+        mask_node = shuffle_node
+        if channel in mask_stats:
+            mask_node = create_mask_crop(f"Crop_{channel.split('.')[0]}", shuffle_node, mask_stats[channel], graph)
+            all_created_nodes.append(mask_node)
+
+        premult_node = graph.Premult(
             name=f"Premult_{channel.split('.')[0]}",
-            inputs=[shuffle_node, hero_dot]
+            inputs=[mask_node, hero_dot]
         )
         all_created_nodes.append(premult_node)
 
         xpos = hero_dot.xpos() + offset_x
         ypos = hero_dot.ypos() + offset_y
         shuffle_node.setXYpos(xpos, ypos)
-        premult_node.setXYpos(xpos, ypos + 100)
+        mask_node.setXYpos(xpos, ypos + 100)
+        premult_node.setXYpos(xpos, mask_node.ypos() + 100)
 
         offset_x += 200
 
     if all_created_nodes:
-        bdX = min(node.xpos() for node in all_created_nodes) - 50
-        bdY = min(node.ypos() for node in all_created_nodes) - 50
-        bdW = max(node.xpos() + node.screenWidth() for node in all_created_nodes) - bdX + 100
-        bdH = max(node.ypos() + node.screenHeight() for node in all_created_nodes) - bdY + 100
-
-        backdrop = nuke.nodes.BackdropNode(
-            xpos=bdX,
-            bdwidth=bdW,
-            ypos=bdY,
-            bdheight=bdH,
-            tile_color=0x7171C600,
-            label='<center>MaskChecker'
+        # Move the whole setup down if existing nodes are in the way
+        geometry = nodelayout.Geometry(all_created_nodes)
+        bdX, bdY, bdW, bdH = nodelayout.backdrop_rect(geometry.bounds(), BACKDROP_PADDING)
+        free_x, free_y = nodelayout.find_free_origin(bdX, bdY, bdW, bdH, nodelayout.script_grid(exclude=[node]))
+        geometry.move(free_x - bdX, free_y - bdY)
+
+        backdrop = nodelayout.backdrop(
+            geometry,
+            label='<center>MaskChecker',
+            color=0x7171C600,
+            padding=BACKDROP_PADDING,
+            font_size=42,
+            nodes_api=graph,
+            note_font='Verdana'
         )
-        backdrop['note_font_size'].setValue(42)
-        backdrop['note_font'].setValue('Verdana')
 
-    nuke.message(f"Created a hero Dot for beauty and {len(mask_channels)} individual Shuffle and Premult nodes for mask channels, wrapped in a MaskChecker backdrop positioned 100px lower.")
+    with bulkedit.bulk_edit("Mask Checker Premult"):
+        graph.apply()
+    skipped = f"\nSkipped {len(empty_channels)} empty masks: {', '.join(empty_channels)}" if empty_channels else ""
+    nuke.message(f"Created a hero Dot for beauty and {len(mask_channels)} individual Shuffle and Premult nodes for mask channels, wrapped in a MaskChecker backdrop positioned 100px lower.{skipped}")
 
 if __name__ == "__main__":
     mask_channel_splitter_with_individual_premults_and_hero_dot()
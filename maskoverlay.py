@@ -0,0 +1,104 @@
+import nuke
+import exrheader
+import graphbuilder
+import bulkedit
+import nodelayout
+from maskcheckergrade import find_mask_channels
+
+# User variables
+BACKDROP_PADDING = (50, 120, 100, 50)  # left, top, right, bottom
+MASK_THRESHOLD = 0.5  # Coverage above which a pixel counts as inside a mask
+OVERLAY_MIX = 0.6
+
+# Hue offsets spread by the golden ratio, so neighbouring mask IDs get clearly different colours
+ID_COLOR = "(id > 0) * (0.3 + 0.7 * fmod(id * {step} + {offset}, 1))"
+ID_COLOR_STEPS = ((0.618034, 0.0), (0.381966, 0.33), (0.754878, 0.66))
+
+
+def id_expression(mask_channels, threshold=MASK_THRESHOLD):
+    """Index (1-based) of the last mask covering a pixel, 0 outside all masks."""
+    terms = [f"({channel} > {threshold}) * {i}" for i, channel in enumerate(mask_channels, 1)]
+    return f"max(0, {', '.join(terms)})"
+
+
+def picked_expression(mask_channels):
+    """Coverage of the mask chosen in the 'show' pulldown, 0 while it is on 'all'."""
+    terms = [f"(show == {i}) * {channel}" for i, channel in enumerate(mask_channels, 1)]
+    return f"show == 0 ? 0 : max(0, {', '.join(terms)})"
+
+
+def mask_id_overlay():
+    """
+    One Expression node showing every mask as a false-colour ID over the beauty, with a pulldown
+    picking a single mask. The setup has the same four nodes for 5 masks or 500.
+    """
+    try:
+        node = nuke.selectedNode()
+    except ValueError:
+        nuke.message("Error: No node selected. Please select a node with mask channels and run the script again.")
+        return
+
+    mask_channels = find_mask_channels(exrheader.channels_for_node(node))
+    if not mask_channels:
+        nuke.message("No mask channels found in the selected node.")
+        return
+
+    mask_names = [channel.split('.')[0] for channel in mask_channels]
+    graph = graphbuilder.GraphBuilder()
+
+    beauty_dot = graph.Dot(inputs=[node], label="Beauty", note_font_size=20)
+    beauty_dot.setXYpos(node.xpos() + 34, node.ypos() + 200)
+
+    colors = [ID_COLOR.format(step=step, offset=offset) for step, offset in ID_COLOR_STEPS]
+    mask_id = graph.Expression(
+        name="MaskID",
+        inputs=[beauty_dot],
+        temp_name0="id",
+        temp_expr0=id_expression(mask_channels),
+        temp_name1="sel",
+        temp_expr1=picked_expression(mask_channels),
+        expr0=f"show == 0 ? {colors[0]} : sel",
+        expr1=f"show == 0 ? {colors[1]} : sel",
+        expr2=f"show == 0 ? {colors[2]} : sel",
+        channel3="alpha",
+        expr3="show == 0 ? id > 0 : sel",
+        label="[value show]",
+        postage_stamp=True,
+    )
+    mask_id.add_user_knob(f"4 show l Show M {{all {' '.join(mask_names)}}}")
+    mask_id.setXYpos(beauty_dot.xpos() + 166, beauty_dot.ypos() + 100)
+
+    overlay = graph.Merge2(
+        name="MaskOverlay",
+        inputs=[beauty_dot, mask_id],
+        operation="over",
+        mix=OVERLAY_MIX,
+        label="mix [value mix]",
+    )
+    overlay.setXYpos(beauty_dot.xpos() - 34, mask_id.ypos() + 200)
+
+    output_stamp = graph.PostageStamp(name="Output", label="Output", postage_stamp=True, inputs=[overlay], note_font_size=20)
+    output_stamp.setXYpos(overlay.xpos(), overlay.ypos() + 100)
+
+    # Move the whole setup down if existing nodes are in the way
+    geometry = nodelayout.Geometry([beauty_dot, mask_id, overlay, output_stamp])
+    bdX, bdY, bdW, bdH = nodelayout.backdrop_rect(geometry.bounds(), BACKDROP_PADDING)
+    free_x, free_y = nodelayout.find_free_origin(bdX, bdY, bdW, bdH, nodelayout.script_grid(exclude=[node]))
+    geometry.move(free_x - bdX, free_y - bdY)
+
+    nodelayout.backdrop(
+        geometry,
+        label='<center>MaskChecker ID',
+        color=0x7171C600,
+        padding=BACKDROP_PADDING,
+        font_size=42,
+        nodes_api=graph,
+        note_font='Verdana'
+    )
+
+    with bulkedit.bulk_edit("Mask Checker ID Overlay"):
+        graph.apply()
+    nuke.message(f"Created a MaskID overlay for {len(mask_channels)} masks, pick a single mask with 'Show' on MaskID.")
+
+if __name__ == "__main__":
+    mask_id_overlay()
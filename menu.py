@@ -4,12 +4,15 @@ import nuke
 import projectsetup
 import maskcheckergrade
 import maskcheckerpremult
+import maskoverlay
 import sequenceloader
 import AppenderLoader
 import LoadLightningRender
 import LightShuffler
 import ReduceNoiseBackdrop
 import NewDenoiseComp
+import renderwatcher
+import consistency
 
 
 import nukescripts
@@ -27,10 +30,15 @@ m.addCommand("Shuffle LightGroup renders",LightShuffler.split_light_channels, ic
 
 m.addCommand("Mask Checker Grade", maskcheckergrade.mask_channel_splitter_with_grade_series, icon="Shuffle.png")
 m.addCommand("Mask Checker Premult", maskcheckerpremult.mask_channel_splitter_with_individual_premults_and_hero_dot, icon="Shuffle.png")
+m.addCommand("Mask Checker ID Overlay", maskoverlay.mask_id_overlay, icon="Shuffle.png")
 m.addCommand("MultiSequence Loader", sequenceloader.load_sequence_and_create_contact_sheet, icon="Read.png")
 m.addCommand("Appender Loader", AppenderLoader.load_sequence_and_create_append_clip, icon="Camera.png")
 m.addCommand("Reduce Noise Backdrops",ReduceNoiseBackdrop.highlight_reduce_noise_nodes_with_backdrops, icon="CopyBBox.png")
 m.addCommand("NewDenoiseComp",NewDenoiseComp.main, icon="Assert.png")
+m.addCommand("Toggle Render Watcher", renderwatcher.toggle_render_watcher, icon="Read.png")
+m.addCommand("Consistency Check", consistency.run_consistency_checks, icon="Assert.png")
+
+consistency.install_save_check()
 
 
 
@@ -0,0 +1,217 @@
+# movindex.py
+#
+# Container-level index of QuickTime/MP4 preview clips.
+# Reads frame count, frame rate, resolution and start timecode straight from the moov atom,
+# skipping over the media data, so Reads of preview movies can be set up with a known range
+# without Nuke opening a decoder. Results are cached per path, mtime and size.
+
+import os
+import struct
+import threading
+
+# User variables
+MAX_MOOV_BYTES = 64 * 1024 * 1024  # Bigger moov atoms are not parsed
+
+# Atoms that only hold other atoms and are walked into
+CONTAINER_ATOMS = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'dinf'}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class MovError(Exception):
+    pass
+
+
+class MovInfo(object):
+    def __init__(self, path):
+        self.path = path
+        self.frame_count = None
+        self.fps = None
+        self.width = None
+        self.height = None
+        self.duration = None  # Seconds
+        self.start_frame = None  # Frame number of the start timecode
+        self.timecode_fps = None
+        self.drop_frame = False
+
+    @property
+    def frame_range(self):
+        """Range Nuke's mov reader gives the clip, movies start at frame 1."""
+        if not self.frame_count:
+            return None
+        return 1, self.frame_count
+
+    @property
+    def timecode(self):
+        """Start timecode as 'HH:MM:SS:FF', or None when the movie has no timecode track."""
+        if self.start_frame is None or not self.timecode_fps:
+            return None
+        fps = self.timecode_fps
+        frames = self.start_frame
+        separator = ';' if self.drop_frame else ':'
+        return (f"{frames // (3600 * fps):02d}:{frames // (60 * fps) % 60:02d}:"
+                f"{frames // fps % 60:02d}{separator}{frames % fps:02d}")
+
+    def __repr__(self):
+        return f"MovInfo('{os.path.basename(self.path)}', frames={self.frame_count}, fps={self.fps}, timecode={self.timecode})"
+
+
+def _atoms(data, start=0, end=None):
+    """Yield (type, payload_start, payload_end) of the atoms in data[start:end]."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, atom_type = struct.unpack_from('>I4s', data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield atom_type, pos + header, pos + size
+        pos += size
+
+
+def _find_moov(f, file_size):
+    """Return the bytes of the top-level moov atom, seeking over mdat and other top-level atoms."""
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            break
+        size, atom_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header_size:
+            break
+        if atom_type == b'moov':
+            if size > MAX_MOOV_BYTES:
+                raise MovError(f"moov atom too big ({size} bytes)")
+            f.seek(pos)
+            return f.read(size)
+        pos += size
+    raise MovError("No moov atom found")
+
+
+def _parse_track(data, start, end):
+    track = {}
+    for atom_type, payload, atom_end in _atoms(data, start, end):
+        if atom_type in CONTAINER_ATOMS:
+            track.update({key: value for key, value in _parse_track(data, payload, atom_end).items() if key not in track})
+        elif atom_type == b'tkhd':
+            # Width and height are 16.16 fixed point at the end of the atom
+            width, height = struct.unpack_from('>II', data, atom_end - 8)
+            track['width'], track['height'] = width >> 16, height >> 16
+        elif atom_type == b'hdlr':
+            track['handler'] = data[payload + 8:payload + 12]
+        elif atom_type == b'mdhd':
+            version = data[payload]
+            if version == 1:
+                timescale, duration = struct.unpack_from('>IQ', data, payload + 20)
+            else:
+                timescale, duration = struct.unpack_from('>II', data, payload + 12)
+            track['timescale'], track['duration'] = timescale, duration
+        elif atom_type == b'stts':
+            count = struct.unpack_from('>I', data, payload + 4)[0]
+            track['stts'] = [struct.unpack_from('>II', data, payload + 8 + i * 8) for i in range(count)]
+        elif atom_type == b'stsd':
+            # First sample description, used for the timecode track
+            track['stsd'] = data[payload + 8:atom_end]
+        elif atom_type in (b'stco', b'co64'):
+            count = struct.unpack_from('>I', data, payload + 4)[0]
+            if count:
+                fmt = '>Q' if atom_type == b'co64' else '>I'
+                track['first_chunk'] = struct.unpack_from(fmt, data, payload + 8)[0]
+    return track
+
+
+def _read_index(path):
+    info = MovInfo(path)
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        moov = _find_moov(f, file_size)
+        try:
+            for atom_type, payload, atom_end in _atoms(moov, 8):
+                if atom_type == b'mvhd':
+                    version = moov[payload]
+                    if version == 1:
+                        timescale, duration = struct.unpack_from('>IQ', moov, payload + 20)
+                    else:
+                        timescale, duration = struct.unpack_from('>II', moov, payload + 12)
+                    if timescale:
+                        info.duration = duration / float(timescale)
+                elif atom_type == b'trak':
+                    track = _parse_track(moov, payload, atom_end)
+                    handler = track.get('handler')
+                    if handler == b'vide' and info.frame_count is None:
+                        _apply_video_track(info, track)
+                    elif handler == b'tmcd':
+                        _apply_timecode_track(info, track, f)
+        except (struct.error, IndexError) as e:
+            raise MovError(f"Damaged moov atom: {e}")
+    if info.frame_count is None:
+        raise MovError("No video track found")
+    return info
+
+
+def _apply_video_track(info, track):
+    samples = track.get('stts', [])
+    info.frame_count = sum(count for count, _ in samples)
+    info.width, info.height = track.get('width'), track.get('height')
+    if samples and track.get('timescale'):
+        # The delta used by most samples gives the frame rate
+        delta = max(samples, key=lambda sample: sample[0])[1]
+        if delta:
+            info.fps = round(track['timescale'] / float(delta), 3)
+
+
+def _apply_timecode_track(info, track, f):
+    description = track.get('stsd')
+    if not description or len(description) < 34 or description[4:8] != b'tmcd':
+        return
+    flags, timescale, frame_duration, frames_per_second = struct.unpack_from('>IIIB', description, 20)
+    info.drop_frame = bool(flags & 0x1)
+    info.timecode_fps = frames_per_second or (round(timescale / float(frame_duration)) if frame_duration else None)
+    if track.get('first_chunk') is not None:
+        # The start frame is the first sample of the timecode track, stored in the media data
+        f.seek(track['first_chunk'])
+        sample = f.read(4)
+        if len(sample) == 4:
+            info.start_frame = struct.unpack('>I', sample)[0]
+
+
+def read_index(path):
+    """Return the MovInfo of a movie, cached per path, mtime and size. Raises OSError or MovError."""
+    stat = os.stat(path)
+    key = os.path.normpath(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    info = _read_index(path)
+    with _cache_lock:
+        _cache[key] = (stamp, info)
+    return info
+
+
+def try_read_index(path):
+    """read_index that prints the problem and returns None instead of raising."""
+    try:
+        return read_index(path)
+    except (OSError, MovError) as e:
+        print(f"Could not index {path}: {e}")
+        return None
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
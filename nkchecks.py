@@ -0,0 +1,119 @@
+# nkchecks.py
+#
+# Script checks that run on a .nk file without Nuke, on top of nkparser:
+#   python nkchecks.py shot_v012.nk [more.nk ...] [--json]
+# ZDefocus consistency (the consistency rules), Reduce Noise nodes, Cryptomatte layers that do
+# not match their keyer expression, and the main Write's WHITE_ALPHA input. Each check returns a
+# list of problems as dicts, the exit code is 1 when any script has problems.
+
+import json
+import re
+import sys
+
+import nkparser
+import consistency
+
+# User variables
+REDUCE_NOISE_CLASS = "OFXcom.absoft.neatvideo5_v5"
+MAIN_WRITE_NAME = "PFX_Write_MAIN"
+WHITE_ALPHA_NAME = "WHITE_ALPHA"
+
+CRYPTO_LAYER_RE = re.compile(r'VRayCryptomatte(\w+)00\.red')
+# Only the knobs the checks read are kept while parsing
+CHECK_KNOBS = {'tile_color', 'file', 'expression', 'cryptoLayer', 'label', 'disable'}
+
+
+def check_consistency(script):
+    problems = []
+    for result in consistency.check(index=script):
+        for mismatch in result.mismatches:
+            problem = mismatch.to_dict()
+            problem['rule'] = result.rule.name
+            problems.append(problem)
+    return problems
+
+
+def check_reduce_noise(script):
+    """Reduce Noise nodes left in the script, the same nodes ReduceNoiseBackdrop highlights."""
+    return [{'node': node.fullName()} for node in script.of_class(REDUCE_NOISE_CLASS)]
+
+
+def check_cryptomattes(script):
+    """Cryptomatte nodes whose cryptoLayer is not the layer their keyer expression reads."""
+    problems = []
+    for node in script.of_class('Cryptomatte'):
+        layer = node['cryptoLayer'].value() or ""
+        match = CRYPTO_LAYER_RE.search(str(node['expression'].value() or ""))
+        if match and layer != f"VRayCryptomatte{match.group(1)}":
+            problems.append({'node': node.fullName(), 'layer': layer, 'expected': f"VRayCryptomatte{match.group(1)}"})
+    return problems
+
+
+def check_writes(script):
+    """The main Write (or the first Write) must exist and be fed by the WHITE_ALPHA Shuffle."""
+    writes = script.of_class('Write', root_only=True)
+    main = [node for node in writes if node.name() == MAIN_WRITE_NAME]
+    if not writes:
+        return [{'problem': "no Write node"}]
+    write = (main or writes)[0]
+    input_node = write.input(0)
+    if input_node is None:
+        return [{'node': write.name(), 'problem': "Write has no input"}]
+    if input_node.name() != WHITE_ALPHA_NAME:
+        return [{'node': write.name(), 'problem': f"input is {input_node.name()}, not {WHITE_ALPHA_NAME}"}]
+    return []
+
+
+CHECKS = [
+    ("consistency", check_consistency),
+    ("reduce_noise", check_reduce_noise),
+    ("cryptomatte", check_cryptomattes),
+    ("writes", check_writes),
+]
+
+
+def keep_knobs():
+    knobs = set(CHECK_KNOBS)
+    for rule in consistency.RULES:
+        knobs.update(rule.knobs)
+    return knobs
+
+
+def run_checks(path):
+    """{check name: [problem, ...]} for one .nk file."""
+    script = nkparser.parse(path, keep_knobs=keep_knobs())
+    return {name: check(script) for name, check in CHECKS}
+
+
+def report(path, results):
+    lines = [path]
+    for name, problems in results.items():
+        for problem in problems:
+            details = ", ".join(f"{key}={value}" for key, value in problem.items())
+            lines.append(f"  {name}: {details}")
+    if len(lines) == 1:
+        lines.append("  no problems")
+    return "\n".join(lines)
+
+
+def main(argv):
+    paths = [arg for arg in argv if arg != '--json']
+    if not paths:
+        print("usage: python nkchecks.py <script.nk> [<script.nk> ...] [--json]")
+        return 2
+    all_results = {}
+    for path in paths:
+        try:
+            all_results[path] = run_checks(path)
+        except (OSError, nkparser.NkParseError) as e:
+            all_results[path] = {'parse': [{'problem': str(e)}]}
+    if '--json' in argv:
+        print(json.dumps(all_results, indent=2, default=str))
+    else:
+        for path, results in all_results.items():
+            print(report(path, results))
+    return 1 if any(problems for results in all_results.values() for problems in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
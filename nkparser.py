@@ -0,0 +1,343 @@
+# nkparser.py
+#
+# Pure-Python reader for .nk scripts, for checks that should not need a Nuke licence.
+# The file is streamed line by line and replayed the way Nuke reads it: every node pops its
+# inputs from the stack, 'set'/'push' name and reuse stack entries, indentation opens a group and
+# end_group closes it. Knob values are kept as the raw text of the script and only decoded when
+# asked for, and keep_knobs limits which knobs are stored at all, so scripts with tens of
+# thousands of nodes parse in a few seconds with little memory. NkNode answers the parts of the
+# Nuke node API the checkers use (Class, name, fullName, knobs, node['knob'].value(), xpos,
+# input, ...) so consistency rules and backdrop lookups run on it unchanged.
+
+import re
+import sys
+
+NODE_START_RE = re.compile(r'^([A-Za-z_][\w.]*) \{$')
+CLONE_START_RE = re.compile(r'^clone \$?(\S+) \{$')
+SET_RE = re.compile(r'^set (\S+) \[stack 0\]$')
+NUMBER_RE = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')
+TCL_ESCAPES = {'n': '\n', 't': '\t'}
+
+# Knobs always kept because the model itself needs them
+STRUCTURE_KNOBS = {'name', 'inputs', 'xpos', 'ypos', 'bdwidth', 'bdheight'}
+DEFAULT_SCREEN_SIZE = (80, 18)
+DOT_SCREEN_SIZE = (12, 12)
+
+
+class NkParseError(Exception):
+    pass
+
+
+def _balanced(text):
+    """True when every brace and quote opened in text is closed again."""
+    if '{' not in text and '"' not in text and '\\' not in text:
+        return True
+    depth = 0
+    in_quote = False
+    escaped = False
+    for character in text:
+        if escaped:
+            escaped = False
+        elif character == '\\':
+            escaped = True
+        elif in_quote:
+            if character == '"':
+                in_quote = False
+        elif character == '"' and depth == 0:
+            in_quote = True
+        elif character == '{':
+            depth += 1
+        elif character == '}':
+            depth -= 1
+    return depth <= 0 and not in_quote
+
+
+def _unquote(text):
+    out = []
+    characters = iter(text[1:-1])
+    for character in characters:
+        if character == '\\':
+            following = next(characters, '')
+            out.append(TCL_ESCAPES.get(following, following))
+        else:
+            out.append(character)
+    return ''.join(out)
+
+
+def decode_value(raw):
+    """
+    Knob text as a Python value: numbers become int/float (0x.. colours included), lists of numbers
+    in braces become lists, quoted strings are unescaped, anything else (expressions, curves) stays text.
+    """
+    if raw is None:
+        return None
+    if raw.startswith('"') and raw.endswith('"') and len(raw) > 1:
+        return _unquote(raw)
+    if raw.startswith('{') and raw.endswith('}'):
+        inner = raw[1:-1].strip()
+        parts = inner.split()
+        if parts and all(NUMBER_RE.match(part) for part in parts):
+            return [float(part) for part in parts]
+        return inner
+    if raw in ('true', 'false'):
+        return raw == 'true'
+    if raw.startswith(('0x', '0X')):
+        try:
+            return int(raw, 16)
+        except ValueError:
+            return raw
+    if NUMBER_RE.match(raw):
+        return float(raw) if any(character in raw for character in '.eE') else int(raw)
+    return raw
+
+
+class NkKnob(object):
+    __slots__ = ('_name', '_raw')
+
+    def __init__(self, name, raw):
+        self._name = name
+        self._raw = raw
+
+    def name(self):
+        return self._name
+
+    def value(self):
+        return decode_value(self._raw)
+
+    getValue = value
+
+    def toScript(self):
+        return self._raw
+
+
+class NkNode(object):
+    __slots__ = ('node_class', 'raw_knobs', 'inputs', 'parent', 'children', 'clone_of', 'line')
+
+    def __init__(self, node_class, parent=None, line=0):
+        self.node_class = node_class
+        self.raw_knobs = {}
+        self.inputs = []
+        self.parent = parent
+        self.children = None  # List of child nodes once the node turns out to be a group
+        self.clone_of = None
+        self.line = line
+
+    # Nuke node API used by the checkers
+    def Class(self):
+        return self.node_class
+
+    def name(self):
+        return decode_value(self.raw_knobs.get('name')) or f"{self.node_class}_line{self.line}"
+
+    def fullName(self):
+        if self.parent is None:
+            return str(self.name())
+        return f"{self.parent.fullName()}.{self.name()}"
+
+    def knobs(self):
+        return {name: NkKnob(name, raw) for name, raw in self.raw_knobs.items()}
+
+    def knob(self, name):
+        raw = self.raw_knobs.get(name)
+        return None if raw is None else NkKnob(name, raw)
+
+    def __getitem__(self, name):
+        # Knobs left at their default are not written to the script
+        return NkKnob(name, self.raw_knobs.get(name))
+
+    def input(self, index):
+        return self.inputs[index] if index < len(self.inputs) else None
+
+    def xpos(self):
+        return int(decode_value(self.raw_knobs.get('xpos')) or 0)
+
+    def ypos(self):
+        return int(decode_value(self.raw_knobs.get('ypos')) or 0)
+
+    def screenWidth(self):
+        return (DOT_SCREEN_SIZE if self.node_class == 'Dot' else DEFAULT_SCREEN_SIZE)[0]
+
+    def screenHeight(self):
+        return (DOT_SCREEN_SIZE if self.node_class == 'Dot' else DEFAULT_SCREEN_SIZE)[1]
+
+    def __repr__(self):
+        return f"NkNode({self.node_class} '{self.fullName()}')"
+
+
+def _input_count(raw):
+    # 'inputs 2+1' means two inputs plus a mask input
+    if raw is None:
+        return 1
+    try:
+        return sum(int(part) for part in raw.split('+'))
+    except ValueError:
+        return 1
+
+
+class NkScript(object):
+    """Parsed script. nodes holds every node in file order, groups included; root holds the Root node."""
+
+    def __init__(self, path=''):
+        self.path = path
+        self.root = None
+        self.nodes = []
+        self.classes = {}
+
+    def _add(self, node):
+        self.nodes.append(node)
+        self.classes.setdefault(node.node_class, []).append(node)
+
+    # The same queries as nodeindex.NodeIndex
+    def all(self, root_only=False):
+        return [node for node in self.nodes if not root_only or node.parent is None]
+
+    def of_class(self, *classes, **kwargs):
+        root_only = kwargs.get('root_only', False)
+        nodes = [node for node_class in classes for node in self.classes.get(node_class, ())]
+        return [node for node in nodes if not root_only or node.parent is None]
+
+    def named(self, text, root_only=False):
+        return [node for node in self.all(root_only) if text in str(node.name())]
+
+    def with_prefix(self, prefix, root_only=False):
+        return [node for node in self.all(root_only) if str(node.name()).startswith(prefix)]
+
+    def get(self, full_name):
+        for node in self.nodes:
+            if node.fullName() == full_name:
+                return node
+        return None
+
+    def output_nodes(self, node):
+        return [other for other in self.nodes if node in other.inputs]
+
+
+class _Parser(object):
+    def __init__(self, script, keep_knobs):
+        self.script = script
+        self.keep_knobs = None if keep_knobs is None else set(keep_knobs) | STRUCTURE_KNOBS
+        self.stack = []
+        self.variables = {}
+        self.groups = []  # (group node, stack of the enclosing group)
+        self.last_node = None
+        self.node = None
+        self.pending_name = None
+        self.pending = None
+        self.line_number = 0
+
+    def feed(self, raw_line):
+        self.line_number += 1
+        line = raw_line.rstrip('\r\n')
+        if self.pending is not None:
+            self.pending += '\n' + line
+            if _balanced(self.pending):
+                self._finish_value()
+            return
+        stripped = line.strip()
+        if not stripped:
+            return
+        if self.node is not None:
+            self._node_line(stripped)
+        else:
+            self._statement(stripped, len(line) - len(line.lstrip(' ')))
+
+    def _node_line(self, stripped):
+        if stripped == '}':
+            self._finish_node()
+            return
+        name, _, value = stripped.partition(' ')
+        if name == 'addUserKnob':
+            # Knob definitions, their values follow as normal lines
+            if not _balanced(value):
+                self.pending_name, self.pending = None, value
+            return
+        self.pending_name = name
+        if _balanced(value):
+            self.pending = value
+            self._finish_value()
+        else:
+            self.pending = value
+
+    def _finish_value(self):
+        name, value = self.pending_name, self.pending
+        self.pending_name = self.pending = None
+        if name is None or self.node is None:
+            return  # Multi-line top-level command or user knob definition
+        if self.keep_knobs is None or name in self.keep_knobs:
+            self.node.raw_knobs[sys.intern(name)] = value
+
+    def _statement(self, stripped, indent):
+        depth = len(self.groups)
+        if indent > depth and self.last_node is not None and self.last_node.parent is self._group():
+            # Lines indented one deeper than the group belong inside the node just read
+            self.last_node.children = []
+            self.groups.append((self.last_node, self.stack))
+            self.stack = []
+
+        match = NODE_START_RE.match(stripped)
+        if match:
+            self._start_node(sys.intern(match.group(1)))
+            return
+        match = CLONE_START_RE.match(stripped)
+        if match:
+            original = self.variables.get(match.group(1))
+            self._start_node(original.node_class if original is not None else 'clone')
+            self.node.clone_of = original
+            return
+        match = SET_RE.match(stripped)
+        if match:
+            self.variables[match.group(1)] = self.stack[-1] if self.stack else None
+            return
+        if stripped.startswith('push '):
+            target = stripped[5:].strip()
+            self.stack.append(None if target == '0' else self.variables.get(target.lstrip('$')))
+            return
+        if stripped == 'end_group':
+            if self.groups:
+                _, self.stack = self.groups.pop()
+            self.last_node = None
+            return
+        # Other commands (version, define_window_layout_xml, add_layer, ...) may span lines
+        if not _balanced(stripped):
+            self.pending_name, self.pending = None, stripped
+
+    def _group(self):
+        return self.groups[-1][0] if self.groups else None
+
+    def _start_node(self, node_class):
+        self.node = NkNode(node_class, self._group(), self.line_number)
+
+    def _finish_node(self):
+        node, self.node = self.node, None
+        if node.node_class == 'Root':
+            self.script.root = node
+            return
+        for _ in range(_input_count(node.raw_knobs.get('inputs'))):
+            # The top of the stack is input 0
+            node.inputs.append(self.stack.pop() if self.stack else None)
+        self.stack.append(node)
+        self.last_node = node
+        if node.parent is not None:
+            node.parent.children.append(node)
+        self.script._add(node)
+
+
+def parse_lines(lines, path='', keep_knobs=None):
+    """Parse an iterable of .nk lines. keep_knobs limits the stored knobs, None keeps all."""
+    script = NkScript(path)
+    parser = _Parser(script, keep_knobs)
+    for line in lines:
+        parser.feed(line)
+    if parser.node is not None:
+        raise NkParseError(f"{path}: node {parser.node.node_class} from line {parser.node.line} is not closed")
+    return script
+
+
+def parse(path, keep_knobs=None):
+    """Parse a .nk file. Raises OSError or NkParseError."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return parse_lines(f, path, keep_knobs)
+
+
+def parse_text(text, keep_knobs=None):
+    return parse_lines(text.splitlines(), keep_knobs=keep_knobs)
@@ -0,0 +1,196 @@
+# nodeindex.py
+#
+# Session-level index of the nodes in the script.
+# The script is walked once (groups included) into maps by class, name and gizmo type plus the
+# input/output connections of every node. onCreate, onDestroy and knobChanged ('inputChange',
+# 'name') keep the maps current afterwards, so checkers running back to back ask the index
+# instead of each walking nuke.allNodes() again. The callbacks go through bulkedit: nodes built
+# inside a bulk edit are added once when it ends. Nodes deleted while the callbacks were
+# suspended are dropped the first time a query touches them.
+
+import bisect
+
+import nuke
+import bulkedit
+
+_index = None
+
+
+def _alive(node):
+    # Deleted nodes raise when touched
+    try:
+        node.Class()
+        return True
+    except ValueError:
+        return False
+
+
+def _is_root_level(full_name):
+    return '.' not in full_name
+
+
+class NodeIndex(object):
+    def __init__(self):
+        self.nodes = {}  # fullName -> node
+        self.classes = {}  # Class -> set of fullNames
+        self.gizmos = set()  # fullNames of gizmo instances
+        self.inputs = {}  # fullName -> tuple of input fullNames, None for empty inputs
+        self.outputs = {}  # fullName -> set of fullNames using it as an input
+        self._sorted_names = None  # (name, fullName) pairs sorted for prefix lookups
+
+    def build(self):
+        """Walk the whole script once, groups included."""
+        self.__init__()
+        with nuke.root():
+            for node in nuke.allNodes(recurseGroups=True):
+                self.add(node)
+        return self
+
+    def add(self, node):
+        """Add a node or refresh its entry after its inputs changed."""
+        full_name = node.fullName()
+        if full_name in self.nodes:
+            self._unlink(full_name)
+        else:
+            self.nodes[full_name] = node
+            self.classes.setdefault(node.Class(), set()).add(full_name)
+            if isinstance(node, nuke.Gizmo):
+                self.gizmos.add(full_name)
+            self._sorted_names = None
+        parent = full_name.rpartition('.')[0]
+        inputs = []
+        for i in range(node.inputs()):
+            input_node = node.input(i)
+            # Inputs are always in the same group, only the last part of the name is needed
+            input_name = None if input_node is None else (f"{parent}.{input_node.name()}" if parent else input_node.name())
+            inputs.append(input_name)
+            if input_name is not None:
+                self.outputs.setdefault(input_name, set()).add(full_name)
+        self.inputs[full_name] = tuple(inputs)
+
+    def _unlink(self, full_name):
+        for input_name in self.inputs.pop(full_name, ()):
+            if input_name is not None:
+                self.outputs.get(input_name, set()).discard(full_name)
+
+    def remove(self, full_name):
+        node = self.nodes.pop(full_name, None)
+        if node is None:
+            return
+        self._unlink(full_name)
+        self.outputs.pop(full_name, None)
+        self.gizmos.discard(full_name)
+        for names in self.classes.values():
+            names.discard(full_name)
+        self._sorted_names = None
+
+    def _resolve(self, full_names, root_only):
+        """Nodes for full_names, dropping the ones deleted since they were indexed."""
+        nodes = []
+        for full_name in sorted(full_names):
+            if root_only and not _is_root_level(full_name):
+                continue
+            node = self.nodes.get(full_name)
+            if node is None:
+                continue
+            if not _alive(node):
+                self.remove(full_name)
+                continue
+            nodes.append(node)
+        return nodes
+
+    def get(self, full_name):
+        nodes = self._resolve([full_name], False)
+        return nodes[0] if nodes else None
+
+    def all(self, root_only=False):
+        return self._resolve(list(self.nodes), root_only)
+
+    def of_class(self, *classes, **kwargs):
+        """Nodes of any of the given classes. root_only=True leaves out nodes inside groups."""
+        full_names = set()
+        for node_class in classes:
+            full_names.update(self.classes.get(node_class, ()))
+        return self._resolve(full_names, kwargs.get('root_only', False))
+
+    def with_prefix(self, prefix, root_only=False):
+        """Nodes whose name (without the group path) starts with prefix."""
+        if self._sorted_names is None:
+            self._sorted_names = sorted((full_name.rpartition('.')[2], full_name) for full_name in self.nodes)
+        start = bisect.bisect_left(self._sorted_names, (prefix,))
+        full_names = []
+        for name, full_name in self._sorted_names[start:]:
+            if not name.startswith(prefix):
+                break
+            full_names.append(full_name)
+        return self._resolve(full_names, root_only)
+
+    def named(self, text, root_only=False):
+        """Nodes whose name contains text."""
+        return self._resolve([full_name for full_name in self.nodes if text in full_name.rpartition('.')[2]], root_only)
+
+    def gizmo_nodes(self, gizmo_class=None, root_only=False):
+        full_names = self.gizmos if gizmo_class is None else self.gizmos & self.classes.get(gizmo_class, set())
+        return self._resolve(full_names, root_only)
+
+    def input_nodes(self, node):
+        return self._resolve([name for name in self.inputs.get(node.fullName(), ()) if name is not None], False)
+
+    def output_nodes(self, node):
+        """Nodes using node as an input, without asking Nuke for dependencies."""
+        return self._resolve(self.outputs.get(node.fullName(), ()), False)
+
+
+def _on_create():
+    if _index is not None:
+        _index.add(nuke.thisNode())
+
+
+def _on_destroy():
+    if _index is not None:
+        _index.remove(nuke.thisNode().fullName())
+
+
+def _on_knob_changed():
+    if _index is None:
+        return
+    knob = nuke.thisKnob()
+    if knob is None:
+        return
+    if knob.name() == 'inputChange':
+        _index.add(nuke.thisNode())
+    elif knob.name() == 'name':
+        # The old name is gone, the next query walks the script again
+        invalidate()
+
+
+def _reconcile(node):
+    if _index is not None:
+        _index.add(node)
+
+
+def invalidate():
+    global _index
+    _index = None
+
+
+def install():
+    """Register the callbacks keeping the index current. Safe to call again."""
+    bulkedit.register('onCreate', _on_create, reconcile=_reconcile)
+    bulkedit.register('onDestroy', _on_destroy)
+    bulkedit.register('knobChanged', _on_knob_changed, reconcile=_reconcile)
+    for add, remove in ((nuke.addOnScriptLoad, nuke.removeOnScriptLoad), (nuke.addOnScriptClose, nuke.removeOnScriptClose)):
+        try:
+            remove(invalidate)
+        except ValueError:
+            pass
+        add(invalidate)
+
+
+def get():
+    """The session index, built on first use."""
+    global _index
+    if _index is None:
+        install()
+        _index = NodeIndex().build()
+    return _index
@@ -0,0 +1,191 @@
+# nodelayout.py
+#
+# Shared node layout and backdrop placement.
+# Node geometry is read once into a flat array (x, y, width, height per node) instead of calling
+# xpos()/screenWidth() on every node for every bound, and the space already taken in the script
+# goes into a uniform spatial grid, so finding a free spot for a new group of nodes only looks at
+# the cells it would cover. Tools lay out their nodes, ask for a free origin near the spot they
+# would like, and wrap the result with backdrop().
+
+import array
+
+try:
+    import nuke
+except ImportError:
+    nuke = None
+
+# User variables
+CELL_SIZE = 512  # Spatial grid cell size in DAG units
+PLACEMENT_MARGIN = 100  # Gap kept between a new group and existing nodes
+MAX_PLACEMENT_TRIES = 500
+
+
+def node_rect(node):
+    """(x, y, width, height) of a node, backdrops use their own size knobs."""
+    x, y = int(node.xpos()), int(node.ypos())
+    if node.Class() == 'BackdropNode':
+        return x, y, int(node['bdwidth'].value() or 0), int(node['bdheight'].value() or 0)
+    return x, y, int(node.screenWidth()), int(node.screenHeight())
+
+
+class Geometry(object):
+    """Rectangles of a list of nodes, read once and kept as four ints per node."""
+
+    def __init__(self, nodes=()):
+        self.nodes = []
+        self.values = array.array('i')
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node, rect=None):
+        self.nodes.append(node)
+        self.values.extend(rect or node_rect(node))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def rect(self, index):
+        return tuple(self.values[index * 4:index * 4 + 4])
+
+    def rects(self):
+        values = self.values
+        for i in range(0, len(values), 4):
+            yield values[i], values[i + 1], values[i + 2], values[i + 3]
+
+    def move(self, dx, dy):
+        """Move the nodes by dx, dy and keep the stored rectangles in step."""
+        for index, node in enumerate(self.nodes):
+            x, y = self.values[index * 4] + dx, self.values[index * 4 + 1] + dy
+            node.setXYpos(x, y)
+            self.values[index * 4], self.values[index * 4 + 1] = x, y
+
+    def bounds(self):
+        """(x, y, width, height) around all nodes, or None when empty."""
+        if not self.nodes:
+            return None
+        values = self.values
+        left = min(values[0::4])
+        top = min(values[1::4])
+        right = max(x + w for x, w in zip(values[0::4], values[2::4]))
+        bottom = max(y + h for y, h in zip(values[1::4], values[3::4]))
+        return left, top, right - left, bottom - top
+
+
+def _intersects(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+class SpatialGrid(object):
+    """Uniform grid of rectangles, answers overlap queries by looking only at the covered cells."""
+
+    def __init__(self, rects=(), cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.rects = []
+        for rect in rects:
+            self.insert(rect)
+
+    def _cells(self, rect):
+        x, y, width, height = rect
+        size = self.cell_size
+        for cell_x in range(x // size, (x + max(width, 1) - 1) // size + 1):
+            for cell_y in range(y // size, (y + max(height, 1) - 1) // size + 1):
+                yield cell_x, cell_y
+
+    def insert(self, rect):
+        index = len(self.rects)
+        self.rects.append(tuple(rect))
+        for cell in self._cells(rect):
+            self.cells.setdefault(cell, []).append(index)
+
+    def colliding(self, rect):
+        """Rectangles overlapping rect."""
+        found = set()
+        for cell in self._cells(rect):
+            for index in self.cells.get(cell, ()):
+                if index not in found and _intersects(rect, self.rects[index]):
+                    found.add(index)
+        return [self.rects[index] for index in sorted(found)]
+
+    def overlaps(self, rect):
+        return bool(self.colliding(rect))
+
+
+def script_grid(exclude=()):
+    """SpatialGrid of every node in the current group, nodes in exclude are left out."""
+    excluded = {node.name() for node in exclude}
+    return SpatialGrid(node_rect(node) for node in nuke.allNodes() if node.name() not in excluded)
+
+
+def find_free_origin(x, y, width, height, grid=None, margin=PLACEMENT_MARGIN):
+    """
+    Top-left corner nearest below (x, y) where a width x height block does not touch existing nodes.
+    The block is reserved in grid, so several groups placed with the same grid do not overlap either.
+    """
+    if grid is None:
+        grid = script_grid()
+    for _ in range(MAX_PLACEMENT_TRIES):
+        colliding = grid.colliding((x - margin, y - margin, width + margin * 2, height + margin * 2))
+        if not colliding:
+            break
+        # Jump below everything in the way instead of stepping through it
+        y = max(rect[1] + rect[3] for rect in colliding) + margin
+    grid.insert((x, y, width, height))
+    return x, y
+
+
+def grid_positions(count, columns, spacing_x, spacing_y, origin=(0, 0)):
+    """Positions of count nodes on a grid, row by row."""
+    return [(origin[0] + (i % columns) * spacing_x, origin[1] + (i // columns) * spacing_y) for i in range(count)]
+
+
+def shift(nodes, dx, dy):
+    for node in nodes:
+        node.setXYpos(node.xpos() + dx, node.ypos() + dy)
+
+
+def _paddings(padding):
+    if isinstance(padding, (list, tuple)):
+        return padding
+    return padding, padding, padding, padding
+
+
+def backdrop_rect(bounds, padding):
+    """Backdrop rectangle around bounds, padding is one value or (left, top, right, bottom)."""
+    left, top, right, bottom = _paddings(padding)
+    x, y, width, height = bounds
+    return x - left, y - top, width + left + right, height + top + bottom
+
+
+def backdrop(nodes, label="", color=0x808080ff, padding=50, font_size=42, nodes_api=None, **knobs):
+    """
+    Create a BackdropNode around nodes. nodes may be a Geometry to reuse a snapshot, nodes_api is
+    nuke.nodes by default or a graphbuilder.GraphBuilder. Returns None for an empty list.
+    """
+    geometry = nodes if isinstance(nodes, Geometry) else Geometry(nodes)
+    bounds = geometry.bounds()
+    if bounds is None:
+        return None
+    x, y, width, height = backdrop_rect(bounds, padding)
+    return (nodes_api or nuke.nodes).BackdropNode(
+        xpos=x,
+        ypos=y,
+        bdwidth=width,
+        bdheight=height,
+        tile_color=int(color),
+        note_font_size=font_size,
+        label=label,
+        **knobs
+    )
+
+
+def fit_backdrop(backdrop_node, nodes, padding=50):
+    """Move and resize an existing backdrop so it wraps nodes again."""
+    geometry = nodes if isinstance(nodes, Geometry) else Geometry(nodes)
+    bounds = geometry.bounds()
+    if bounds is None:
+        return
+    x, y, width, height = backdrop_rect(bounds, padding)
+    backdrop_node.setXYpos(x, y)
+    backdrop_node['bdwidth'].setValue(width)
+    backdrop_node['bdheight'].setValue(height)
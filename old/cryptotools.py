@@ -1,5 +1,6 @@
 import nuke
 import re
+import nodeindex
 
 def detect_crypto_layer(node):
     expression = node['expression'].value()
@@ -11,7 +12,7 @@ def detect_crypto_layer(node):
 def process_cryptomattes():
     processed_nodes = 0
     mismatched_nodes = 0
-    for node in nuke.allNodes('Cryptomatte'):
+    for node in nodeindex.get().of_class('Cryptomatte', root_only=True):
         current_layer = node['cryptoLayer'].value()
         detected_layer = detect_crypto_layer(node)
         
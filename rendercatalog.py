@@ -0,0 +1,139 @@
+# rendercatalog.py
+#
+# Persistent on-disk catalog of render folder listings.
+# Every folder the loaders look at (shot -> task -> version -> layer -> frames) is stored in a
+# local SQLite database together with the folder's mtime and size. On the next load only the
+# folders whose stat changed are listed again over the network, everything else is answered
+# from the catalog. The database runs in WAL mode with a busy timeout, so several Nuke sessions
+# on one workstation can read and write it at the same time.
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# User variables
+USE_RENDER_CATALOG = True
+CATALOG_PATH = os.environ.get(
+    'PFX_RENDER_CATALOG',
+    os.path.join(os.path.expanduser('~'), '.nuke', 'pfx_render_catalog.sqlite')
+)
+BUSY_TIMEOUT = 10.0  # Seconds to wait for another session holding the write lock
+RACY_WINDOW = 2.0  # Folders modified this recently are not cached, their mtime may not change again
+
+_local = threading.local()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    entries TEXT NOT NULL
+)
+"""
+
+
+class CatalogEntry(object):
+    """Minimal stand-in for os.DirEntry returned for cached listings."""
+    __slots__ = ('name', 'path', '_is_dir')
+
+    def __init__(self, parent, name, is_dir):
+        self.name = name
+        self.path = os.path.join(parent, name)
+        self._is_dir = is_dir
+
+    def is_dir(self):
+        return self._is_dir
+
+    def is_file(self):
+        return not self._is_dir
+
+
+def _connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        folder = os.path.dirname(CATALOG_PATH)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        conn = sqlite3.connect(CATALOG_PATH, timeout=BUSY_TIMEOUT)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(SCHEMA)
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+
+def _normalize(path):
+    return os.path.normpath(path).replace('\\', '/')
+
+
+def _list_folder(path):
+    entries = []
+    with os.scandir(path) as iterator:
+        for entry in iterator:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append((entry.name, is_dir))
+    return entries
+
+
+def _cached_entries(path):
+    stat = os.stat(path)
+    if not USE_RENDER_CATALOG:
+        return _list_folder(path)
+
+    key = _normalize(path)
+    try:
+        conn = _connection()
+        row = conn.execute('SELECT mtime_ns, size, entries FROM dirs WHERE path = ?', (key,)).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Render catalog unavailable, listing directly: {e}")
+        return _list_folder(path)
+
+    if row and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+        return [tuple(entry) for entry in json.loads(row[2])]
+
+    entries = _list_folder(path)
+    if time.time() - stat.st_mtime < RACY_WINDOW:
+        # Still being written, a later change could keep the same mtime
+        return entries
+    try:
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO dirs (path, mtime_ns, size, entries) VALUES (?, ?, ?, ?)',
+                (key, stat.st_mtime_ns, stat.st_size, json.dumps(entries))
+            )
+    except sqlite3.Error as e:
+        print(f"Could not update render catalog for {key}: {e}")
+    return entries
+
+
+def scandir(path):
+    """Like os.scandir, but answered from the catalog when the folder is unchanged. Raises OSError."""
+    return [CatalogEntry(path, name, is_dir) for name, is_dir in _cached_entries(path)]
+
+
+def listdir(path):
+    """Like os.listdir, but answered from the catalog when the folder is unchanged. Raises OSError."""
+    return [name for name, _ in _cached_entries(path)]
+
+
+def forget(path):
+    """Drop a folder from the catalog so the next lookup lists it again."""
+    try:
+        with _connection() as conn:
+            conn.execute('DELETE FROM dirs WHERE path = ?', (_normalize(path),))
+    except (sqlite3.Error, OSError) as e:
+        print(f"Could not update render catalog for {path}: {e}")
+
+
+def clear_catalog():
+    try:
+        with _connection() as conn:
+            conn.execute('DELETE FROM dirs')
+    except (sqlite3.Error, OSError) as e:
+        print(f"Could not clear render catalog: {e}")
@@ -0,0 +1,109 @@
+# renderindex.py
+#
+# Single-pass indexer for lighting render trees.
+# Walks a shot's render folder once (through the render catalog) and returns every layer together with
+# its versions, file pattern and frame numbers, so the loaders never have to list the
+# same folder twice. Supports both layouts used on the project:
+#   render/v012/<layer>/<frames>.exr
+#   render/.../exr.<layer>/v012/<frames>.exr
+
+import os
+import rendercatalog
+import framesets
+import versions
+
+# User variables
+MAX_DEPTH = 6  # Deepest folder level (below the shot render folder) that is scanned
+FRAME_EXTENSIONS = ('.exr',)
+
+
+def frame_pattern(file_name):
+    """Return the Nuke '####' pattern for a frame file name, or None if it carries no frame number."""
+    match = framesets.FRAME_FILE_RE.match(file_name)
+    if not match:
+        return None
+    return match.group('head') + '#' * len(match.group('frame')) + match.group('tail')
+
+
+def scan_frame_dir(entries):
+    """Find the main image sequence in a list of DirEntry objects, returns None if there is none."""
+    sequences = framesets.scan_sequences((entry.name for entry in entries), FRAME_EXTENSIONS)
+    if not sequences:
+        return None
+    frame_set = sequences[0]
+    return {"file": frame_set.file_name(frame_set.first), "pattern": frame_set.pattern, "frames": frame_set}
+
+
+def layer_and_version(parts):
+    """Work out (layer, version, layout) from the folder names between the shot root and a frame folder."""
+    if len(parts) >= 2 and parts[-2].startswith('exr.') and versions.is_version_folder(parts[-1]):
+        return parts[-2].split('.')[-1], parts[-1], 'exr'
+    if len(parts) == 2 and versions.is_version_folder(parts[0]):
+        return parts[1], parts[0], 'version'
+    return None, None, None
+
+
+def _walk(path, parts, depth, found):
+    try:
+        entries = rendercatalog.scandir(path)
+    except OSError:
+        return
+
+    frame_info = scan_frame_dir(entries)
+    if frame_info:
+        layer, version, layout = layer_and_version(parts)
+        if layer:
+            frame_info["path"] = path
+            found.append((layout, layer, version, frame_info))
+        # Frame folders are leaves, nothing below them is a render layer
+        return
+
+    if depth >= MAX_DEPTH:
+        return
+
+    for entry in entries:
+        name = entry.name
+        if name.startswith('.'):
+            continue
+        try:
+            if not entry.is_dir():
+                continue
+        except OSError:
+            continue
+        # Inside an exr.<layer> folder only the version folders can hold frames
+        if parts and parts[-1].startswith('exr.') and not versions.is_version_folder(name):
+            continue
+        _walk(os.path.join(path, name), parts + [name], depth + 1, found)
+
+
+def index_render_tree(shot_path, policy=versions.DEFAULT_POLICY, cut_range=None):
+    """
+    Walk a lighting render folder once and return a dict of layers:
+
+        {layer: {"version": latest version folder,
+                 "file": first frame file of the latest version,
+                 "path": folder holding the latest frames,
+                 "pattern": file name with the frame number replaced by '#',
+                 "frames": FrameSet of the latest version,
+                 "versions": {version: {"file", "path", "pattern", "frames"}}}}
+
+    Layers found in the render/vXXX/<layer> layout take precedence, the exr.<layer> layout
+    is only used when the first one yields nothing. The version of each layer is chosen with
+    versions.pick_version using the given policy and cut range.
+    """
+    found = []
+    _walk(shot_path, [], 0, found)
+
+    layers_by_layout = {'version': {}, 'exr': {}}
+    for layout, layer, version, frame_info in found:
+        layer_entry = layers_by_layout[layout].setdefault(layer, {"versions": {}})
+        layer_entry["versions"][version] = frame_info
+
+    render_layers = layers_by_layout['version'] or layers_by_layout['exr']
+    for layer, layer_entry in render_layers.items():
+        layer_versions = layer_entry["versions"]
+        latest = versions.pick_version(list(layer_versions), policy, cut_range,
+                                       lambda name: layer_versions[name]["frames"])
+        layer_entry["version"] = latest
+        layer_entry.update(layer_entry["versions"][latest])
+    return render_layers
@@ -0,0 +1,176 @@
+# renderintegrity.py
+#
+# Render integrity validator.
+# Checks every frame of the loaded layers for zero-byte files, broken headers and files cut short
+# by a failed farm task, and flags frames whose size is far from the layer median. All frames are
+# stat'ed and their headers parsed in parallel, limited per share, so a whole shot is checked in
+# seconds instead of showing up as an error two hours into a comp render. The frames of a layer
+# share their header layout, so after the first frame only its header size is read per frame.
+
+import os
+import struct
+import statistics
+import exrheader
+import sharepool
+import framesets
+
+# User variables
+SIZE_LOW_RATIO = 0.5  # Frames smaller than this fraction of the layer median are flagged
+SIZE_HIGH_RATIO = 3.0  # Frames bigger than this multiple of the layer median are flagged
+HEADER_SLACK_BYTES = 1024  # Read beyond the first frame's header size, for attributes that vary per frame
+
+# Scanlines stored in one chunk for each compression, used to size the offset table
+LINES_PER_CHUNK = {'none': 1, 'rle': 1, 'zips': 1, 'zip': 16, 'pxr24': 16,
+                   'piz': 32, 'b44': 32, 'b44a': 32, 'dwaa': 32, 'dwab': 256}
+
+
+class LayerReport(object):
+    """Problems found in one layer, frames are keyed by frame number."""
+
+    def __init__(self, name, path, frame_set):
+        self.name = name
+        self.path = path
+        self.frame_set = frame_set
+        self.problems = {}  # frame -> reason
+        self.size_outliers = {}  # frame -> size in bytes
+        self.median_size = None
+
+    @property
+    def ok(self):
+        return not self.problems and not self.size_outliers
+
+    def bad_frames(self):
+        return sorted(set(self.problems) | set(self.size_outliers))
+
+    def summary(self):
+        by_reason = {}
+        for frame, reason in self.problems.items():
+            by_reason.setdefault(reason, []).append(frame)
+        parts = [f"{reason} {framesets.format_ranges(framesets.ranges_from_frames(sorted(frames)))}"
+                 for reason, frames in sorted(by_reason.items())]
+        if self.size_outliers:
+            parts.append(f"unusual size {', '.join(str(frame) for frame in sorted(self.size_outliers))}"
+                         f" (median {_format_size(self.median_size)})")
+        return f"{self.name}: " + "; ".join(parts)
+
+
+def _format_size(size):
+    if size is None:
+        return "?"
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} GB"
+
+
+def chunk_count(part):
+    """Number of chunks in the offset table of a scanline part, or None when it cannot be told."""
+    if 'chunkCount' in part.attributes:
+        return part.attributes['chunkCount']
+    window = part.data_window
+    lines = LINES_PER_CHUNK.get(part.compression)
+    if not window or lines is None:
+        return None
+    return (window[3] - window[1] + lines) // lines
+
+
+def _check_chunks(path, header, size):
+    """Check the offset table and the last chunk of a scanline EXR against the file size."""
+    if header.is_tiled or header.flags & exrheader.NON_IMAGE_FLAG or any(part.attributes.get('tiles') for part in header.parts):
+        return None  # Tiled and deep files are only checked up to the header
+    counts = [chunk_count(part) for part in header.parts]
+    if None in counts:
+        return None
+    total = sum(counts)
+    if size < header.header_size + total * 8:
+        return "truncated"
+    chunk_header = struct.Struct('<iii' if header.is_multipart else '<ii')
+    with open(path, 'rb') as f:
+        f.seek(header.header_size)
+        offsets = struct.unpack(f'<{total}Q', f.read(total * 8))
+        # OpenEXR leaves the offsets of chunks it never wrote at zero
+        if not all(offsets):
+            return "truncated"
+        last = max(offsets)
+        if last + chunk_header.size > size:
+            return "truncated"
+        f.seek(last)
+        data_size = chunk_header.unpack(f.read(chunk_header.size))[-1]
+    if data_size < 0 or last + chunk_header.size + data_size > size:
+        return "truncated"
+    return None
+
+
+def check_frame(path, header_bytes=exrheader.FIRST_READ_BYTES):
+    """Return (size, problem) for one frame file, problem is None for a good frame."""
+    with sharepool.share_slot(path):
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return None, "missing"
+        if size == 0:
+            return 0, "zero bytes"
+        if not path.lower().endswith('.exr'):
+            return size, None
+        try:
+            header = exrheader.read_header(path, header_bytes)
+            return size, _check_chunks(path, header, size)
+        except exrheader.ExrHeaderError:
+            return size, "broken header"
+        except (OSError, struct.error) as e:
+            return size, f"unreadable ({e})"
+
+
+def _header_bytes(first_path):
+    """Bytes to read for the headers of a layer's frames, judged by its first frame."""
+    if not first_path.lower().endswith('.exr'):
+        return exrheader.FIRST_READ_BYTES
+    try:
+        return exrheader.read_header(first_path).header_size + HEADER_SLACK_BYTES
+    except (OSError, exrheader.ExrHeaderError):
+        return exrheader.FIRST_READ_BYTES  # The frame check reports the problem
+
+
+def validate_layers(layers, workers=None):
+    """
+    Check the frames of {name: (folder, FrameSet)} and return a LayerReport per layer, in the given order.
+    All frames of all layers go through one bounded pool.
+    """
+    reports = []
+    jobs = []
+    for name, (folder, frame_set) in layers.items():
+        report = LayerReport(name, folder, frame_set)
+        reports.append(report)
+        if frame_set:
+            paths = [(frame, os.path.join(folder, frame_set.file_name(frame))) for frame in frame_set]
+            header_bytes = _header_bytes(paths[0][1])
+            jobs.extend((report, frame, path, header_bytes) for frame, path in paths)
+
+    results = sharepool.map_ordered(lambda job: check_frame(job[2], job[3]), jobs, workers)
+    sizes = {}
+    for (report, frame, _, _), result in zip(jobs, results):
+        size, problem = result if result else (None, "unreadable")
+        if problem:
+            report.problems[frame] = problem
+        else:
+            sizes.setdefault(report, {})[frame] = size
+
+    for report, frame_sizes in sizes.items():
+        report.median_size = statistics.median(frame_sizes.values())
+        low, high = report.median_size * SIZE_LOW_RATIO, report.median_size * SIZE_HIGH_RATIO
+        report.size_outliers = {frame: size for frame, size in frame_sizes.items() if size < low or size > high}
+    return reports
+
+
+def validate_render_layers(render_layers, workers=None):
+    """validate_layers for the result of renderindex.index_render_tree / rendermanifest.read_render_layers."""
+    return validate_layers({name: (info["path"], info["frames"]) for name, info in render_layers.items()}, workers)
+
+
+def format_report(reports):
+    bad = [report for report in reports if not report.ok]
+    frame_count = sum(len(report.frame_set) for report in reports if report.frame_set)
+    if not bad:
+        return f"Render integrity: all {frame_count} frames of {len(reports)} layers are fine."
+    return "Render integrity problems:\n" + "\n".join(report.summary() for report in bad)
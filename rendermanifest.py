@@ -0,0 +1,208 @@
+# rendermanifest.py
+#
+# Render manifest sidecars.
+# On publish every render version gets a small pfx_manifest.json next to its frames with the
+# layers, file pattern, frame set, resolution and channels of that version, and the render folder
+# gets a pfx_latest.json pointer that names the latest version of each layer and carries the
+# manifests of all versions. Loaders read the pointer first, which turns a load into one small file
+# read per shot, and only fall back to scanning the EXR folders when it is missing or stale.
+#
+# Publish from the farm or a shell:
+#   python rendermanifest.py Y:/20105_Pysna_film/out/FILM/SQ0010/SH0010/lighting/render
+
+import os
+import sys
+import json
+import time
+import renderindex
+import rendercatalog
+import framesets
+import exrheader
+import versions
+
+# User variables
+USE_RENDER_MANIFESTS = True
+MANIFEST_NAME = "pfx_manifest.json"
+LATEST_NAME = "pfx_latest.json"
+STALE_TOLERANCE = 2.0  # Seconds a folder may be newer than the pointer, writing the pointer touches its folder
+MOVIE_EXTENSIONS = ('.mov', '.mp4')
+MAIN_LAYER = "main"  # Layer name used for renders without layer folders
+
+FORMAT_VERSION = 1
+
+
+def _relative(root, path):
+    return os.path.relpath(path, root).replace("\\", "/")
+
+
+def _entry(render_root, frame_info):
+    """Manifest entry of one layer version, paths are stored relative to the render folder."""
+    frame_set = frame_info.get("frames")
+    entry = {"path": _relative(render_root, frame_info["path"]), "file": frame_info["file"]}
+    if frame_set:
+        header = exrheader.try_read_header(os.path.join(frame_info["path"], frame_info["file"]))
+        resolution = header.resolution if header else None
+        entry.update({
+            "pattern": frame_set.pattern,
+            "head": frame_set.head,
+            "tail": frame_set.tail,
+            "padding": frame_set.padding,
+            "frames": str(frame_set),
+            "resolution": list(resolution) if resolution else None,
+            "channels": header.channels if header else [],
+            "compression": header.compression if header else None,
+        })
+    return entry
+
+
+def _index_flat(render_root):
+    """Renders without layer folders: render/v003/<frames> or versioned movie files."""
+    layer_versions = {}
+    names = rendercatalog.listdir(render_root)
+    for name in versions.sort_versions(names):
+        version_path = os.path.join(render_root, name)
+        try:
+            frame_info = renderindex.scan_frame_dir(rendercatalog.scandir(version_path))
+        except OSError:
+            continue
+        if frame_info:
+            frame_info["path"] = version_path
+            layer_versions[name] = frame_info
+    if not layer_versions:
+        for name in names:
+            number = versions.version_number(name)
+            if number is not None and name.lower().endswith(MOVIE_EXTENSIONS):
+                layer_versions[f"v{number:03d}"] = {"path": render_root, "file": name, "pattern": name, "frames": None}
+    return {MAIN_LAYER: {"versions": layer_versions}} if layer_versions else {}
+
+
+def _version_folder(render_root, path, version):
+    """Folder named after the version that holds the frames, the render folder for movie files."""
+    while path and os.path.basename(path) != version:
+        parent = os.path.dirname(path)
+        if parent == path or len(parent) < len(render_root):
+            return render_root
+        path = parent
+    return path or render_root
+
+
+def _write_json(path, data):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def publish(render_root):
+    """Write the version manifests and the latest pointer for a render folder. Returns the pointer data."""
+    render_root = os.path.normpath(render_root)
+    render_layers = renderindex.index_render_tree(render_root, versions.LATEST) or _index_flat(render_root)
+    if not render_layers:
+        print(f"Nothing to publish in {render_root}")
+        return None
+
+    layers = {}
+    by_version_folder = {}
+    dependencies = {"."}
+    for layer_name, layer_entry in render_layers.items():
+        layers[layer_name] = {}
+        for version, frame_info in layer_entry["versions"].items():
+            entry = _entry(render_root, frame_info)
+            layers[layer_name][version] = entry
+            folder = _version_folder(render_root, frame_info["path"], version)
+            manifest = by_version_folder.setdefault(folder, {"format": FORMAT_VERSION, "version": version, "layers": {}})
+            manifest["layers"][layer_name] = dict(entry, path=_relative(folder, frame_info["path"]))
+            # New versions appear in the folder holding the version folders
+            dependencies.add(_relative(render_root, os.path.dirname(folder)))
+        # New frames of the newest version, and new layers inside it
+        latest = versions.sort_versions(layers[layer_name])[-1]
+        latest_path = layer_entry["versions"][latest]["path"]
+        dependencies.add(_relative(render_root, latest_path))
+        dependencies.add(_relative(render_root, _version_folder(render_root, latest_path, latest)))
+
+    for folder, manifest in by_version_folder.items():
+        if folder != render_root:
+            try:
+                _write_json(os.path.join(folder, MANIFEST_NAME), manifest)
+            except OSError as e:
+                print(f"Could not write manifest in {folder}: {e}")
+
+    pointer = {
+        "format": FORMAT_VERSION,
+        "published": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "latest": {layer_name: versions.sort_versions(layer_versions)[-1] for layer_name, layer_versions in layers.items()},
+        "layers": layers,
+        "dependencies": sorted(path for path in dependencies if not path.startswith('..')),
+    }
+    # The pointer is written last, so every folder it depends on is older than it
+    _write_json(os.path.join(render_root, LATEST_NAME), pointer)
+    rendercatalog.forget(render_root)
+    print(f"Published manifest for {len(layers)} layers in {render_root}")
+    return pointer
+
+
+def read_pointer(render_root):
+    """The latest pointer of a render folder, or None when it is missing, unreadable or stale."""
+    if not USE_RENDER_MANIFESTS:
+        return None
+    pointer_path = os.path.join(render_root, LATEST_NAME)
+    try:
+        published = os.stat(pointer_path).st_mtime
+        with open(pointer_path) as f:
+            pointer = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if pointer.get("format") != FORMAT_VERSION:
+        return None
+    for folder in pointer.get("dependencies", []):
+        try:
+            modified = os.stat(os.path.join(render_root, folder)).st_mtime
+        except OSError:
+            print(f"Manifest of {render_root} is stale, {folder} is gone")
+            return None
+        if modified > published + STALE_TOLERANCE:
+            print(f"Manifest of {render_root} is stale, {folder} changed after publish")
+            return None
+    return pointer
+
+
+def _frame_info(render_root, entry):
+    frame_set = None
+    if entry.get("frames"):
+        frame_set = framesets.FrameSet.from_string(entry["frames"], head=entry["head"], tail=entry["tail"],
+                                                   padding=entry["padding"])
+    return {
+        "file": entry["file"],
+        "path": os.path.normpath(os.path.join(render_root, entry["path"])),
+        "pattern": entry.get("pattern", entry["file"]),
+        "frames": frame_set,
+        "resolution": tuple(entry["resolution"]) if entry.get("resolution") else None,
+        "channels": entry.get("channels", []),
+    }
+
+
+def read_render_layers(render_root, policy=versions.DEFAULT_POLICY, cut_range=None):
+    """
+    Same result as renderindex.index_render_tree, answered from the manifest.
+    Returns None when there is no usable manifest and the caller has to scan.
+    """
+    pointer = read_pointer(render_root)
+    if pointer is None:
+        return None
+    render_layers = {}
+    for layer_name, layer_versions in pointer["layers"].items():
+        version_infos = {version: _frame_info(render_root, entry) for version, entry in layer_versions.items()}
+        version = versions.pick_version(list(version_infos), policy, cut_range,
+                                        lambda name: version_infos[name]["frames"])
+        if version is None:
+            continue
+        render_layers[layer_name] = dict(version_infos[version], version=version, versions=version_infos)
+    return render_layers
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python rendermanifest.py <render folder> [<render folder> ...]")
+        sys.exit(1)
+    for folder in sys.argv[1:]:
+        publish(folder)
@@ -0,0 +1,250 @@
+# renderwatcher.py
+#
+# Optional background watcher for loaded renders.
+# The loaders register every render root they loaded from together with a resolve function.
+# A daemon thread watches only the folders those Reads depend on (inotify on Linux, a stat poll
+# everywhere else). When a folder changes, the root is resolved again on the watcher thread and
+# new versions or extended frame ranges are pushed into the existing Read nodes on the main
+# thread, so the graph is never rebuilt.
+
+import os
+import sys
+import time
+import select
+import struct
+import threading
+
+try:
+    import nuke
+except ImportError:
+    nuke = None
+
+# User variables
+ENABLE_RENDER_WATCHER = False  # Loaders only register their Reads while this is on
+POLL_INTERVAL = 10.0  # Seconds between stat polls of the watched folders
+INOTIFY_RESCAN_INTERVAL = 60.0  # Safety stat poll while inotify is used, network shares do not always notify
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+class _Inotify(object):
+    """Tiny ctypes wrapper around Linux inotify, only directory change events are requested."""
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0))
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._mask = (self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO |
+                      self.IN_CREATE | self.IN_DELETE | self.IN_DELETE_SELF)
+        self._wd_by_path = {}
+        self._path_by_wd = {}
+
+    def add(self, path):
+        if path in self._wd_by_path:
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self._mask)
+        if wd >= 0:
+            self._wd_by_path[path] = wd
+            self._path_by_wd[wd] = path
+
+    def remove(self, path):
+        wd = self._wd_by_path.pop(path, None)
+        if wd is not None:
+            self._path_by_wd.pop(wd, None)
+            self._libc.inotify_rm_watch(self.fd, wd)
+
+    def paths(self):
+        return set(self._wd_by_path)
+
+    def read_changed(self):
+        """Return the watched paths that received events since the last call."""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + self.EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size + length
+                path = self._path_by_wd.get(wd)
+                if path:
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class RenderWatch(object):
+    """
+    One watched render root. resolve() runs on the watcher thread and returns
+    (updates, folders): updates is {node_name: {knob: value}}, folders the folders it depends on.
+    """
+
+    def __init__(self, key, resolve):
+        self.key = key
+        self.resolve = resolve
+        self.folders = {}  # path -> mtime_ns seen at the last resolve
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def apply_updates(updates):
+    """Push knob values into existing Read nodes. Must run on the main thread."""
+    for node_name, knob_values in updates.items():
+        node = nuke.toNode(node_name)
+        if node is None:
+            continue
+        changed = False
+        for knob_name, value in knob_values.items():
+            knob = node.knobs().get(knob_name)
+            if knob is not None and knob.value() != value:
+                knob.setValue(value)
+                changed = True
+        if changed:
+            print(f"Render watcher updated {node_name}: {knob_values}")
+            if 'reload' in node.knobs():
+                node['reload'].execute()
+
+
+class RenderWatcher(threading.Thread):
+    def __init__(self):
+        super(RenderWatcher, self).__init__(name='PFXRenderWatcher')
+        self.daemon = True
+        self._watches = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._inotify = None
+        if sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                print(f"inotify not available, polling render folders instead: {e}")
+
+    def add(self, key, resolve):
+        with self._lock:
+            self._watches[key] = RenderWatch(key, resolve)
+            self._dirty.add(key)
+
+    def remove(self, key):
+        with self._lock:
+            self._watches.pop(key, None)
+            self._dirty.discard(key)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _changed_by_stat(self, watches):
+        return {watch.key for watch in watches
+                if any(_mtime(path) != mtime for path, mtime in watch.folders.items())}
+
+    def _resolve(self, watch):
+        try:
+            updates, folders = watch.resolve()
+        except Exception as e:
+            print(f"Render watcher could not resolve {watch.key}: {e}")
+            return
+        watch.folders = {path: _mtime(path) for path in folders}
+        if updates and nuke is not None:
+            nuke.executeInMainThread(apply_updates, args=(updates,))
+
+    def _sync_inotify(self, watches):
+        wanted = set()
+        for watch in watches:
+            wanted.update(watch.folders)
+        current = self._inotify.paths()
+        for path in current - wanted:
+            self._inotify.remove(path)
+        for path in wanted - current:
+            self._inotify.add(path)
+
+    def run(self):
+        interval = INOTIFY_RESCAN_INTERVAL if self._inotify else POLL_INTERVAL
+        next_scan = time.time() + interval
+        while not self._stop_event.is_set():
+            with self._lock:
+                watches = list(self._watches.values())
+                dirty = set(self._dirty)
+                self._dirty.clear()
+
+            if time.time() >= next_scan:
+                dirty.update(self._changed_by_stat(watches))
+                next_scan = time.time() + interval
+
+            for watch in watches:
+                if watch.key in dirty:
+                    self._resolve(watch)
+            if self._inotify and dirty:
+                self._sync_inotify(watches)
+
+            if self._inotify:
+                ready, _, _ = select.select([self._inotify.fd], [], [], 1.0)
+                if ready:
+                    changed_paths = self._inotify.read_changed()
+                    with self._lock:
+                        self._dirty.update(watch.key for watch in watches if changed_paths & set(watch.folders))
+            else:
+                self._stop_event.wait(1.0)
+
+        if self._inotify:
+            self._inotify.close()
+
+
+def get_watcher():
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = RenderWatcher()
+            _watcher.start()
+        return _watcher
+
+
+def is_enabled():
+    return ENABLE_RENDER_WATCHER
+
+
+def watch(key, resolve):
+    """Register a render root with the watcher if it is enabled."""
+    if not ENABLE_RENDER_WATCHER:
+        return
+    get_watcher().add(key, resolve)
+
+
+def stop_watching():
+    global _watcher
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher.stop()
+            _watcher = None
+
+
+def toggle_render_watcher():
+    global ENABLE_RENDER_WATCHER
+    ENABLE_RENDER_WATCHER = not ENABLE_RENDER_WATCHER
+    if not ENABLE_RENDER_WATCHER:
+        stop_watching()
+    message = f"Render watcher {'enabled' if ENABLE_RENDER_WATCHER else 'disabled'}."
+    print(message)
+    if nuke is not None and nuke.GUI:
+        nuke.message(message + ("\nReads loaded from now on follow new versions and frames." if ENABLE_RENDER_WATCHER else ""))
@@ -4,15 +4,36 @@
 # This script loads multiple sequences, creates Read nodes for each shot,
 # adds text overlays with dynamic labels, and generates a ContactSheet for easy review.
 # It now strictly loads only denoise renders when that option is selected.
-# The backdrop is 15% smaller, gray, and the entire setup is 500px lower.
+# The backdrop is gray, and the setup goes below the Write, further down if that space is taken.
 # Each sequence now has its own dimmer color for easier visual distinction.
 # The script always starts by showing the current sequence number from the script name.
+# Running it again updates the loaded Reads in place and only adds the shots that are new.
 
 import nuke
 import os
 import re
-import random
 import colorsys
+import rendercatalog
+import rendermanifest
+import renderintegrity
+import sharepool
+import storageroots
+import framesets
+import versions
+import renderwatcher
+import asyncload
+import graphbuilder
+import nodelayout
+import loadplan
+
+# User variables
+PROBE_CONCURRENCY = 16  # Threads used to look for shot renders, Nuke nodes are still created on the main thread
+VERSION_POLICY = versions.LATEST_COMPLETE  # Skip versions that are still rendering
+VALIDATE_FRAMES = True  # Check every loaded frame for zero-byte, truncated and odd-sized files
+COLUMNS = 5  # Shots per contact sheet row
+BACKDROP_PADDING = 290
+
+SHOT_FOLDER_RE = re.compile(r'^SH(\d+)$')
 
 def get_current_sequence():
     script_name = nuke.root().name()
@@ -30,61 +51,164 @@ def get_sequence_from_user(current_sequence):
     return sequence
 
 def get_shot_numbers(sequence):
-    return [f"{sequence}_{i:04d}" for i in range(10, 1000, 10)]
+    # One listing of the sequence folder instead of probing SH0010-SH0990
+    sequence_path = storageroots.sequence_path("out", sequence)
+    try:
+        with sharepool.share_slot(sequence_path):
+            names = rendercatalog.listdir(sequence_path)
+    except OSError:
+        print(f"Sequence folder not found: {sequence_path}")
+        return []
+    shots = sorted((match.group(1) for match in map(SHOT_FOLDER_RE.match, names) if match), key=int)
+    return [f"{sequence}_{shot}" for shot in shots]
+
+def render_base_path(sequence, shot, task_type):
+    return storageroots.shot_path("out", sequence, shot, "compositing_denoise" if task_type == 'denoise' else "compositing", "render")
 
 def find_latest_render(sequence, shot, task_type):
-    base_path = f"Y:/20105_Pysna_film/out/FILM/SQ{sequence}/SH{shot}/{'compositing_denoise' if task_type == 'denoise' else 'compositing'}/render/"
-    if not os.path.exists(base_path):
-        return None
-    versions = [d for d in os.listdir(base_path) if d.startswith('v')]
-    return os.path.join(base_path, max(versions, key=lambda x: int(x[1:]))) if versions else None
+    base_path = render_base_path(sequence, shot, task_type)
+    with sharepool.share_slot(base_path):
+        version = versions.resolve_version(base_path, VERSION_POLICY)
+    return os.path.join(base_path, version) if version else None
 
-def find_frame_range(render_path, sequence, shot, version, task_type):
-    file_pattern = f"pp_FILM_SQ{sequence}_SH{shot}_{'compositing_denoise' if task_type == 'denoise' else 'comp'}_{version}.*.exr"
-    files = [f for f in os.listdir(render_path) if re.match(file_pattern.replace('*', '\d+'), f)]
-    if files:
-        frames = [int(re.search(r'\.(\d+)\.', f).group(1)) for f in files]
-        return min(frames), max(frames)
+def find_frame_set(render_path, sequence, shot, version, task_type):
+    file_head = f"pp_FILM_SQ{sequence}_SH{shot}_{'compositing_denoise' if task_type == 'denoise' else 'comp'}_{version}."
+    with sharepool.share_slot(render_path):
+        names = rendercatalog.listdir(render_path)
+    frame_set = framesets.find_sequence(names, file_head, ('.exr',))
+    if frame_set:
+        return frame_set
     
     print(f"No frames found for SQ{sequence} SH{shot} in {render_path}")
+    return None
+
+def find_frame_range(render_path, sequence, shot, version, task_type):
+    frame_set = find_frame_set(render_path, sequence, shot, version, task_type)
+    if frame_set:
+        return frame_set.first, frame_set.last
     return None, None
 
-def create_read_node(sequence, shot, render_path, task_type, color):
+def validate_loaded_shots(shots):
+    """Check the frames of loaded shots [(sequence, shot, render_path, frame_set), ...] in the background, one job per shot."""
+    reports = []
+
+    def discover(shot_info):
+        sequence, shot, render_path, frame_set = shot_info
+        return renderintegrity.validate_layers({f"SQ{sequence} SH{shot}": (render_path, frame_set)})[0]
+
+    def collect(batch):
+        reports.extend(report for _, report in batch)
+
+    def finish(load_result):
+        damaged = [report.summary() for report in reports if not report.ok]
+        message = "Shots with damaged frames:\n" + "\n".join(damaged) if damaged else renderintegrity.format_report(reports)
+        if load_result.summary():
+            message += "\n\n" + load_result.summary()
+        print(message)
+        if nuke.GUI and damaged:
+            nuke.message(message)
+
+    # A long shot on a busy share can take minutes, so these jobs are never skipped
+    asyncload.run_async("Validate Sequence Renders", shots, discover, collect, finish, 1, timeout=None)
+
+def probe_shot(sequence, shot, task_type):
+    """Filesystem part of loading a shot, safe to run on a worker thread."""
+    base_path = render_base_path(sequence, shot, task_type)
+    with sharepool.share_slot(base_path):
+        render_layers = rendermanifest.read_render_layers(base_path, VERSION_POLICY)
+    published = (render_layers or {}).get(rendermanifest.MAIN_LAYER)
+    if published and published["frames"]:
+        frame_set = published["frames"]
+        file_head = f"pp_FILM_SQ{sequence}_SH{shot}_{'compositing_denoise' if task_type == 'denoise' else 'comp'}_{published['version']}."
+        # Only trust the manifest when it describes the sequence the Read will point at
+        if frame_set.head == file_head:
+            return {"render_path": published["path"], "frame_range": frame_set.frame_range(), "frame_set": frame_set}
+
+    render_path = find_latest_render(sequence, shot, task_type)
+    if not render_path:
+        return None
+    version = os.path.basename(render_path)
+    frame_set = find_frame_set(render_path, sequence, shot, version, task_type)
+    if not frame_set:
+        return {"render_path": render_path, "frame_range": (None, None), "frame_set": None}
+    return {"render_path": render_path, "frame_range": frame_set.frame_range(), "frame_set": frame_set}
+
+def plan_read(sequence, shot, render_path, task_type, color, frame_range=None):
+    """The Read a shot should have, as a loadplan.PlannedRead, or None without frames."""
     version = os.path.basename(render_path)
     file_pattern = f"pp_FILM_SQ{sequence}_SH{shot}_{'compositing_denoise' if task_type == 'denoise' else 'comp'}_{version}.%06d.exr"
     full_path = os.path.join(render_path, file_pattern)
     
-    first_frame, last_frame = find_frame_range(render_path, sequence, shot, version, task_type)
+    if frame_range is None:
+        frame_range = find_frame_range(render_path, sequence, shot, version, task_type)
+    first_frame, last_frame = frame_range
     if first_frame is None or last_frame is None:
         return None
     
-    unique_name = f"Read_SQ{sequence}_SH{shot}_{task_type}_{random.randint(1000, 9999)}"
-    
-    read_node = nuke.nodes.Read(name=unique_name)
-    read_node['file'].setValue(full_path.replace("\\", "/"))
-    read_node['first'].setValue(first_frame)
-    read_node['last'].setValue(last_frame)
-    read_node['localizationPolicy'].setValue(1)  # Set to "on"
-    read_node['tile_color'].setValue(int(color))
-    
-    return read_node
-
-def create_text_node(sequence, shot, task_type, color):
-    text_node = nuke.nodes.Text2()
-    text_node['message'].setValue(f"SQ{sequence}\nSH{shot}\n{task_type.upper()}")
-    text_node['font_size'].setValue(50)
-    text_node['global_font_scale'].setValue(0.5)
-    text_node['box'].setValue([0, 0, 1920, 1080])
-    text_node['xjustify'].setValue('center')
-    text_node['yjustify'].setValue('bottom')
-    text_node['color'].setValue([1, 1, 1, 1])
-    text_node['label'].setValue("[value message]")
-    text_node['tile_color'].setValue(int(color))
+    return loadplan.PlannedRead(
+        loadplan.node_name("Read", f"SQ{sequence}", f"SH{shot}", task_type),
+        {"file": full_path.replace("\\", "/"), "first": first_frame, "last": last_frame},
+        knobs={"localizationPolicy": 1, "tile_color": int(color)},  # localizationPolicy 1 is "on"
+        info={"sequence": sequence, "shot": shot}
+    )
+
+def create_read_node(sequence, shot, render_path, task_type, color, frame_range=None, nodes=None, planned=None):
+    """nodes is nuke.nodes by default, or a graphbuilder.GraphBuilder to create the Read in one paste with others."""
+    nodes = nodes or nuke.nodes
+    planned = planned or plan_read(sequence, shot, render_path, task_type, color, frame_range)
+    if planned is None:
+        return None
+    return loadplan.mark(nodes.Read(name=planned.name, **planned.create_knobs()))
+
+def watch_shot_read(sequence, shot, task_type, read_name):
+    """Keep a loaded shot Read on the newest version and frame range while the watcher is on."""
+    if not renderwatcher.is_enabled():
+        return
+    base_path = render_base_path(sequence, shot, task_type)
+
+    def resolve():
+        folders = {base_path}
+        folders.update(os.path.join(base_path, name) for name in rendercatalog.listdir(base_path)
+                       if versions.is_version_folder(name))
+        render_path = find_latest_render(sequence, shot, task_type)
+        if not render_path:
+            return {}, folders
+        version = os.path.basename(render_path)
+        frame_set = find_frame_set(render_path, sequence, shot, version, task_type)
+        if not frame_set:
+            return {}, folders
+        file_pattern = f"pp_FILM_SQ{sequence}_SH{shot}_{'compositing_denoise' if task_type == 'denoise' else 'comp'}_{version}.%06d.exr"
+        values = {
+            "file": os.path.join(render_path, file_pattern).replace("\\", "/"),
+            "first": frame_set.first,
+            "last": frame_set.last,
+        }
+        return {read_name: values}, folders
+
+    renderwatcher.watch(base_path, resolve)
+
+def create_text_node(sequence, shot, task_type, color, nodes=None):
+    nodes = nodes or nuke.nodes
+    text_node = nodes.Text2(
+        name=loadplan.node_name("Text", f"SQ{sequence}", f"SH{shot}", task_type),
+        message=f"SQ{sequence}\nSH{shot}\n{task_type.upper()}",
+        font_size=50,
+        global_font_scale=0.5,
+        box=[0, 0, 1920, 1080],
+        xjustify='center',
+        yjustify='bottom',
+        color=[1, 1, 1, 1],
+        label="[value message]",
+        tile_color=int(color)
+    )
     return text_node
 
-def create_contact_sheet_auto(read_nodes):
-    contact_sheet = nuke.nodes.ContactSheet(inputs=read_nodes)
-    contact_sheet['name'].setValue(f'ContactSheetAuto_{random.randint(1000, 9999)}')
+def contact_sheet_name(sequences):
+    return loadplan.node_name("ContactSheetAuto", "_".join(sequences))
+
+def create_contact_sheet_auto(read_nodes, sequences):
+    contact_sheet = nuke.nodes.ContactSheet(inputs=[graphbuilder.real_node(node) for node in read_nodes])
+    contact_sheet['name'].setValue(contact_sheet_name(sequences))
     contact_sheet['width'].setExpression('input.width*columns*resMult')
     contact_sheet['height'].setExpression('input.height*rows*resMult')
     contact_sheet['rows'].setExpression('[expr {int( (sqrt( [numvalue inputs] ) ) )} ] * [expr {int( ceil ( ([numvalue inputs] /(sqrt( [numvalue inputs] ) ) )) )} ] < [numvalue inputs]   ? [expr {int( (sqrt( [numvalue inputs] ) ) )} ] +1 : [expr {int( (sqrt( [numvalue inputs] ) ) )} ]')
@@ -103,27 +227,19 @@ def create_contact_sheet_auto(read_nodes):
     return contact_sheet
 
 def create_backdrop(nodes, sequences):
-    bdX = min([node.xpos() for node in nodes])
-    bdY = min([node.ypos() for node in nodes])
-    bdW = max([node.xpos() + node.screenWidth() for node in nodes]) - bdX
-    bdH = max([node.ypos() + node.screenHeight() for node in nodes]) - bdY
-
-    backdrop_padding = 340
-    bdX += backdrop_padding * 0.15
-    bdY += backdrop_padding * 0.15
-    bdW *= 0.85
-    bdH *= 0.85
-
-    backdrop = nuke.nodes.BackdropNode(
-        xpos = bdX - backdrop_padding,
-        bdwidth = bdW + backdrop_padding * 2,
-        ypos = bdY - backdrop_padding,
-        bdheight = bdH + backdrop_padding * 2,
-        tile_color = int(0x808080ff),
-        note_font_size=42,
-        name = f'SEQ_Check_{"-".join(sequences)}_{random.randint(1000, 9999)}'
+    name = loadplan.node_name("SEQ_Check", "_".join(sequences))
+    backdrop = nuke.toNode(name)
+    if backdrop is not None:
+        # Re-run, the backdrop from the first run is fitted around the grown grid
+        nodelayout.fit_backdrop(backdrop, nodes, BACKDROP_PADDING)
+        return backdrop
+    backdrop = nodelayout.backdrop(
+        nodes,
+        label=f"SEQ Check {', '.join(sequences)}",
+        color=0x808080ff,
+        padding=BACKDROP_PADDING,
+        name=name
     )
-    backdrop['label'].setValue(f"SEQ Check {', '.join(sequences)}")
     
     return backdrop
 
@@ -144,8 +260,8 @@ def load_sequence_and_create_contact_sheet():
         nuke.message("Could not find PFX_Write_MAIN node.")
         return
     
-    start_x = write_node.xpos() - 500
-    start_y = write_node.ypos() + 900
+    # Wanted spot below the Write, moved down past existing nodes once the shot count is known
+    layout = {"origin": (write_node.xpos() - 500, write_node.ypos() + 900)}
     
     all_read_nodes = []
     sequences = []
@@ -163,37 +279,118 @@ def load_sequence_and_create_contact_sheet():
         sequences.append(sequence)
         current_sequence = f"{int(sequence) + 10:04d}"  # Increment for next iteration
     
-    for index, sequence in enumerate(sequences):
-        color = generate_color(index, len(sequences))
-        
-        for shot in get_shot_numbers(sequence):
-            render_path = find_latest_render(sequence, shot.split('_')[1], task_type)
-            if render_path:
-                read_node = create_read_node(sequence, shot.split('_')[1], render_path, task_type, color)
-                if read_node:
-                    text_node = create_text_node(sequence, shot.split('_')[1], task_type, color)
-                    text_node.setInput(0, read_node)
-                    all_read_nodes.append(text_node)
-            elif task_type == 'denoise':
-                print(f"No denoise render found for SQ{sequence} SH{shot.split('_')[1]}")
-    
-    if all_read_nodes:
-        spacing_x, spacing_y, text_offset_y = 250, 250, 107
-        
-        for i, node in enumerate(all_read_nodes):
-            read_node = node.input(0)
-            read_node.setXYpos(start_x + (i % 5) * spacing_x, start_y + (i // 5) * spacing_y)
-            node.setXYpos(read_node.xpos(), read_node.ypos() + text_offset_y)
-        
-        contact_sheet = create_contact_sheet_auto(all_read_nodes)
-        contact_sheet.setXYpos(start_x + 2 * spacing_x, start_y + ((len(all_read_nodes) - 1) // 5 + 1) * spacing_y + text_offset_y + 100)
-        
-        all_nodes = all_read_nodes + [contact_sheet]
-        backdrop = create_backdrop(all_nodes, sequences)
+    colors = {sequence: generate_color(index, len(sequences)) for index, sequence in enumerate(sequences)}
+    incomplete_shots = []
+    shots_to_validate = []  # Shots whose Read was created or updated, checked once the load is done
+    spacing_x, spacing_y, text_offset_y = 250, 250, 107
+    
+    # Reads already in the script, a re-run only updates them and adds the shots that are new
+    read_index = loadplan.ReadIndex()
+    counts = {"new": 0, "updated": 0, "unchanged": 0}
+    contact_sheet = nuke.toNode(contact_sheet_name(sequences))
+    if contact_sheet is not None:
+        # The grid of the first run is continued below its last shot
+        all_read_nodes.extend(node for node in (contact_sheet.input(i) for i in range(contact_sheet.inputs())) if node)
+        grid_reads = [node.input(0) or node for node in all_read_nodes]
+        if grid_reads:
+            layout["origin"] = (min(node.xpos() for node in grid_reads), min(node.ypos() for node in grid_reads))
+            layout["reserved"] = True
+    sheet_inputs = len(all_read_nodes)
+    
+    def list_jobs():
+        # One listing per sequence, done off the UI thread like the rest of the discovery
+        shot_lists = sharepool.map_ordered(get_shot_numbers, sequences, PROBE_CONCURRENCY)
+        jobs = [(sequence, shot.split('_')[1]) for sequence, shots in zip(sequences, shot_lists) for shot in shots or []]
+        layout["count"] = len(jobs)
+        return jobs
+    
+    def reserve_space():
+        # Room for every listed shot, the contact sheet and the backdrop, taken once for the whole load
+        rows = (max(layout.get("count", 0), 1) - 1) // COLUMNS + 1
+        width = (COLUMNS - 1) * spacing_x + 80
+        height = rows * spacing_y + text_offset_y + 200
+        x, y = layout["origin"]
+        x, y = nodelayout.find_free_origin(x - BACKDROP_PADDING, y - BACKDROP_PADDING,
+                                           width + BACKDROP_PADDING * 2, height + BACKDROP_PADDING * 2)
+        layout["origin"] = (x + BACKDROP_PADDING, y + BACKDROP_PADDING)
+        layout["reserved"] = True
+    
+    def discover(job):
+        sequence, shot = job
+        result = probe_shot(sequence, shot, task_type)
+        if not result and task_type == 'denoise':
+            print(f"No denoise render found for SQ{sequence} SH{shot}")
+        return result
+    
+    def build_batch(batch):
+        # Runs on the main thread, shots are placed on the grid as they arrive
+        if not layout.get("reserved"):
+            reserve_space()
+        start_x, start_y = layout["origin"]
+        planned_reads = [plan_read(sequence, shot, result["render_path"], task_type, colors[sequence], result["frame_range"])
+                         for (sequence, shot), result in batch]
+        load_diff = loadplan.diff([planned for planned in planned_reads if planned], read_index)
+        loadplan.apply_changes(load_diff)
+        counts["new"] += len(load_diff.new)
+        counts["updated"] += len(load_diff.changed)
+        counts["unchanged"] += len(load_diff.unchanged)
+        new_reads = {id(planned) for planned in load_diff.new}
+        loaded_reads = new_reads | {id(planned) for planned, _, _ in load_diff.changed}
         
-        nuke.message(f"Loaded {len(all_read_nodes)} shots from {len(sequences)} sequences: {', '.join(sequences)}")
-    else:
-        nuke.message("No shots were loaded.")
+        graph = graphbuilder.GraphBuilder()
+        for ((sequence, shot), result), planned in zip(batch, planned_reads):
+            if planned is None:
+                continue
+            if id(planned) in loaded_reads and result["frame_set"]:
+                shots_to_validate.append((sequence, shot, result["render_path"], result["frame_set"]))
+            if id(planned) not in new_reads:
+                existing = read_index.find(planned)
+                watch_shot_read(sequence, shot, task_type, existing.name())
+                continue
+            color = colors[sequence]
+            read_node = create_read_node(sequence, shot, result["render_path"], task_type, color, nodes=graph, planned=planned)
+            read_index.add(planned, read_node)
+            text_node = create_text_node(sequence, shot, task_type, color, graph)
+            text_node.setInput(0, read_node)
+            i = len(all_read_nodes)
+            read_node.setXYpos(start_x + (i % COLUMNS) * spacing_x, start_y + (i // COLUMNS) * spacing_y)
+            text_node.setXYpos(read_node.xpos(), read_node.ypos() + text_offset_y)
+            all_read_nodes.append(text_node)
+            watch_shot_read(sequence, shot, task_type, read_node.name())
+            if result["frame_set"].has_gaps():
+                incomplete_shots.append(f"SQ{sequence} SH{shot}: missing {framesets.format_ranges(result['frame_set'].missing_ranges())}")
+        # The whole batch is created with one paste
+        graph.apply()
+    
+    def finish(load_result):
+        summary = load_result.summary()
+        if all_read_nodes:
+            start_x, start_y = layout["origin"]
+            if contact_sheet is None:
+                sheet = create_contact_sheet_auto(all_read_nodes, sequences)
+            else:
+                sheet = contact_sheet
+                for i in range(sheet_inputs, len(all_read_nodes)):
+                    sheet.setInput(i, graphbuilder.real_node(all_read_nodes[i]))
+            sheet.setXYpos(start_x + 2 * spacing_x, start_y + ((len(all_read_nodes) - 1) // COLUMNS + 1) * spacing_y + text_offset_y + 100)
+            
+            all_nodes = all_read_nodes + [sheet]
+            backdrop = create_backdrop(all_nodes, sequences)
+            
+            message = f"Loaded {len(all_read_nodes)} shots from {len(sequences)} sequences: {', '.join(sequences)}"
+            message += f"\n{counts['new']} new, {counts['updated']} updated, {counts['unchanged']} up to date"
+            if incomplete_shots:
+                message += "\n\nShots with missing frames:\n" + "\n".join(incomplete_shots)
+            if summary:
+                message += "\n\n" + summary
+            nuke.message(message)
+        else:
+            nuke.message("No shots were loaded." + (f"\n\n{summary}" if summary else ""))
+        if VALIDATE_FRAMES and shots_to_validate:
+            validate_loaded_shots(shots_to_validate)
+    
+    # Filesystem discovery runs on worker threads, nodes are created on the main thread in job order
+    asyncload.run_async("MultiSequence Loader", list_jobs, discover, build_batch, finish, PROBE_CONCURRENCY)
 
 if __name__ == "__main__":
     load_sequence_and_create_contact_sheet()
\ No newline at end of file
@@ -0,0 +1,58 @@
+# sharepool.py
+#
+# Bounded thread pool for filesystem probing on the network shares.
+# Work is spread over a fixed number of threads, results come back in the order the items
+# were given, and every share (drive letter, UNC share or mount) has its own limit of
+# concurrent requests so a big load does not hammer a single filer.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# User variables
+PROBE_WORKERS = 16  # Threads used for probing
+PER_SHARE_LIMIT = 6  # Concurrent filesystem requests allowed against one share
+
+_share_locks = {}
+_share_locks_guard = threading.Lock()
+
+
+def share_key(path):
+    """Return the share a path lives on: 'Y:', '//server/share' or the first two levels of a mount."""
+    path = path.replace('\\', '/')
+    if len(path) >= 2 and path[1] == ':':
+        return path[:2].upper()
+    if path.startswith('//'):
+        return '/'.join(path.split('/')[:4])
+    parts = [part for part in path.split('/') if part]
+    return '/' + '/'.join(parts[:2])
+
+
+def share_slot(path):
+    """Semaphore limiting concurrent requests to the share of the given path, use as a context manager."""
+    key = share_key(path)
+    with _share_locks_guard:
+        semaphore = _share_locks.get(key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(PER_SHARE_LIMIT)
+            _share_locks[key] = semaphore
+    return semaphore
+
+
+def _call(func, item):
+    try:
+        return func(item)
+    except Exception as e:
+        print(f"Probe failed for {item}: {e}")
+        return None
+
+
+def map_ordered(func, items, max_workers=None):
+    """Run func over items on a bounded pool and return the results in input order. Failures become None."""
+    items = list(items)
+    if not items:
+        return []
+    workers = max(1, min(max_workers or PROBE_WORKERS, len(items)))
+    if workers == 1:
+        return [_call(func, item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda item: _call(func, item), items))
@@ -0,0 +1,104 @@
+# storageroots.py
+#
+# Storage roots of the film project, resolved once per session.
+# Every project area (renders in "out", scripts in "work") can be served by one of several
+# mounts: the artist drive letters on Windows or the matching mount points on the Linux render
+# nodes. The first mount that actually holds the area is remembered, so loaders build their
+# paths from it instead of repeating failed exists checks against mounts that are not there.
+# A root can be forced with the PFX_<AREA>_ROOT environment variable (e.g. PFX_OUT_ROOT).
+
+import os
+import sys
+import threading
+
+# User variables
+PROJECT = "20105_Pysna_film"
+AREA_DRIVES = {  # Drives tried for each project area, in order
+    "out": ["Y:", "Z:", "X:"],
+    "work": ["Z:", "Y:", "X:"],
+}
+LINUX_MOUNTS = {  # Where the drive letters are mounted on Linux workstations and render nodes
+    "X:": "/mnt/X",
+    "Y:": "/mnt/Y",
+    "Z:": "/mnt/Z",
+}
+
+_roots = {}
+_roots_lock = threading.Lock()
+
+
+def is_linux():
+    return sys.platform.startswith('linux')
+
+
+def local_mount(drive):
+    """Path the drive letter is reachable under on this machine."""
+    if is_linux():
+        return LINUX_MOUNTS.get(drive.upper(), f"/mnt/{drive[0].upper()}")
+    return f"{drive.upper()}/"
+
+
+def _candidates(area):
+    override = os.environ.get(f"PFX_{area.upper()}_ROOT")
+    if override:
+        yield override.replace("\\", "/").rstrip("/")
+    for drive in AREA_DRIVES.get(area, []):
+        yield f"{local_mount(drive).rstrip('/')}/{PROJECT}/{area}"
+
+
+def area_root(area):
+    """Root of a project area, e.g. 'Y:/20105_Pysna_film/out'. Probed only on first use."""
+    with _roots_lock:
+        root = _roots.get(area)
+        if root is not None:
+            return root
+        candidates = list(_candidates(area))
+        root = next((path for path in candidates if os.path.isdir(path)), None)
+        if root is None:
+            # Keep the expected path so error messages still point somewhere sensible
+            root = candidates[0] if candidates else f"{PROJECT}/{area}"
+            print(f"No mount found for '{area}', tried: {', '.join(candidates)}")
+        else:
+            print(f"Using {root} for '{area}'")
+        _roots[area] = root
+        return root
+
+
+def film_path(area, *parts):
+    """Path inside the FILM folder of an area, always with forward slashes."""
+    return "/".join([area_root(area), "FILM"] + [str(part).strip("/") for part in parts])
+
+
+def sequence_path(area, sequence):
+    return film_path(area, f"SQ{sequence}")
+
+
+def shot_path(area, sequence, shot, *parts):
+    return film_path(area, f"SQ{sequence}", f"SH{shot}", *parts)
+
+
+def to_local(path):
+    """
+    Map a path written on another platform onto this machine's mounts,
+    e.g. 'Y:/20105_Pysna_film/out/...' becomes '/mnt/Y/20105_Pysna_film/out/...' on Linux.
+    """
+    path = path.replace("\\", "/")
+    if is_linux():
+        if len(path) >= 2 and path[1] == ':':
+            return local_mount(path[:2]).rstrip('/') + path[2:]
+    else:
+        for drive, mount in LINUX_MOUNTS.items():
+            if path == mount or path.startswith(mount + "/"):
+                return drive.upper() + path[len(mount):]
+    return path
+
+
+def filename_filter(path):
+    """nuke.addFilenameFilter callback, lets scripts saved on Windows load on Linux render nodes."""
+    return to_local(path) if path else path
+
+
+def reset():
+    """Forget the resolved roots, e.g. after a share was mounted during the session."""
+    with _roots_lock:
+        _roots.clear()
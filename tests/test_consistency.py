@@ -0,0 +1,50 @@
+# test_consistency.py
+#
+# Consistency rules on parsed scripts, runs without Nuke:
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import consistency
+import nkparser
+
+
+def zdefocus_script(f_stops):
+    """One PxF_ZDefocus group per value, None leaves fStop at its default (not written)."""
+    lines = ["Root {", " inputs 0", "}"]
+    for index, f_stop in enumerate(f_stops):
+        lines += ["Group {", " inputs 0", f" name PxF_ZDefocus{index}"]
+        if f_stop is not None:
+            lines.append(f" fStop {f_stop}")
+        lines.append("}")
+    return nkparser.parse_text("\n".join(lines))
+
+
+def f_stop_mismatches(f_stops):
+    result = consistency.check([consistency.ZDEFOCUS_RULE], index=zdefocus_script(f_stops))[0]
+    return sorted(mismatch.node for mismatch in result.mismatches), result.expected.get('fStop')
+
+
+def test_values_within_tolerance_vote_together():
+    wrong, expected = f_stop_mismatches([5.6001, 5.6002, 5.6003, 8, 8])
+    assert wrong == ["PxF_ZDefocus3", "PxF_ZDefocus4"]
+    assert abs(expected - 5.6) <= consistency.DEFAULT_TOLERANCE
+
+
+def test_agreeing_values_pass():
+    assert f_stop_mismatches([5.6, 5.602, 5.6]) == ([], None)
+
+
+def test_default_knobs_vote_on_parsed_scripts():
+    wrong, expected = f_stop_mismatches([None, None, None, 4, 4])
+    assert wrong == ["PxF_ZDefocus3", "PxF_ZDefocus4"]
+    assert expected == consistency.DEFAULT_VALUE
+
+
+def test_declared_defaults_compare_with_tolerance():
+    rule = consistency.Rule("ZDefocus", ['fStop'], names=['PxF_ZDefocus'], defaults={'fStop': 16})
+    result = consistency.check([rule], index=zdefocus_script([None, None, 16.001, 4]))[0]
+    assert [(mismatch.node, mismatch.expected) for mismatch in result.mismatches] == [("PxF_ZDefocus3", 16)]
@@ -0,0 +1,69 @@
+# test_graphbuilder_roundtrip.py
+#
+# Writes graphs with GraphBuilder.to_nk and reads them back with nkparser, the inputs must come
+# back on the same index they were set on. Runs without Nuke:
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import graphbuilder
+import nkparser
+
+
+def round_trip(graph):
+    script = nkparser.parse_text(graph.to_nk())
+    return {node.name(): node for node in script.nodes}
+
+
+def input_names(node):
+    return [None if input_node is None else input_node.name() for input_node in node.inputs]
+
+
+def test_merge_inputs():
+    graph = graphbuilder.GraphBuilder()
+    background = graph.Constant(name="BG")
+    foreground = graph.CheckerBoard2(name="FG")
+    graph.Merge2(name="Over", inputs=[background, foreground], operation="over")
+
+    nodes = round_trip(graph)
+    assert input_names(nodes["Over"]) == ["BG", "FG"]
+    assert nodes["Over"]["operation"].value() == "over"
+
+
+def test_grade_with_mask():
+    graph = graphbuilder.GraphBuilder()
+    plate = graph.Read(name="Plate", file="/renders/sh0010/beauty.####.exr")
+    matte = graph.Roto(name="Matte")
+    graph.Grade(name="Grade_Masked", inputs=[plate, matte], white=1.2)
+
+    nodes = round_trip(graph)
+    assert input_names(nodes["Grade_Masked"]) == ["Plate", "Matte"]
+
+
+def test_premult_chain():
+    graph = graphbuilder.GraphBuilder()
+    plate = graph.Read(name="Plate")
+    matte = graph.Roto(name="Matte")
+    grade = graph.Grade(name="Grade_Masked", inputs=[plate, matte])
+    shuffle = graph.Shuffle2(name="Alpha", inputs=[grade])
+    premult = graph.Premult(name="Premult_Out", inputs=[shuffle])
+    graph.Merge2(name="Comp", inputs=[plate, premult])
+
+    nodes = round_trip(graph)
+    assert input_names(nodes["Premult_Out"]) == ["Alpha"]
+    assert input_names(nodes["Alpha"]) == ["Grade_Masked"]
+    assert input_names(nodes["Grade_Masked"]) == ["Plate", "Matte"]
+    assert input_names(nodes["Comp"]) == ["Plate", "Premult_Out"]
+
+
+def test_empty_inputs_keep_their_index():
+    graph = graphbuilder.GraphBuilder()
+    matte = graph.Roto(name="Matte")
+    grade = graph.Grade(name="Grade_Masked")
+    grade.setInput(1, matte)
+
+    nodes = round_trip(graph)
+    assert input_names(nodes["Grade_Masked"]) == [None, "Matte"]
@@ -0,0 +1,71 @@
+# test_loadplan.py
+#
+# Re-run planning of the loaders: only Reads a PFX loader marked are updated, an artist's own Read
+# on the same render is left alone. Runs without Nuke:
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import graphbuilder
+import loadplan
+
+
+class FakeKnob(object):
+    def __init__(self, value):
+        self._value = value
+
+    def value(self):
+        return self._value
+
+
+class FakeRead(object):
+    def __init__(self, name, path, first=1001, last=1100, marked=False):
+        self._name = name
+        self._knobs = {'file': FakeKnob(path), 'first': FakeKnob(first), 'last': FakeKnob(last)}
+        if marked:
+            self._knobs[loadplan.MARKER_KNOB] = FakeKnob("")
+
+    def name(self):
+        return self._name
+
+    def knobs(self):
+        return self._knobs
+
+    def __getitem__(self, knob_name):
+        return self._knobs[knob_name]
+
+
+def planned_read(version="v004"):
+    path = f"/renders/SQ0010/SH0020/{version}/beauty_{version}.%04d.exr"
+    return loadplan.PlannedRead(loadplan.node_name("Read", "beauty"), {'file': path, 'first': 1001, 'last': 1100})
+
+
+def test_artist_read_is_left_alone():
+    artist_read = FakeRead("Read1", "/renders/SQ0010/SH0020/v003/beauty_v003.####.exr")
+    load_diff = loadplan.diff([planned_read()], loadplan.ReadIndex([artist_read]))
+    assert [planned.name for planned in load_diff.new] == ["Read_beauty"]
+    assert not load_diff.changed and not load_diff.unchanged
+
+
+def test_marked_read_is_updated():
+    pfx_read = FakeRead("Read_beauty_renamed", "/renders/SQ0010/SH0020/v003/beauty_v003.%04d.exr", marked=True)
+    artist_read = FakeRead("Read1", "/renders/SQ0010/SH0020/v003/beauty_v003.%04d.exr")
+    load_diff = loadplan.diff([planned_read()], loadplan.ReadIndex([artist_read, pfx_read]))
+    assert [(node, changes) for _, node, changes in load_diff.changed] == \
+        [(pfx_read, {'file': "/renders/SQ0010/SH0020/v004/beauty_v004.%04d.exr"})]
+
+
+def test_unmarked_read_with_the_loader_name_is_ours():
+    # Loaded before the marker existed
+    old_read = FakeRead("Read_beauty", "/renders/SQ0010/SH0020/v004/beauty_v004.%04d.exr")
+    load_diff = loadplan.diff([planned_read()], loadplan.ReadIndex([old_read]))
+    assert load_diff.unchanged == [(load_diff.unchanged[0][0], old_read)]
+
+
+def test_graph_reads_are_marked():
+    graph = graphbuilder.GraphBuilder()
+    loadplan.mark(graph.Read(name="Read_beauty"))
+    assert f"addUserKnob {{1 {loadplan.MARKER_KNOB} +INVISIBLE}}" in graph.to_nk()
@@ -0,0 +1,144 @@
+# versions.py
+#
+# Version resolver shared by all loaders.
+# Versions are ordered by their number (v9 < v10), never as strings. Besides plain "latest"
+# there is a "latest complete" policy that skips versions still rendering on the farm:
+# a version is complete when its frames have no holes and cover the cut range, or, when no
+# cut range is known, when it has at least as many frames as the previous version.
+# Results are memoised per folder mtime, so asking again for an unchanged folder is free.
+
+import os
+import re
+import threading
+import rendercatalog
+import framesets
+
+LATEST = 'latest'
+LATEST_COMPLETE = 'latest_complete'
+
+# User variables
+DEFAULT_POLICY = LATEST
+
+VERSION_FOLDER_RE = re.compile(r'^v(\d+)$')
+VERSION_TOKEN_RE = re.compile(r'(?<![A-Za-z])[vV](\d+)')
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def version_number(name):
+    """Number of the last vNNN token in a name, or None."""
+    matches = VERSION_TOKEN_RE.findall(name)
+    return int(matches[-1]) if matches else None
+
+
+def is_version_folder(name):
+    return bool(VERSION_FOLDER_RE.match(name))
+
+
+def sort_versions(names, reverse=False):
+    """Version folder names sorted numerically, other names are dropped."""
+    return sorted((name for name in names if is_version_folder(name)), key=lambda name: int(name[1:]), reverse=reverse)
+
+
+def latest_file(names):
+    """Newest of a list of versioned file names (e.g. preview .movs or .nk scripts), or None."""
+    versioned = [name for name in names if version_number(name) is not None]
+    if not versioned:
+        return max(names) if names else None
+    return max(versioned, key=lambda name: (version_number(name), name))
+
+
+def is_complete(frame_set, cut_range=None, previous=None):
+    if not frame_set or frame_set.has_gaps():
+        return False
+    if cut_range and None not in cut_range:
+        return frame_set.covers(cut_range[0], cut_range[1])
+    if previous:
+        return len(frame_set) >= len(previous)
+    return True
+
+
+def pick_version(names, policy=DEFAULT_POLICY, cut_range=None, frames_for=None):
+    """
+    Pick a version from folder names. frames_for(name) returns the FrameSet of a version and
+    is only needed for the LATEST_COMPLETE policy. When no version is complete, the latest one
+    is returned so the loaders still have something to show.
+    """
+    ordered = sort_versions(names, reverse=True)
+    if not ordered:
+        return None
+    if policy != LATEST_COMPLETE or frames_for is None:
+        return ordered[0]
+
+    # Frames are only looked up for the versions actually inspected, newest first
+    frame_sets = {}
+
+    def frames(index):
+        if index not in frame_sets:
+            frame_sets[index] = frames_for(ordered[index])
+        return frame_sets[index]
+
+    has_cut_range = bool(cut_range) and None not in cut_range
+    for index, name in enumerate(ordered):
+        previous = None
+        if not has_cut_range:
+            previous = next((frames(i) for i in range(index + 1, len(ordered)) if frames(i)), None)
+        if is_complete(frames(index), cut_range, previous):
+            if index:
+                print(f"Skipping incomplete versions {', '.join(ordered[:index])}, using {name}")
+            return name
+    print(f"No complete version found, using {ordered[0]}")
+    return ordered[0]
+
+
+def _folder_frames(version_path):
+    try:
+        sequences = framesets.scan_sequences(rendercatalog.listdir(version_path))
+    except OSError:
+        return None
+    return sequences[0] if sequences else None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def resolve_version(path, policy=DEFAULT_POLICY, cut_range=None):
+    """
+    Return the version folder name to load from path (e.g. '.../compositing/render/'), or None.
+    With LATEST_COMPLETE the frames inside each version folder are checked.
+    """
+    mtime = _mtime(path)
+    if mtime is None:
+        return None
+    key = (os.path.normpath(path), policy, tuple(cut_range) if cut_range else None)
+    with _memo_lock:
+        cached = _memo.get(key)
+    if cached and cached[0] == mtime and all(_mtime(p) == m for p, m in cached[2]):
+        return cached[1]
+
+    try:
+        names = [name for name in rendercatalog.listdir(path) if is_version_folder(name)]
+    except OSError:
+        return None
+
+    inspected = []
+
+    def frames_for(name):
+        version_path = os.path.join(path, name)
+        inspected.append((version_path, _mtime(version_path)))
+        return _folder_frames(version_path)
+
+    version = pick_version(names, policy, cut_range, frames_for)
+    with _memo_lock:
+        _memo[key] = (mtime, version, inspected)
+    return version
+
+
+def clear_cache():
+    with _memo_lock:
+        _memo.clear()
@@ -1,52 +1,20 @@
 import nuke
-from collections import Counter
-
-def round_value(value):
-    if isinstance(value, (int, float)):
-        return round(value, 2)
-    return value
-
-def is_node_in_backdrop(node, backdrop):
-    node_x, node_y = node.xpos(), node.ypos()
-    bd_x, bd_y = backdrop.xpos(), backdrop.ypos()
-    bd_r, bd_t = bd_x + backdrop['bdwidth'].value(), bd_y + backdrop['bdheight'].value()
-    return bd_x <= node_x <= bd_r and bd_y <= node_y <= bd_t
+import consistency
 
 def find_wrong_zdefocus_nodes():
-    defocus_nodes = [n for n in nuke.allNodes() if 'PxF_ZDefocus' in n.name() and 'Controller' not in n.name()]
-    
-    if not defocus_nodes:
+    result = consistency.check([consistency.ZDEFOCUS_RULE])[0]
+
+    if not result.checked:
         nuke.message("No PxF_ZDefocusHERO nodes found in the script.")
         return
-    
-    print(f"Analyzing {len(defocus_nodes)} PxF_ZDefocusHERO nodes for wrong values:")
-    
-    purple_backdrops = [n for n in nuke.allNodes('BackdropNode') if n['tile_color'].value() == 2390460672]
-    knobs_to_compare = ['fStop', 'focalDistance', 'focalLength', 'filmBack']
-    
+
+    print(f"Analyzing {result.checked} PxF_ZDefocusHERO nodes for wrong values:")
+
+    correct_values = result.expected
     wrong_nodes = {}
-    correct_values = {}
-    
-    for knob in knobs_to_compare:
-        knob_values = {}
-        for node in defocus_nodes:
-            if knob in node.knobs():
-                value = round_value(node[knob].value())
-                node_in_purple = any(is_node_in_backdrop(node, bd) for bd in purple_backdrops)
-                if value not in knob_values:
-                    knob_values[value] = []
-                knob_values[value].append((node.name(), node_in_purple))
-        
-        if len(knob_values) > 1:
-            most_common_value = Counter(round_value(node[knob].value()) for node in defocus_nodes if knob in node.knobs()).most_common(1)[0][0]
-            correct_values[knob] = most_common_value
-            
-            for value, nodes in knob_values.items():
-                if value != most_common_value:
-                    if knob not in wrong_nodes:
-                        wrong_nodes[knob] = []
-                    wrong_nodes[knob].extend([(node, in_purple, value) for node, in_purple in nodes])
-    
+    for mismatch in result.mismatches:
+        wrong_nodes.setdefault(mismatch.knob, []).append((mismatch.node, mismatch.in_backdrop, mismatch.value))
+
     if wrong_nodes:
         print("\nWrong nodes detected:")
         message = ["The following nodes have incorrect values:"]